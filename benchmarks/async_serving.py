@@ -0,0 +1,171 @@
+"""
+Benchmark de throughput sostenido: modo síncrono (`wsgi.py`, workers sync de gunicorn) frente al modo
+asíncrono (`asgi.py`, workers de uvicorn con el motor asyncio de SQLAlchemy).
+
+Llena una base de datos (SQLite temporal o `--db-url`), arranca cada modo con el mismo número de
+workers y mantiene `--connections` clientes concurrentes (conexiones keep-alive, una por hilo) pidiendo
+endpoints de lectura durante `--duration` segundos. Se repite para cada valor de `--connections`.
+
+La diferencia se nota sobre todo cuando la base de datos tarda (red, consultas lentas): con PostgreSQL
+pasar `--db-url postgresql://...` (requiere psycopg2 y asyncpg).
+
+Uso:
+    $ python benchmarks/async_serving.py --workers 2 --connections 8,64,256 --duration 10
+    $ python benchmarks/async_serving.py --db-url postgresql://localhost/bench --output async.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import platform
+import threading
+import subprocess
+import http.client
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+from endpoints import seed, free_port, summarize  # noqa: E402
+
+# Rutas de lectura que se reparten al azar entre los clientes
+PATHS = [
+    "/personajes",
+    "/personajes?fields=id,name&limit=100",
+    "/personajes/{personaje}",
+    "/planetas",
+    "/planeta/{planeta}",
+    "/vehiculo/{vehiculo}",
+]
+
+MODES = {
+    "wsgi": ["wsgi:application"],
+    "asgi": ["asgi:application", "--worker-class", "uvicorn.workers.UvicornWorker"],
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="Base de datos a usar (se borra y se vuelve a crear). Por defecto un SQLite temporal")
+    parser.add_argument("--personajes", type=int, default=10000)
+    parser.add_argument("--planetas", type=int, default=5000)
+    parser.add_argument("--vehiculos", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=2, help="Workers de gunicorn en cada modo")
+    parser.add_argument("--connections", default="8,64,256", help="Clientes concurrentes (lista separada por comas)")
+    parser.add_argument("--duration", type=float, default=10, help="Segundos de carga por cada nivel de concurrencia")
+    parser.add_argument("--modes", default="wsgi,asgi")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    args = parser.parse_args(argv)
+    # Parámetros que espera endpoints.seed(): sin usuarios ni favoritos, no se borra nada
+    args.users, args.favorites, args.requests = 0, 0, 0
+    return args
+
+
+def wait_until_ready(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited with code {}".format(process.returncode))
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/personajes?limit=1")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start in {} seconds".format(timeout))
+
+
+def load(port, connections, duration, ids, seed_value):
+    """
+    Mantiene `connections` clientes pidiendo rutas durante `duration` segundos.
+    """
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(number):
+        rng = random.Random(seed_value + number)
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            path = rng.choice(PATHS)
+            for name in ("personaje", "planeta", "vehiculo"):
+                path = path.replace("{" + name + "}", str(rng.randint(*ids[name])))
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                # El worker sync cierra la conexión tras cada respuesta; se reabre en la siguiente petición
+                connection.close()
+                failed += 1
+                continue
+            local.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started, [])
+
+
+def run_mode(mode, args, db_url, ids):
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", *MODES[mode], "--chdir", SRC, "--bind", "127.0.0.1:{}".format(port),
+               "--workers", str(args.workers), "--log-level", "warning"]
+    # Sin caché de respuestas en ningún modo: se compara el coste de servir desde la base de datos
+    env = dict(os.environ, DATABASE_URL=db_url, CACHE_ENABLED="0", METRICS_ENABLED="0")
+    process = subprocess.Popen(command, env=env, cwd=ROOT)
+    results = {}
+    try:
+        wait_until_ready(port, process)
+        for connections in [int(value) for value in args.connections.split(",")]:
+            result = load(port, connections, args.duration, ids, args.seed)
+            results[str(connections)] = result
+            print("{:<5} {:>4} conns  {:>9} rps  p50 {:>8} ms  p99 {:>8} ms  {} errors".format(
+                mode, connections, result["throughput_rps"], result["p50_ms"], result["p99_ms"], result["errors"]))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="swapi-async-"), "bench.db")
+    os.environ["DATABASE_URL"] = db_url
+    import app as app_module
+
+    ids = seed(app_module.app, app_module.db, (app_module.Users, app_module.Personajes, app_module.Vehiculos,
+                                               app_module.Planetas, app_module.Favoritos_personajes,
+                                               app_module.Favoritos_vehiculos, app_module.Favoritos_planetas), args)
+    results = {mode: run_mode(mode, args, db_url, ids) for mode in args.modes.split(",")}
+    report = {
+        "workers": args.workers,
+        "duration_s": args.duration,
+        "database": db_url.split(":", 1)[0],
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Coste de CPU frente a bytes ahorrados de cada codificación y nivel de compresión.
+
+Genera el cuerpo JSON de una página del catálogo de `--rows` personajes (el mismo formato y codificador
+que `/personajes`) y, para gzip 1-9 y brotli 0-11 (si está instalado), mide el tamaño comprimido, la
+mediana del tiempo de compresión y de descompresión y el throughput de compresión.
+
+Uso:
+    $ python benchmarks/compression.py --rows 500 --output compression.json
+    $ python benchmarks/compression.py --rows 10000 --repeat 5
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import random
+import argparse
+import platform
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import compression  # noqa: E402
+from serialization import dumps  # noqa: E402
+from utils import encode_cursor  # noqa: E402
+
+COLORS = ["blue", "brown", "green", "yellow", "red", "black", "hazel", "blond", "auburn", "grey", "white", "none"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500, help="Filas de la página (500 = PAGE_SIZE_MAX por defecto)")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por nivel")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    return parser.parse_args(argv)
+
+
+def page_body(rows, rng):
+    data = [{
+        "id": i,
+        "name": "Personaje {} {}".format(rng.choice(["Skywalker", "Organa", "Solo", "Kenobi", "Amidala"]), i),
+        "eye_color": rng.choice(COLORS),
+        "hair_color": rng.choice(COLORS),
+    } for i in range(1, rows + 1)]
+    return dumps({"msg": "OK", "data": data, "next_cursor": encode_cursor(rows)})
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def measure(body, encoding, level, repeat):
+    compress_times, decompress_times = [], []
+    compressed = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compressed = compression.compress(body, encoding, level)
+        compress_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        if encoding == "br":
+            compression.brotli.decompress(compressed)
+        else:
+            gzip.decompress(compressed)
+        decompress_times.append(time.perf_counter() - started)
+    compress_s = median(compress_times)
+    return {
+        "encoding": encoding,
+        "level": level,
+        "bytes": len(compressed),
+        "ratio": round(len(body) / len(compressed), 2),
+        "compress_ms": round(compress_s * 1000, 3),
+        "decompress_ms": round(median(decompress_times) * 1000, 3),
+        "compress_mb_s": round(len(body) / compress_s / 1e6, 1),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    body = page_body(args.rows, random.Random(args.seed))
+    levels = [("gzip", level) for level in range(1, 10)]
+    if compression.brotli is not None:
+        levels += [("br", level) for level in range(0, 12)]
+    else:
+        print("brotli is not installed: only gzip is measured", file=sys.stderr)
+
+    print("uncompressed: {} bytes".format(len(body)))
+    print("{:<6} {:>5} {:>9} {:>7} {:>12} {:>14} {:>10}".format(
+        "codec", "level", "bytes", "ratio", "compress ms", "decompress ms", "MB/s"))
+    results = []
+    for encoding, level in levels:
+        result = measure(body, encoding, level, args.repeat)
+        results.append(result)
+        print("{encoding:<6} {level:>5} {bytes:>9} {ratio:>7} {compress_ms:>12} {decompress_ms:>14} {compress_mb_s:>10}".format(**result))
+
+    report = {
+        "rows": args.rows,
+        "uncompressed_bytes": len(body),
+        "repeat": args.repeat,
+        "defaults": {"gzip": compression.COMPRESSION_GZIP_LEVEL, "br": compression.COMPRESSION_BROTLI_LEVEL},
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Benchmark de todos los endpoints REST de `src/app.py`.
+
+Llena una base de datos local (SQLite por defecto o la de `--db-url`) con el volumen pedido de
+usuarios, personajes, planetas, vehículos y favoritos, y lanza cada GET/POST/DELETE:
+- `inprocess`: a través del cliente de pruebas de Flask (WSGI sin red), contando las consultas SQL.
+- `gunicorn`: contra un gunicorn local con `--workers` procesos y `--concurrency` clientes en paralelo.
+
+El resultado (peticiones/s, percentiles de latencia y consultas por petición) se imprime como tabla y
+se guarda en JSON con `--output`. Con `--compare` se compara contra un JSON anterior y el proceso
+termina con código 1 si algún endpoint empeora más que `--threshold`.
+
+Uso:
+    $ python benchmarks/endpoints.py --personajes 10000 --requests 300 --output bench.json
+    $ python benchmarks/endpoints.py --mode both --workers 4 --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import platform
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+# (nombre, método, ruta, cuerpo). Las rutas admiten {personaje}, {vehiculo}, {planeta}, {user}
+# (id existente al azar) y {delete_*} (id reservado para borrar, uno distinto por petición).
+ENDPOINTS = [
+    ("GET /personajes", "GET", "/personajes", None),
+    ("GET /personajes/<id>", "GET", "/personajes/{personaje}", None),
+    ("GET /vehiculos", "GET", "/vehiculos", None),
+    ("GET /vehiculo/<id>", "GET", "/vehiculo/{vehiculo}", None),
+    ("GET /planetas", "GET", "/planetas", None),
+    ("GET /planeta/<id>", "GET", "/planeta/{planeta}", None),
+    ("GET /users", "GET", "/users", None),
+    ("GET /users/<id>", "GET", "/users/{user}", None),
+    ("GET /users/favorites", "GET", "/users/favorites", None),
+    ("GET /users/<id>/favorites", "GET", "/users/{user}/favorites", None),
+    ("POST /personajes", "POST", "/personajes", {"name": "Bench", "eye_color": "blue", "hair_color": "brown"}),
+    ("POST /personajes (bulk 100)", "POST", "/personajes", [{"name": "Bench", "eye_color": "blue", "hair_color": "brown"}] * 100),
+    ("POST /vehiculos", "POST", "/vehiculos", {"name": "Bench", "model": "T-65"}),
+    ("POST /planetas", "POST", "/planetas", {"name": "Bench", "population": "1000"}),
+    ("POST /users", "POST", "/users", {"email": "bench-{unique}@example.com", "password": "x", "is_active": True}),
+    ("POST /favoritos_personajes", "POST", "/favoritos_personajes", {"personajes_relacion": "{personaje}", "usuarios_relacion": "{user}"}),
+    ("POST /favoritos_vehiculos", "POST", "/favoritos_vehiculos", {"vehiculos_relacion": "{vehiculo}", "usuarios_relacion": "{user}"}),
+    ("POST /favoritos_planetas", "POST", "/favoritos_planetas", {"planetas_relacion": "{planeta}", "usuarios_relacion": "{user}"}),
+    ("DELETE /favorite/personaje/<id>", "DELETE", "/favorite/personaje/{delete_personaje}", None),
+    ("DELETE /favorite/vehiculo/<id>", "DELETE", "/favorite/vehiculo/{delete_vehiculo}", None),
+    ("DELETE /favorite/planeta/<id>", "DELETE", "/favorite/planeta/{delete_planeta}", None),
+    ("DELETE /user/<id>", "DELETE", "/user/{delete_user}", None),
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="Base de datos a usar (se borra y se vuelve a crear). Por defecto un SQLite temporal")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--personajes", type=int, default=10000)
+    parser.add_argument("--planetas", type=int, default=5000)
+    parser.add_argument("--vehiculos", type=int, default=5000)
+    parser.add_argument("--favorites", type=int, default=10, help="Favoritos de cada tipo por usuario")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones por endpoint")
+    parser.add_argument("--mode", choices=["inprocess", "gunicorn", "both"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=2, help="Workers de gunicorn")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes en paralelo contra gunicorn")
+    parser.add_argument("--only", help="Ejecuta solo los endpoints cuyo nombre contenga este texto")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def percentile(values, fraction):
+    # Percentil por rango más cercano sobre la lista ordenada
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed, queries):
+    latencies = sorted(latencies)
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3) if total else None,
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 3) if total else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if total else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if total else None,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def seed(app, db, models, args):
+    """
+    Borra y vuelve a crear las tablas y las llena con el volumen pedido.
+
+    Returns:
+        dict: Rangos de ids disponibles para leer y para borrar.
+    """
+    rng = random.Random(args.seed)
+    Users, Personajes, Vehiculos, Planetas, Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas = models
+    # Filas extra que solo se usan como objetivo de los DELETE (una por petición)
+    spare = args.requests
+
+    def insert_rows(model, rows, chunk=5000):
+        for start in range(0, len(rows), chunk):
+            db.session.execute(db.insert(model), rows[start:start + chunk])
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        insert_rows(Users, [{"email": "user{}@example.com".format(i), "password": "x", "is_active": True}
+                            for i in range(args.users + spare)])
+        insert_rows(Personajes, [{"name": "Personaje {}".format(i), "eye_color": "blue", "hair_color": "brown"}
+                                 for i in range(args.personajes + spare)])
+        insert_rows(Vehiculos, [{"name": "Vehiculo {}".format(i), "model": "T-{}".format(i)}
+                                for i in range(args.vehiculos + spare)])
+        insert_rows(Planetas, [{"name": "Planeta {}".format(i), "population": str(i * 1000)}
+                               for i in range(args.planetas + spare)])
+        for model, column, total in ((Favoritos_personajes, "personajes_relacion", args.personajes),
+                                     (Favoritos_vehiculos, "vehiculos_relacion", args.vehiculos),
+                                     (Favoritos_planetas, "planetas_relacion", args.planetas)):
+            rows = []
+            for user in range(1, args.users + 1):
+                for target in rng.sample(range(1, total + 1), min(args.favorites, total)):
+                    rows.append({column: target, "usuarios_relacion": user})
+            insert_rows(model, rows)
+        db.session.commit()
+
+    return {
+        "user": (1, args.users), "personaje": (1, args.personajes),
+        "vehiculo": (1, args.vehiculos), "planeta": (1, args.planetas),
+        "delete_user": args.users + 1, "delete_personaje": args.personajes + 1,
+        "delete_vehiculo": args.vehiculos + 1, "delete_planeta": args.planetas + 1,
+    }
+
+
+class RequestFactory:
+    """
+    Genera las rutas y cuerpos concretos de cada petición a partir de las plantillas de ENDPOINTS.
+    """
+
+    def __init__(self, ids, seed):
+        self.ids = ids
+        self.rng = random.Random(seed)
+        self.counters = {}
+        self.unique = 0
+
+    def value(self, name):
+        if name == "unique":
+            self.unique += 1
+            return "{}-{}".format(os.getpid(), self.unique)
+        if name.startswith("delete_"):
+            offset = self.counters.get(name, 0)
+            self.counters[name] = offset + 1
+            return self.ids[name] + offset
+        low, high = self.ids[name]
+        return self.rng.randint(low, high)
+
+    def fill(self, template):
+        if isinstance(template, str):
+            if template.startswith("{") and template.endswith("}") and template.count("{") == 1:
+                return self.value(template[1:-1])
+            for name in ("personaje", "vehiculo", "planeta", "user", "unique",
+                         "delete_personaje", "delete_vehiculo", "delete_planeta", "delete_user"):
+                token = "{" + name + "}"
+                if token in template:
+                    template = template.replace(token, str(self.value(name)))
+            return template
+        if isinstance(template, list):
+            return [self.fill(item) for item in template]
+        if isinstance(template, dict):
+            return {key: self.fill(value) for key, value in template.items()}
+        return template
+
+    def build(self, method, path, body):
+        return method, self.fill(path), self.fill(body)
+
+
+def selected_endpoints(args):
+    return [endpoint for endpoint in ENDPOINTS if not args.only or args.only in endpoint[0]]
+
+
+def run_inprocess(args, db_url):
+    os.environ["DATABASE_URL"] = db_url
+    from sqlalchemy import event
+    import app as app_module
+
+    app, db = app_module.app, app_module.db
+    ids = seed(app, db, (app_module.Users, app_module.Personajes, app_module.Vehiculos, app_module.Planetas,
+                         app_module.Favoritos_personajes, app_module.Favoritos_vehiculos,
+                         app_module.Favoritos_planetas), args)
+    counter = {"queries": 0}
+    with app.app_context():
+        engine = db.engine
+
+    def count(*_):
+        counter["queries"] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    client = app.test_client()
+    factory = RequestFactory(ids, args.seed)
+    results = {}
+    for name, method, path, body in selected_endpoints(args):
+        latencies, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            method, url, payload = factory.build(method, path, body)
+            counter["queries"] = 0
+            start = time.perf_counter()
+            response = client.open(url, method=method, json=payload)
+            response.get_data()
+            latencies.append(time.perf_counter() - start)
+            queries.append(counter["queries"])
+            if response.status_code >= 400:
+                errors += 1
+        results[name] = summarize(latencies, errors, time.perf_counter() - started, queries)
+        print_row("inprocess", name, results[name])
+    event.remove(engine, "before_cursor_execute", count)
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited with code {}".format(process.returncode))
+        try:
+            urllib.request.urlopen(url + "/personajes?limit=1", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start in {} seconds".format(timeout))
+
+
+def http_call(base_url, method, url, payload):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(base_url + url, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            failed = False
+    except urllib.error.HTTPError as error:
+        error.read()
+        failed = True
+    return time.perf_counter() - start, failed
+
+
+def run_gunicorn(args, db_url):
+    os.environ["DATABASE_URL"] = db_url
+    import app as app_module
+
+    ids = seed(app_module.app, app_module.db, (app_module.Users, app_module.Personajes, app_module.Vehiculos,
+                                               app_module.Planetas, app_module.Favoritos_personajes,
+                                               app_module.Favoritos_vehiculos, app_module.Favoritos_planetas), args)
+    port = free_port()
+    base_url = "http://127.0.0.1:{}".format(port)
+    command = [sys.executable, "-m", "gunicorn", "wsgi", "--chdir", SRC, "--bind", "127.0.0.1:{}".format(port),
+               "--workers", str(args.workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, env=dict(os.environ, DATABASE_URL=db_url), cwd=ROOT)
+    results = {}
+    try:
+        wait_until_ready(base_url, process)
+        factory = RequestFactory(ids, args.seed)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for name, method, path, body in selected_endpoints(args):
+                calls = [factory.build(method, path, body) for _ in range(args.requests)]
+                started = time.perf_counter()
+                outcomes = list(pool.map(lambda call: http_call(base_url, *call), calls))
+                elapsed = time.perf_counter() - started
+                # Las consultas SQL no se pueden contar desde fuera de los workers
+                results[name] = summarize([latency for latency, _ in outcomes],
+                                          sum(1 for _, failed in outcomes if failed), elapsed, [])
+                print_row("gunicorn", name, results[name])
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return results
+
+
+def print_row(mode, name, result):
+    queries = result["queries_per_request"]
+    print("{:<10} {:<34} {:>9} rps  p50 {:>8} ms  p99 {:>8} ms  {:>6} q/req  {} errors".format(
+        mode, name, result["throughput_rps"], result["p50_ms"], result["p99_ms"],
+        "-" if queries is None else queries, result["errors"]))
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Compara con una ejecución anterior y devuelve la lista de regresiones encontradas.
+    """
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)["results"]
+    regressions = []
+    for mode, endpoints in results.items():
+        for name, current in endpoints.items():
+            previous = baseline.get(mode, {}).get(name)
+            if previous is None:
+                continue
+            checks = [("p99_ms", True), ("p50_ms", True), ("queries_per_request", True), ("throughput_rps", False)]
+            for metric, lower_is_better in checks:
+                old, new = previous.get(metric), current.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old if lower_is_better else (old - new) / old
+                if change > threshold:
+                    regressions.append("{} {} {}: {} -> {} ({:+.0%})".format(
+                        mode, name, metric, old, new, change if lower_is_better else -change))
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    temp_dir = None
+    db_url = args.db_url
+    if db_url is None:
+        temp_dir = tempfile.mkdtemp(prefix="swapi-bench-")
+        db_url = "sqlite:///" + os.path.join(temp_dir, "bench.db")
+
+    results = {}
+    if args.mode in ("inprocess", "both"):
+        results["inprocess"] = run_inprocess(args, db_url)
+    if args.mode in ("gunicorn", "both"):
+        results["gunicorn"] = run_gunicorn(args, db_url)
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                         capture_output=True, text=True).stdout.strip() or None,
+            "python": platform.python_version(),
+            "database": db_url.split(":", 1)[0],
+            "volumes": {"users": args.users, "personajes": args.personajes, "planetas": args.planetas,
+                        "vehiculos": args.vehiculos, "favorites_per_user": args.favorites},
+            "requests_per_endpoint": args.requests,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Prueba de carga del pool de conexiones bajo saturación.
+
+Lanza `--clients` hilos que piden una conexión, la retienen `--hold-ms` (simulando una consulta
+lenta) y la devuelven, con el pool configurado igual que la aplicación (`src/config.py`).
+Cuando hay más clientes que `pool_size + max_overflow` se ve cómo crecen las esperas por una
+conexión libre y, pasado `pool_timeout`, cuántas peticiones fallarían.
+
+Uso:
+    $ python benchmarks/pool_saturation.py --clients 50 --pool-size 5 --max-overflow 5 --pool-timeout 2
+    $ python benchmarks/pool_saturation.py --db-url postgresql://localhost/example --pool-mode null
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import TimeoutError as PoolTimeout  # noqa: E402
+from config import engine_options, pool_status  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="Por defecto un SQLite temporal en disco")
+    parser.add_argument("--clients", type=int, default=40, help="Hilos concurrentes")
+    parser.add_argument("--requests", type=int, default=400, help="Peticiones en total")
+    parser.add_argument("--hold-ms", type=float, default=50, help="Tiempo que cada petición retiene la conexión")
+    parser.add_argument("--pool-mode", choices=["queue", "null"], default="queue")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=5)
+    parser.add_argument("--pool-timeout", type=int, default=2)
+    parser.add_argument("--output", help="Fichero JSON con los resultados")
+    return parser.parse_args(argv)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="swapi-pool-"), "pool.db")
+    env = {
+        "DB_POOL_MODE": args.pool_mode,
+        "DB_POOL_SIZE": str(args.pool_size),
+        "DB_MAX_OVERFLOW": str(args.max_overflow),
+        "DB_POOL_TIMEOUT": str(args.pool_timeout),
+    }
+    engine = create_engine(url, **engine_options(url, env))
+    hold = args.hold_ms / 1000
+    lock = threading.Lock()
+    waits, timeouts, peak = [], [0], {"checked_out": 0, "overflow": 0}
+
+    def one_request(_):
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                waited = time.perf_counter() - started
+                connection.execute(text("SELECT 1"))
+                status = pool_status(engine)
+                time.sleep(hold)
+        except PoolTimeout:
+            with lock:
+                timeouts[0] += 1
+            return
+        with lock:
+            waits.append(waited)
+            peak["checked_out"] = max(peak["checked_out"], status.get("checkedout", 0))
+            peak["overflow"] = max(peak["overflow"], status.get("overflow", 0))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "pool": {"mode": args.pool_mode, "size": args.pool_size, "max_overflow": args.max_overflow,
+                 "timeout_s": args.pool_timeout},
+        "clients": args.clients,
+        "requests": args.requests,
+        "hold_ms": args.hold_ms,
+        "completed": len(waits),
+        "pool_timeouts": timeouts[0],
+        "throughput_rps": round(len(waits) / elapsed, 1),
+        "checkout_wait_p50_ms": round(percentile(waits, 0.50) * 1000, 2) if waits else None,
+        "checkout_wait_p99_ms": round(percentile(waits, 0.99) * 1000, 2) if waits else None,
+        "checkout_wait_max_ms": round(max(waits) * 1000, 2) if waits else None,
+        "peak_checked_out": peak["checked_out"],
+        "peak_overflow": peak["overflow"],
+        "final_pool_status": pool_status(engine),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(result, handle, indent=2, sort_keys=True)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
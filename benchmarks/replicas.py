@@ -0,0 +1,132 @@
+"""
+Throughput de lectura según el número de réplicas (`DATABASE_REPLICA_URLS`, ver src/replicas.py).
+
+Llena el primario, arranca gunicorn con 0, 1, 2... réplicas y mantiene `--connections` clientes
+pidiendo endpoints de lectura durante `--duration` segundos en cada configuración.
+
+Con SQLite (por defecto) cada réplica es una copia del fichero del primario abierta en solo lectura, y la
+capacidad de cada base de datos se limita a `--pool-size` conexiones por worker (DB_POOL_SIZE, sin
+desbordamiento): así se simula un servidor con capacidad fija y se ve cómo el reparto entre réplicas
+suma capacidad. Con PostgreSQL se pasan `--db-url` y `--replica-urls` (réplicas reales por streaming
+replication; solo se llena el primario y se espera a que las réplicas lo reciban).
+
+Uso:
+    $ python benchmarks/replicas.py --replicas 0,1,2,4 --duration 10
+    $ python benchmarks/replicas.py --db-url postgresql://primary/bench \\
+          --replica-urls postgresql://replica1/bench,postgresql://replica2/bench --replicas 0,1,2
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import platform
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+from endpoints import seed, free_port  # noqa: E402
+from async_serving import load, wait_until_ready  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="Primario (se borra y se vuelve a crear). Por defecto un SQLite temporal")
+    parser.add_argument("--replica-urls", help="Réplicas del primario de --db-url, separadas por comas")
+    parser.add_argument("--replicas", default="0,1,2,4", help="Número de réplicas de cada ejecución (lista separada por comas)")
+    parser.add_argument("--personajes", type=int, default=10000)
+    parser.add_argument("--planetas", type=int, default=5000)
+    parser.add_argument("--vehiculos", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=2, help="Workers de gunicorn")
+    parser.add_argument("--threads", type=int, default=16, help="Hilos por worker (gthread)")
+    parser.add_argument("--pool-size", type=int, default=2, help="Conexiones por base de datos y worker")
+    parser.add_argument("--connections", type=int, default=64, help="Clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=10, help="Segundos de carga por configuración")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    args = parser.parse_args(argv)
+    # Parámetros que espera endpoints.seed(): sin usuarios ni favoritos, no se borra nada
+    args.users, args.favorites, args.requests = 0, 0, 0
+    return args
+
+
+def sqlite_replicas(db_url, count):
+    """
+    Copias del fichero SQLite del primario, abiertas en solo lectura como si fueran réplicas.
+    """
+    path = db_url[len("sqlite:///"):]
+    urls = []
+    for number in range(1, count + 1):
+        copy = "{}.replica{}".format(path, number)
+        shutil.copy(path, copy)
+        urls.append("sqlite:///file:{}?mode=ro&uri=true".format(copy))
+    return urls
+
+
+def run(args, db_url, replica_urls, ids):
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", "wsgi:application", "--chdir", SRC,
+               "--bind", "127.0.0.1:{}".format(port), "--workers", str(args.workers),
+               "--worker-class", "gthread", "--threads", str(args.threads), "--log-level", "warning"]
+    # Sin caché de respuestas: cada lectura llega a la base de datos
+    env = dict(os.environ, DATABASE_URL=db_url, DATABASE_REPLICA_URLS=",".join(replica_urls),
+               DB_POOL_SIZE=str(args.pool_size), DB_MAX_OVERFLOW="0", CACHE_ENABLED="0", METRICS_ENABLED="0")
+    process = subprocess.Popen(command, env=env, cwd=ROOT)
+    try:
+        wait_until_ready(port, process)
+        return load(port, args.connections, args.duration, ids, args.seed)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="swapi-replicas-"), "bench.db")
+    os.environ["DATABASE_URL"] = db_url
+    os.environ.pop("DATABASE_REPLICA_URLS", None)
+    import app as app_module
+
+    ids = seed(app_module.app, app_module.db, (app_module.Users, app_module.Personajes, app_module.Vehiculos,
+                                               app_module.Planetas, app_module.Favoritos_personajes,
+                                               app_module.Favoritos_vehiculos, app_module.Favoritos_planetas), args)
+    counts = [int(value) for value in args.replicas.split(",")]
+    if args.replica_urls:
+        available = args.replica_urls.split(",")
+    elif db_url.startswith("sqlite:///"):
+        available = sqlite_replicas(db_url, max(counts))
+    else:
+        sys.exit("--replica-urls is required with --db-url other than SQLite")
+
+    results, baseline = {}, None
+    for count in counts:
+        if count > len(available):
+            print("skipping {} replicas: only {} available".format(count, len(available)), file=sys.stderr)
+            continue
+        result = run(args, db_url, available[:count], ids)
+        baseline = baseline or result["throughput_rps"]
+        result["speedup"] = round(result["throughput_rps"] / baseline, 2)
+        results[str(count)] = result
+        print("{:>2} replicas  {:>9} rps  x{:<5} p50 {:>8} ms  p99 {:>8} ms  {} errors".format(
+            count, result["throughput_rps"], result["speedup"], result["p50_ms"], result["p99_ms"], result["errors"]))
+
+    report = {
+        "workers": args.workers,
+        "threads": args.threads,
+        "pool_size": args.pool_size,
+        "connections": args.connections,
+        "duration_s": args.duration,
+        "database": db_url.split(":", 1)[0],
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark de la búsqueda por nombre (`src/search.py`) con tablas grandes.
+
+Llena `personajes`, `vehiculos` y `planetas` con `--rows` nombres generados (1M por defecto) y mide,
+para cada búsqueda de `--queries`, la latencia de:
+- `scan`: `lower(name) LIKE '%q%'` sobre toda la tabla (sin límite), lo mismo que filtrar la lista en el cliente.
+- `name`: el filtro `?name=` de una colección (`search.search_model`).
+- `search`: `/search?q=` sobre los tres recursos (`search.search_all`).
+
+Con SQLite se crea el índice FTS5 igual que `flask search-index`; con `--db-url` de PostgreSQL la base
+debe tener aplicada la migración de índices (`flask db upgrade`).
+
+Uso:
+    $ python benchmarks/search.py --rows 1000000 --output search.json
+    $ python benchmarks/search.py --rows 100000 --repeat 50 --queries sky,tatoo,"luke sky"
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import platform
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+SYLLABLES = ["sky", "wal", "ker", "ta", "too", "ine", "an", "a", "kin", "lu", "ke", "so", "lo", "le",
+             "ia", "da", "go", "bah", "yo", "da", "ho", "th", "en", "dor", "ka", "shy", "yyk", "naa", "boo"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="Base de datos a usar (se borra y se vuelve a crear). Por defecto un SQLite temporal")
+    parser.add_argument("--rows", type=int, default=1000000, help="Filas por tabla")
+    parser.add_argument("--queries", default="sky,tatoo,luke sky,kashyyyk,zzz", help="Búsquedas separadas por comas")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones de cada búsqueda")
+    parser.add_argument("--limit", type=int, default=20, help="Resultados por página")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    return parser.parse_args(argv)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def seed(db, models, rows, rng):
+    db.drop_all()
+    db.create_all()
+    Personajes, Vehiculos, Planetas = models
+    extra = {
+        Personajes: {"eye_color": "blue", "hair_color": "brown"},
+        Vehiculos: {"model": "T-65"},
+        Planetas: {"population": "1000"},
+    }
+    for model in models:
+        table = model.__table__
+        for start in range(0, rows, 50000):
+            batch = [dict(extra[model], name="{} {}".format(word(rng), word(rng)))
+                     for _ in range(start, min(rows, start + 50000))]
+            db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+
+def measure(function, repeat):
+    latencies, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        latencies.append(time.perf_counter() - started)
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "results": len(result),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="swapi-search-"), "search.db")
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("CACHE_ENABLED", "0")
+
+    import app as app_module
+    import search
+    from sqlalchemy import select, func
+    from werkzeug.datastructures import MultiDict
+
+    app, db = app_module.app, app_module.db
+    models = (app_module.Personajes, app_module.Vehiculos, app_module.Planetas)
+    rng = random.Random(args.seed)
+    results = {}
+    with app.app_context():
+        started = time.perf_counter()
+        dialect = db.engine.dialect.name
+        seed(db, models, args.rows, rng)
+        seeded = time.perf_counter() - started
+        started = time.perf_counter()
+        if dialect == "sqlite":
+            search.ensure_sqlite_index()
+        indexed = time.perf_counter() - started
+        print("seeded {} rows per table in {:.1f}s, index built in {:.1f}s".format(args.rows, seeded, indexed), file=sys.stderr)
+
+        personajes = models[0].__table__
+        for q in [query.strip() for query in args.queries.split(",") if query.strip()]:
+            pattern = "%" + search.escape_like(q.lower()) + "%"
+            scan = (select(personajes.c.id, personajes.c.name)
+                    .where(func.lower(personajes.c.name).like(pattern, escape="\\"))
+                    .order_by(personajes.c.id))
+            params = MultiDict({"name": q, "q": q, "limit": str(args.limit)})
+            results[q] = {
+                "scan": measure(lambda: db.session.execute(scan).all(), args.repeat),
+                "name": measure(lambda: search.search_model(models[0], models[0].serialized_fields, params)[0], args.repeat),
+                "search": measure(lambda: search.search_all(params)[0], args.repeat),
+            }
+            print("{:<12} scan p50 {:>9.3f} ms   ?name= p50 {:>9.3f} ms   /search p50 {:>9.3f} ms".format(
+                q, results[q]["scan"]["p50_ms"], results[q]["name"]["p50_ms"], results[q]["search"]["p50_ms"]))
+
+    report = {
+        "database": dialect,
+        "rows_per_table": args.rows,
+        "repeat": args.repeat,
+        "limit": args.limit,
+        "python": platform.python_version(),
+        "queries": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Microbenchmark del camino de serialización de las listas.
+
+Compara el camino clásico (objetos ORM + serialize() + jsonify) con el camino rápido
+(tuplas de columnas + orjson/stdlib) sobre una tabla de personajes en SQLite y comprueba
+que los bytes producidos son idénticos (los personajes no tienen columnas float, ver serialization.py).
+
+Uso:
+    $ python benchmarks/serialization.py --rows 10000 100000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from flask import Flask, jsonify  # noqa: E402
+from werkzeug.datastructures import MultiDict  # noqa: E402
+import utils  # noqa: E402
+from models import db, Personajes  # noqa: E402
+from serialization import get_encoder, select_page, orjson  # noqa: E402
+
+
+def build_app(rows):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite://"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Personajes), [
+            {"name": "Personaje {}".format(i), "eye_color": "blue", "hair_color": "brown"} for i in range(rows)
+        ])
+        db.session.commit()
+    return app
+
+
+def orm_path(rows):
+    items = Personajes.query.order_by(Personajes.id).limit(rows + 1).all()
+    body = {"msg": "OK", "data": list(map(lambda item:item.serialize(), items)), "next_cursor": None}
+    return jsonify(body).get_data()
+
+
+def fast_path(rows, encoder):
+    data, _ = select_page(Personajes, Personajes.serialized_fields, MultiDict({"limit": rows}))
+    return encoder({"msg": "OK", "data": data, "next_cursor": None})
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoders = {"stdlib": get_encoder("stdlib")}
+    if orjson is not None:
+        encoders["orjson"] = get_encoder("orjson")
+
+    for rows in args.rows:
+        # El límite de página se sube para poder medir la tabla completa en una sola respuesta
+        utils.MAX_PAGE_SIZE = rows
+        app = build_app(rows)
+        with app.app_context():
+            baseline, expected = timed(lambda: orm_path(rows), args.repeat)
+            print("{:>8} rows  orm+serialize+jsonify  {:8.1f} ms".format(rows, baseline * 1000))
+            for name, encoder in encoders.items():
+                elapsed, output = timed(lambda: fast_path(rows, encoder), args.repeat)
+                status = "identical" if output == expected else "DIFFERENT OUTPUT"
+                print("{:>8} rows  rows+{:<17} {:8.1f} ms  x{:.1f}  {}".format(
+                    rows, name, elapsed * 1000, baseline / elapsed, status))
+        with app.app_context():
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Exportación completa del catálogo desde la base de datos frente a las instantáneas en disco.
+
+Llena un SQLite temporal con `--rows` personajes, arranca gunicorn con `SNAPSHOTS_ENABLED=0` (cada
+petición consulta y serializa las filas) y con `SNAPSHOTS_ENABLED=1` (tras `flask build-snapshots`,
+`send_file` del fichero) y lanza `--requests` peticiones `GET /personajes?stream=1` con `--concurrency`
+hilos, sin comprimir y con `Accept-Encoding: gzip`. Mide throughput, latencias y bytes por respuesta.
+
+Con `--compare` se compara contra un JSON anterior y el proceso termina con código 1 si el throughput
+de algún caso baja más que `--threshold`.
+
+Uso:
+    $ python benchmarks/snapshots.py --rows 20000 --output snapshots.json
+    $ python benchmarks/snapshots.py --workers 4 --compare snapshots.json --threshold 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+from endpoints import free_port, summarize  # noqa: E402
+
+SEED = """
+from app import app, db, Personajes
+COLORS = ["blue", "brown", "green", "yellow", "red", "black", "hazel", "blond", "auburn", "grey", "white", "none"]
+with app.app_context():
+    db.create_all()
+    db.session.add_all([Personajes(name="Personaje {}".format(i), eye_color=COLORS[i % len(COLORS)],
+                                   hair_color=COLORS[i * 7 % len(COLORS)]) for i in range({rows})])
+    db.session.commit()
+"""
+
+ENCODINGS = {"identity": "identity", "gzip": "gzip"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Personajes en la base de datos")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones por caso")
+    parser.add_argument("--concurrency", type=int, default=8, help="Hilos cliente")
+    parser.add_argument("--workers", type=int, default=4, help="Workers de gunicorn")
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Empeoramiento máximo permitido (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def fetch(port, encoding):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    started = time.perf_counter()
+    connection.request("GET", "/personajes?stream=1", headers={"Accept-Encoding": encoding})
+    response = connection.getresponse()
+    size = len(response.read())
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed, response.status != 200, size
+
+
+def wait_until_ready(port, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited with code {}".format(process.returncode))
+        try:
+            fetch(port, "identity")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("gunicorn did not start in {} seconds".format(timeout))
+
+
+def run(env, args):
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", "wsgi:application", "--chdir", SRC,
+               "--bind", "127.0.0.1:{}".format(port), "--workers", str(args.workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, env=env, cwd=ROOT)
+    results = {}
+    try:
+        wait_until_ready(port, process)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for name, encoding in ENCODINGS.items():
+                started = time.perf_counter()
+                outcomes = list(pool.map(lambda _: fetch(port, encoding), range(args.requests)))
+                elapsed = time.perf_counter() - started
+                result = summarize([latency for latency, _, _ in outcomes],
+                                   sum(1 for _, failed, _ in outcomes if failed), elapsed, [])
+                result["bytes"] = outcomes[-1][2]
+                results[name] = result
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Compara con una ejecución anterior y devuelve la lista de regresiones encontradas.
+    """
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)["results"]
+    regressions = []
+    for name, current in results.items():
+        old, new = baseline.get(name, {}).get("throughput_rps"), current.get("throughput_rps")
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if change < -threshold:
+            regressions.append("{} throughput_rps: {} -> {} ({:+.0%})".format(name, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    directory = tempfile.mkdtemp(prefix="swapi-snapshots-")
+    db_url = "sqlite:///" + os.path.join(directory, "bench.db")
+    base_env = dict(os.environ, DATABASE_URL=db_url, METRICS_ENABLED="0", ADMIN_MODE="off",
+                    SNAPSHOT_DIR=os.path.join(directory, "snapshots"))
+    subprocess.run([sys.executable, "-c", SEED.replace("{rows}", str(args.rows))], cwd=SRC, env=base_env, check=True)
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "build-snapshots", "--table", "personajes"],
+                   cwd=SRC, env=base_env, check=True, capture_output=True)
+
+    print("{:<20} {:>10} {:>9} {:>9} {:>10}".format("case", "rps", "p50 ms", "p99 ms", "bytes"))
+    results = {}
+    for mode, enabled in (("database", "0"), ("snapshot", "1")):
+        for encoding, result in run(dict(base_env, SNAPSHOTS_ENABLED=enabled), args).items():
+            name = "{}/{}".format(mode, encoding)
+            results[name] = result
+            print("{:<20} {:>10} {:>9} {:>9} {:>10}".format(
+                name, result["throughput_rps"], result["p50_ms"], result["p99_ms"], result["bytes"]))
+
+    report = {
+        "rows": args.rows,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Tiempo de arranque y memoria de la aplicación.
+
+- `import`: importa `src/app.py` en un proceso nuevo (`--repeat` veces) y mide la mediana del tiempo de
+  importación y la RSS del proceso justo después, con el panel en modo "eager" y en modo "lazy".
+- `gunicorn`: arranca gunicorn con `--workers` workers, con y sin `GUNICORN_PRELOAD`, y mide el tiempo
+  hasta que todos los workers responden y la memoria de los workers: RSS y PSS (la PSS reparte las
+  páginas compartidas entre los procesos que las comparten, así se ve el ahorro de copy-on-write;
+  solo en Linux, de /proc/<pid>/smaps_rollup).
+
+Con `--compare` se compara contra un JSON anterior y el proceso termina con código 1 si algún valor
+empeora más que `--threshold`.
+
+Uso:
+    $ python benchmarks/startup.py --output startup.json
+    $ python benchmarks/startup.py --workers 4 --compare startup.json --threshold 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import http.client
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+from endpoints import free_port  # noqa: E402
+
+# Se ejecuta en un proceso nuevo: importa la app e imprime el tiempo y la memoria en JSON
+IMPORT_PROBE = """
+import json, time, sys
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+rss_kb = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmRSS:"))
+print(json.dumps({"import_ms": elapsed * 1000, "rss_mb": rss_kb / 1024, "modules": len(sys.modules)}))
+"""
+
+CONFIGURATIONS = {
+    "eager": {"ADMIN_MODE": "eager", "GUNICORN_PRELOAD": "0"},
+    "lazy": {"ADMIN_MODE": "lazy", "GUNICORN_PRELOAD": "0"},
+    "lazy+preload": {"ADMIN_MODE": "lazy", "GUNICORN_PRELOAD": "1"},
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", help="Base de datos (por defecto un SQLite temporal)")
+    parser.add_argument("--repeat", type=int, default=5, help="Importaciones por modo")
+    parser.add_argument("--workers", type=int, default=4, help="Workers de gunicorn")
+    parser.add_argument("--configurations", default=",".join(CONFIGURATIONS))
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Empeoramiento máximo permitido (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def measure_import(env, repeat):
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=SRC, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "import_ms": round(median([sample["import_ms"] for sample in samples]), 1),
+        "rss_mb": round(median([sample["rss_mb"] for sample in samples]), 1),
+        "modules": samples[-1]["modules"],
+    }
+
+
+def children(pid):
+    try:
+        with open("/proc/{0}/task/{0}/children".format(pid)) as handle:
+            return [int(child) for child in handle.read().split()]
+    except OSError:
+        return []
+
+
+def memory_mb(pid):
+    values = {}
+    try:
+        with open("/proc/{}/smaps_rollup".format(pid)) as handle:
+            for line in handle:
+                name, _, rest = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    values[name.lower() + "_mb"] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return values
+
+
+def measure_gunicorn(env, workers):
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", "wsgi:application", "--chdir", SRC,
+               "--bind", "127.0.0.1:{}".format(port), "--workers", str(workers), "--log-level", "warning"]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, cwd=ROOT)
+    try:
+        # Listo cuando existen todos los workers y cada uno ha respondido (conexiones nuevas se reparten)
+        answered = 0
+        deadline = time.time() + 60
+        while answered < workers * 4 or len(children(process.pid)) < workers:
+            if process.poll() is not None or time.time() > deadline:
+                raise RuntimeError("gunicorn did not start")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                connection.request("GET", "/personajes?limit=1")
+                connection.getresponse().read()
+                connection.close()
+                answered += 1
+            except OSError:
+                time.sleep(0.05)
+        boot_s = time.perf_counter() - started
+        pids = children(process.pid)
+        memory = [memory_mb(pid) for pid in pids]
+        result = {"boot_s": round(boot_s, 2), "workers": len(pids)}
+        for name in ("rss_mb", "pss_mb"):
+            if all(name in entry for entry in memory):
+                result["workers_" + name] = round(sum(entry[name] for entry in memory), 1)
+        result.update({"master_" + name: round(value, 1) for name, value in memory_mb(process.pid).items()})
+        return result
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Compara con una ejecución anterior y devuelve la lista de regresiones encontradas.
+    """
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)["results"]
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name, {})
+        for metric in ("import_ms", "rss_mb", "boot_s", "workers_pss_mb", "workers_rss_mb"):
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append("{} {}: {} -> {} ({:+.0%})".format(name, metric, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="swapi-startup-"), "bench.db")
+    base_env = dict(os.environ, DATABASE_URL=db_url, METRICS_ENABLED="0")
+    with_tables = dict(base_env, ADMIN_MODE="off")
+    subprocess.run([sys.executable, "-c", "from app import app, db\nwith app.app_context(): db.create_all()"],
+                   cwd=SRC, env=with_tables, check=True)
+
+    print("{:<14} {:>10} {:>8} {:>8} {:>7} {:>14} {:>14}".format(
+        "config", "import ms", "RSS MB", "modules", "boot s", "workers RSS", "workers PSS"))
+    results = {}
+    for name in args.configurations.split(","):
+        env = dict(base_env, **CONFIGURATIONS[name])
+        result = measure_import(env, args.repeat)
+        result.update(measure_gunicorn(env, args.workers))
+        results[name] = result
+        print("{:<14} {:>10} {:>8} {:>8} {:>7} {:>14} {:>14}".format(
+            name, result["import_ms"], result["rss_mb"], result["modules"], result["boot_s"],
+            result.get("workers_rss_mb", "-"), result.get("workers_pss_mb", "-")))
+
+    report = {
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "database": db_url.split(":", 1)[0],
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
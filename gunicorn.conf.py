@@ -0,0 +1,85 @@
+# Configuración de gunicorn. Se carga automáticamente al arrancar gunicorn desde la raíz del proyecto (Procfile, render.yaml).
+# Read more about it here: https://docs.gunicorn.org/en/stable/settings.html
+import gc
+import os
+import shutil
+import tempfile
+
+# GUNICORN_PRELOAD=1: la app se importa una vez en el proceso maestro y los workers la heredan con fork,
+# compartiendo esas páginas de memoria (copy-on-write) y arrancando sin volver a importar nada.
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") not in ("0", "false")
+
+# Directorio compartido por todos los workers para las métricas de Prometheus (ver src/metrics.py).
+# Debe existir antes de que los workers importen prometheus_client. Por defecto uno por proceso maestro,
+# que se borra al salir (on_exit); los de maestros que murieron sin salir se borran en el siguiente arranque.
+METRICS_DIR_PREFIX = "swapi-prometheus-"
+OWN_METRICS_DIR = "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), METRICS_DIR_PREFIX + str(os.getpid()))
+)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Existe pero es de otro usuario
+    return True
+
+
+def remove_stale_metrics_dirs():
+    # Directorios por defecto de maestros que ya no existen (por ejemplo tras un SIGKILL)
+    root = tempfile.gettempdir()
+    for name in os.listdir(root):
+        pid = name[len(METRICS_DIR_PREFIX):]
+        if name.startswith(METRICS_DIR_PREFIX) and pid.isdigit() and not pid_alive(int(pid)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def reset_metrics_dir():
+    # Empieza con el directorio vacío para no arrastrar valores de un arranque anterior
+    if OWN_METRICS_DIR:
+        remove_stale_metrics_dirs()
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+if preload_app:
+    # Con preload_app la app (y prometheus_client) se importa antes de on_starting
+    reset_metrics_dir()
+
+
+def on_starting(server):
+    if not preload_app:
+        reset_metrics_dir()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Los objetos ya cargados pasan a la generación permanente: el GC de cada worker no los recorre
+        # (ni escribe en sus cabeceras), así sus páginas siguen compartidas con el maestro
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import app
+        from config import dispose_engines
+        dispose_engines(app)
+
+
+def child_exit(server, worker):
+    # Los gauges "live" de un worker terminado dejan de contar en la agregación
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    # El directorio por defecto es de este maestro: nadie más lo va a usar
+    if OWN_METRICS_DIR:
+        shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
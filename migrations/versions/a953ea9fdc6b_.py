@@ -0,0 +1,43 @@
+"""unique and reverse-lookup indexes on favorites tables
+
+Revision ID: a953ea9fdc6b
+Revises: b7326af1dfed
+Create Date: 2026-10-18 11:02:17.540913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a953ea9fdc6b'
+down_revision = 'b7326af1dfed'
+branch_labels = None
+depends_on = None
+
+# (tabla, columna de la entidad, nombre de la entidad en singular)
+FAVORITES = [
+    ('favoritos_personajes', 'personajes_relacion', 'personaje'),
+    ('favoritos_vehiculos', 'vehiculos_relacion', 'vehiculo'),
+    ('favoritos_planetas', 'planetas_relacion', 'planeta'),
+]
+
+
+def upgrade():
+    for table, column, name in FAVORITES:
+        # Antes de crear el índice único se borran los favoritos repetidos, conservando el más antiguo
+        op.execute(
+            'DELETE FROM {table} WHERE id NOT IN ('
+            'SELECT id FROM (SELECT MIN(id) AS id FROM {table} GROUP BY usuarios_relacion, {column}) AS keep'
+            ')'.format(table=table, column=column)
+        )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index('uq_{}_usuario_{}'.format(table, name), ['usuarios_relacion', column], unique=True)
+            batch_op.create_index('ix_{}_{}'.format(table, name), [column], unique=False)
+
+
+def downgrade():
+    for table, column, name in FAVORITES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index('ix_{}_{}'.format(table, name))
+            batch_op.drop_index('uq_{}_usuario_{}'.format(table, name))
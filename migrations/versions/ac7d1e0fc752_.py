@@ -0,0 +1,65 @@
+"""name search indexes (tsvector/trigram on PostgreSQL, FTS5 on SQLite)
+
+Revision ID: ac7d1e0fc752
+Revises: a953ea9fdc6b
+Create Date: 2026-10-18 12:26:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ac7d1e0fc752'
+down_revision = 'a953ea9fdc6b'
+branch_labels = None
+depends_on = None
+
+SEARCHABLE_TABLES = ['personajes', 'vehiculos', 'planetas']
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in SEARCHABLE_TABLES:
+            # Debe coincidir con la expresión de src/search.py para que el planificador use el índice
+            op.execute(
+                "CREATE INDEX ix_{table}_name_tsv ON {table} USING gin (to_tsvector('simple'::regconfig, name))".format(table=table)
+            )
+            op.execute('CREATE INDEX ix_{table}_name_trgm ON {table} USING gin (name gin_trgm_ops)'.format(table=table))
+    elif dialect == 'sqlite':
+        for table in SEARCHABLE_TABLES:
+            fts = table + '_fts'
+            op.execute(
+                "CREATE VIRTUAL TABLE {fts} USING fts5(name, content='{table}', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')".format(fts=fts, table=table)
+            )
+            op.execute(
+                'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN '
+                'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END'.format(fts=fts, table=table)
+            )
+            op.execute(
+                'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN '
+                "INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); END".format(fts=fts, table=table)
+            )
+            op.execute(
+                'CREATE TRIGGER {fts}_au AFTER UPDATE OF name ON {table} BEGIN '
+                "INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); "
+                'INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END'.format(fts=fts, table=table)
+            )
+            op.execute("INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(fts=fts))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in SEARCHABLE_TABLES:
+            op.execute('DROP INDEX IF EXISTS ix_{table}_name_trgm'.format(table=table))
+            op.execute('DROP INDEX IF EXISTS ix_{table}_name_tsv'.format(table=table))
+    elif dialect == 'sqlite':
+        for table in SEARCHABLE_TABLES:
+            fts = table + '_fts'
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute('DROP TRIGGER IF EXISTS {fts}_{suffix}'.format(fts=fts, suffix=suffix))
+            op.execute('DROP TABLE IF EXISTS {fts}'.format(fts=fts))
@@ -0,0 +1,41 @@
+"""add table_versions for conditional GET
+
+Revision ID: b7326af1dfed
+Revises: 438eb8b9a7d8
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7326af1dfed'
+down_revision = '438eb8b9a7d8'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = [
+    'users', 'personajes', 'vehiculos', 'planetas',
+    'favoritos_personajes', 'favoritos_vehiculos', 'favoritos_planetas',
+]
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=80), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    # Una fila por tabla para que la aplicación solo tenga que hacer UPDATE en cada commit
+    now = datetime.utcnow()
+    op.bulk_insert(table_versions, [
+        {'table_name': name, 'version': 1, 'updated_at': now} for name in VERSIONED_TABLES
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,32 @@
+"""soft delete column (deleted_at) on users and catalog tables
+
+Revision ID: cc2f094d03ec
+Revises: ac7d1e0fc752
+Create Date: 2026-10-18 13:41:52.207615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cc2f094d03ec'
+down_revision = 'ac7d1e0fc752'
+branch_labels = None
+depends_on = None
+
+SOFT_DELETE_TABLES = ['users', 'personajes', 'vehiculos', 'planetas']
+
+
+def upgrade():
+    for table in SOFT_DELETE_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_{}_deleted_at'.format(table)), ['deleted_at'], unique=False)
+
+
+def downgrade():
+    for table in SOFT_DELETE_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f('ix_{}_deleted_at'.format(table)))
+            batch_op.drop_column('deleted_at')
@@ -0,0 +1,43 @@
+"""denormalized favorite_count on catalog tables
+
+Revision ID: e41d7a2c9b3f
+Revises: 5b5b7f9c1ec7
+Create Date: 2026-10-18 16:12:08.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41d7a2c9b3f'
+down_revision = '5b5b7f9c1ec7'
+branch_labels = None
+depends_on = None
+
+# Tabla con el contador -> (tabla de favoritos, columna que la referencia)
+COUNTED_TABLES = {
+    'personajes': ('favoritos_personajes', 'personajes_relacion'),
+    'vehiculos': ('favoritos_vehiculos', 'vehiculos_relacion'),
+    'planetas': ('favoritos_planetas', 'planetas_relacion'),
+}
+
+
+def upgrade():
+    for table, (favorites, column) in COUNTED_TABLES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('favorite_count', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.create_index(batch_op.f('ix_{}_favorite_count'.format(table)), ['favorite_count'], unique=False)
+        # Valor inicial desde los favoritos ya guardados
+        op.execute(
+            'UPDATE {table} SET favorite_count = '
+            '(SELECT count(*) FROM {favorites} WHERE {favorites}.{column} = {table}.id)'.format(
+                table=table, favorites=favorites, column=column)
+        )
+
+
+def downgrade():
+    for table in COUNTED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f('ix_{}_favorite_count'.format(table)))
+            batch_op.drop_column('favorite_count')
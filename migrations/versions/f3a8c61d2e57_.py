@@ -0,0 +1,85 @@
+"""change log table and triggers for /changes
+
+Revision ID: f3a8c61d2e57
+Revises: e41d7a2c9b3f
+Create Date: 2026-10-18 17:05:31.846201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c61d2e57'
+down_revision = 'e41d7a2c9b3f'
+branch_labels = None
+depends_on = None
+
+# Tabla -> columnas cuyo UPDATE es un cambio visible (debe coincidir con src/changes.py)
+TRACKED_TABLES = {
+    'users': ['email', 'deleted_at'],
+    'personajes': ['name', 'eye_color', 'hair_color', 'deleted_at'],
+    'vehiculos': ['name', 'model', 'deleted_at'],
+    'planetas': ['name', 'population', 'deleted_at'],
+    'favoritos_personajes': ['personajes_relacion', 'usuarios_relacion'],
+    'favoritos_vehiculos': ['vehiculos_relacion', 'usuarios_relacion'],
+    'favoritos_planetas': ['planetas_relacion', 'usuarios_relacion'],
+}
+
+RECORD_CHANGE_FUNCTION = (
+    "CREATE OR REPLACE FUNCTION record_change() RETURNS trigger AS $$ BEGIN "
+    "IF TG_OP = 'DELETE' THEN "
+    "IF to_jsonb(OLD) ->> 'deleted_at' IS NULL THEN "
+    "INSERT INTO changes (table_name, row_id, op, txid, changed_at) "
+    "VALUES (TG_TABLE_NAME, OLD.id, 'delete', txid_current(), now() AT TIME ZONE 'utc'); "
+    "END IF; RETURN OLD; END IF; "
+    "INSERT INTO changes (table_name, row_id, op, txid, changed_at) "
+    "VALUES (TG_TABLE_NAME, NEW.id, CASE WHEN to_jsonb(NEW) ->> 'deleted_at' IS NULL THEN 'upsert' ELSE 'delete' END, "
+    "txid_current(), now() AT TIME ZONE 'utc'); "
+    "RETURN NEW; END $$ LANGUAGE plpgsql"
+)
+
+
+def upgrade():
+    op.create_table('changes',
+    sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('table_name', sa.String(length=80), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('txid', sa.BigInteger(), nullable=True),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(RECORD_CHANGE_FUNCTION)
+        for table, columns in TRACKED_TABLES.items():
+            op.execute(
+                'CREATE TRIGGER changes_{table} AFTER INSERT OR UPDATE OF {columns} OR DELETE ON {table} '
+                'FOR EACH ROW EXECUTE PROCEDURE record_change()'.format(table=table, columns=', '.join(columns))
+            )
+    elif dialect == 'sqlite':
+        for table, columns in TRACKED_TABLES.items():
+            soft_delete = 'deleted_at' in columns
+            change_op = "CASE WHEN NEW.deleted_at IS NULL THEN 'upsert' ELSE 'delete' END" if soft_delete else "'upsert'"
+            insert = ("INSERT INTO changes (table_name, row_id, op, changed_at) "
+                      "VALUES ('{table}', {{row}}.id, {{op}}, CURRENT_TIMESTAMP); END").format(table=table)
+            op.execute('CREATE TRIGGER changes_{table}_ai AFTER INSERT ON {table} BEGIN '.format(table=table)
+                       + insert.format(row='NEW', op=change_op))
+            op.execute('CREATE TRIGGER changes_{table}_au AFTER UPDATE OF {columns} ON {table} BEGIN '.format(
+                table=table, columns=', '.join(columns)) + insert.format(row='NEW', op=change_op))
+            op.execute('CREATE TRIGGER changes_{table}_ad AFTER DELETE ON {table} {when}BEGIN '.format(
+                table=table, when='WHEN OLD.deleted_at IS NULL ' if soft_delete else '') + insert.format(row='OLD', op="'delete'"))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in TRACKED_TABLES:
+            op.execute('DROP TRIGGER IF EXISTS changes_{table} ON {table}'.format(table=table))
+        op.execute('DROP FUNCTION IF EXISTS record_change()')
+    elif dialect == 'sqlite':
+        for table in TRACKED_TABLES:
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute('DROP TRIGGER IF EXISTS changes_{table}_{suffix}'.format(table=table, suffix=suffix))
+    op.drop_table('changes')
@@ -1,23 +1,42 @@
+"""
+Panel de administración Flask-Admin.
+
+Variables:
+    ADMIN_MODE  "lazy" (por defecto): el panel se monta en una app aparte la primera vez que se pide /admin,
+                así los workers y los comandos `flask db ...` arrancan sin importar Flask-Admin.
+                "eager": se registra en la app principal al arrancar (comportamiento anterior).
+                "off": sin panel; se puede servir en un proceso aparte con
+                    $ gunicorn --chdir src "admin:create_admin_app()"
+"""
 import os  # Importa el módulo os para interactuar con funcionalidades del sistema operativo
-from flask_admin import Admin  # Importa la clase Admin de Flask-Admin para configurar la interfaz de administración
+import threading
+from flask import Flask
 from models import (  # Importa los modelos y la instancia de base de datos desde el módulo models
     db, Users, Personajes, Vehiculos, Planetas,
     Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas
 )
-from flask_admin.contrib.sqla import ModelView  # Importa ModelView para crear vistas de modelo en Flask-Admin
+from config import database_uri, engine_options
 
-def setup_admin(app):
+ADMIN_MODE = os.getenv("ADMIN_MODE", "lazy")
+ADMIN_URL = "/admin"
+
+
+def register_views(app):
     """
-    Configura la interfaz de administración de Flask-Admin para la aplicación Flask.
+    Registra Flask-Admin y una vista de modelo por tabla en la aplicación dada.
 
     Args:
         app (Flask): Instancia de la aplicación Flask.
     """
+    # Flask-Admin se importa aquí: solo lo carga el proceso que de verdad sirve el panel
+    from flask_admin import Admin  # Importa la clase Admin de Flask-Admin para configurar la interfaz de administración
+    from flask_admin.contrib.sqla import ModelView  # Importa ModelView para crear vistas de modelo en Flask-Admin
+
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')  # Configura la clave secreta de la aplicación Flask
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'  # Configura el tema de la interfaz de administración
 
     # Crea una instancia de Admin para la aplicación con nombre y modo de plantilla especificados
-    admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3')
+    admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3', url=ADMIN_URL)
 
     # Agrega vistas de modelo para cada modelo a la interfaz de administración
     admin.add_view(ModelView(Users, db.session))
@@ -30,3 +49,61 @@ def setup_admin(app):
 
     # Puedes duplicar esta línea para agregar más modelos a la interfaz de administración
     # admin.add_view(ModelView(YourModelName, db.session))
+
+
+def create_admin_app(config=None):
+    """
+    Crea una aplicación Flask que solo sirve el panel de administración.
+
+    Args:
+        config (dict): Configuración de la app principal; sin ella se lee la base de datos del entorno.
+    """
+    admin_app = Flask(__name__)
+    if config is None:
+        uri = database_uri()
+        config = {"SQLALCHEMY_DATABASE_URI": uri, "SQLALCHEMY_ENGINE_OPTIONS": engine_options(uri)}
+    admin_app.config.update(config)
+    db.init_app(admin_app)
+    register_views(admin_app)
+    return admin_app
+
+
+class LazyAdmin:
+    """
+    Middleware WSGI que envía /admin a la app del panel, creándola en la primera petición.
+    """
+
+    def __init__(self, wsgi_app, config):
+        self.wsgi_app = wsgi_app
+        self.config = config
+        self.admin_app = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self.admin_app is None:
+            with self._lock:
+                if self.admin_app is None:
+                    self.admin_app = create_admin_app(self.config)
+        return self.admin_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path == ADMIN_URL or path.startswith(ADMIN_URL + "/"):
+            return self.load()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def setup_admin(app):
+    """
+    Configura la interfaz de administración de Flask-Admin para la aplicación Flask según ADMIN_MODE.
+
+    Args:
+        app (Flask): Instancia de la aplicación Flask.
+    """
+    if ADMIN_MODE == "eager":
+        register_views(app)
+    elif ADMIN_MODE == "lazy":
+        app.wsgi_app = LazyAdmin(app.wsgi_app, app.config)
+    else:
+        return
+    app.config["ADMIN_URL"] = ADMIN_URL  # El sitemap solo enlaza el panel si está montado
@@ -2,36 +2,65 @@
 Este módulo se encarga de iniciar el servidor API, cargar la base de datos y añadir los endpoints.
 """
 import os
+import click
 from flask import Flask, request, jsonify, url_for
-from flask_migrate import Migrate
-from flask_swagger import swagger
 from flask_cors import CORS
-from utils import APIException, generate_sitemap
+from utils import APIException, generate_sitemap, paginate, parse_limit, page_cache_key, parse_ids, wants_ndjson, stream_ndjson
 from admin import setup_admin
-from models import db, Users, Personajes, Vehiculos, Planetas, Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas
+from bulk import bulk_response, insert_one
+from config import database_uri, engine_options, pool_status
+from cache import cache
+import tracking
+import instrumentation
+import metrics
+import compression
+import versioning
+from versioning import conditional, utcnow
+from serialization import FAST_JSON, json_response, select_page, select_entity, select_entities, parse_fields
+import search
+import purge
+import counters
+import replicas
+import changes
+import snapshots
+import jobs
+from sqlalchemy import update
+from models import db, not_deleted, Users, Personajes, Vehiculos, Planetas, Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas, FAVORITES_LOADER_OPTIONS
 
 # Crea una instancia de la aplicación Flask
 app = Flask(__name__)
 app.url_map.strict_slashes = False  # Configura para que las rutas no tengan que terminar en "/" obligatoriamente
 
 # Configuración de la base de datos según la URL especificada en la variable de entorno o usa una base de datos SQLite
-db_url = os.getenv("DATABASE_URL")
-if db_url is not None:
-    app.config['SQLALCHEMY_DATABASE_URI'] = db_url.replace("postgres://", "postgresql://")
-else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/test.db"
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Deshabilita el seguimiento de modificaciones de SQLAlchemy
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])  # Pool y timeouts desde variables de entorno
 
-# Configuración de Flask-Migrate para manejar las migraciones de la base de datos
-MIGRATE = Migrate(app, db)
+# Configuración de Flask-Migrate para manejar las migraciones de la base de datos.
+# Solo hace falta en los comandos `flask db ...`: los workers de gunicorn no cargan alembic
+if click.get_current_context(silent=True) is not None:
+    from flask_migrate import Migrate
+    MIGRATE = Migrate(app, db)
 # Inicializa la instancia de la base de datos con la aplicación Flask
 db.init_app(app)
+replicas.init_app(app)  # Lecturas GET en las réplicas de DATABASE_REPLICA_URLS (si hay)
+tracking.register(db.session)  # Registra las tablas modificadas en cada commit (invalida la caché)
+versioning.register(db.session)  # Incrementa la versión de cada tabla modificada en la misma transacción
+instrumentation.init_app(app)  # Server-Timing y log por petición si SQL_INSTRUMENTATION=1
+with app.app_context():
+    metrics.init_app(app, db.engine)  # Endpoint /metrics (Prometheus) agregado entre los workers de gunicorn
+compression.init_app(app)  # gzip/brotli negociado con Accept-Encoding
 CORS(app)  # Habilita CORS para permitir solicitudes desde cualquier origen
-setup_admin(app)  # Configura el panel de administración Flask-Admin
+setup_admin(app)  # Panel Flask-Admin en /admin (se carga en la primera petición, ver ADMIN_MODE)
+search.init_app(app)  # Comando `flask search-index` (índice FTS5 en SQLite)
+purge.init_app(app)  # Comando `flask purge` (borra en lotes las filas con borrado lógico y sus favoritos)
+counters.init_app(app)  # Comando `flask reconcile-counts` (recalcula favorite_count)
+snapshots.init_app(app)  # Exportaciones NDJSON completas del catálogo desde ficheros si SNAPSHOTS_ENABLED=1
 
 # Manejo/serialización de errores como objetos JSON
 @app.errorhandler(APIException)
 def handle_invalid_usage(error):
+    metrics.record_api_error(error.status_code)
     return jsonify(error.to_dict()), error.status_code
 
 # Genera un sitemap con todos los endpoints de la aplicación
@@ -44,12 +73,12 @@ def sitemap():
 @app.route('/users', methods=['POST'])
 def create_user():
     body = request.json
-    me = Users(name=body["name"], email=body["email"], password=body["password"], is_active=body["is_active"])
-    db.session.add(me)
-    db.session.commit()
+    if isinstance(body, list):
+        return bulk_response(Users, ["email", "password", "is_active"], body)  # Inserción masiva cuando se envía una lista de objetos
+    user_id = insert_one(Users, ["email", "password", "is_active"], body)  # Mismas validaciones que la inserción masiva (email único)
     response_body = {
         "msg": "Ok",
-        "id": me.id
+        "id": user_id
     }
     return jsonify(response_body), 200
 
@@ -57,12 +86,12 @@ def create_user():
 @app.route('/personajes', methods=['POST'])
 def create_personaje():
     body = request.json
-    me = Personajes(name=body["name"], eye_color=body["eye_color"], hair_color=body["hair_color"])
-    db.session.add(me)
-    db.session.commit()
+    if isinstance(body, list):
+        return bulk_response(Personajes, ["name", "eye_color", "hair_color"], body)  # Inserción masiva cuando se envía una lista de objetos
+    personaje_id = insert_one(Personajes, ["name", "eye_color", "hair_color"], body)  # Mismas validaciones que la inserción masiva (400 si falta un campo)
     response_body = {
         "msg": "Ok",
-        "id": me.id
+        "id": personaje_id
     }
     return jsonify(response_body), 200
 
@@ -70,12 +99,12 @@ def create_personaje():
 @app.route('/vehiculos', methods=['POST'])
 def create_vehiculo():
     body = request.json
-    me = Vehiculos(name=body["name"], model=body["model"])
-    db.session.add(me)
-    db.session.commit()
+    if isinstance(body, list):
+        return bulk_response(Vehiculos, ["name", "model"], body)  # Inserción masiva cuando se envía una lista de objetos
+    vehiculo_id = insert_one(Vehiculos, ["name", "model"], body)  # Mismas validaciones que la inserción masiva (400 si falta un campo)
     response_body = {
         "msg": "Ok",
-        "id": me.id
+        "id": vehiculo_id
     }
     return jsonify(response_body), 200
 
@@ -83,12 +112,12 @@ def create_vehiculo():
 @app.route('/planetas', methods=['POST'])
 def create_planeta():
     body = request.json
-    me = Planetas(name=body["name"], population=body["population"])
-    db.session.add(me)
-    db.session.commit()
+    if isinstance(body, list):
+        return bulk_response(Planetas, ["name", "population"], body)  # Inserción masiva cuando se envía una lista de objetos
+    planeta_id = insert_one(Planetas, ["name", "population"], body)  # Mismas validaciones que la inserción masiva (400 si falta un campo)
     response_body = {
         "msg": "Ok",
-        "id": me.id
+        "id": planeta_id
     }
     return jsonify(response_body), 200
 
@@ -96,12 +125,12 @@ def create_planeta():
 @app.route('/favoritos_personajes', methods=['POST'])
 def create_favorito_personaje():
     body = request.json
-    me = Favoritos_personajes(personajes_relacion=body["personajes_relacion"], usuarios_relacion=body["usuarios_relacion"])
-    db.session.add(me)
-    db.session.commit()
+    if isinstance(body, list):
+        return bulk_response(Favoritos_personajes, ["personajes_relacion", "usuarios_relacion"], body)  # Inserción masiva cuando se envía una lista de objetos
+    favorito_id = insert_one(Favoritos_personajes, ["personajes_relacion", "usuarios_relacion"], body)  # Si el favorito ya existe no se duplica: se devuelve su id
     response_body = {
         "msg": "Ok",
-        "id": me.id
+        "id": favorito_id
     }
     return jsonify(response_body), 200
 
@@ -109,12 +138,12 @@ def create_favorito_personaje():
 @app.route('/favoritos_vehiculos', methods=['POST'])
 def create_favorito_vehiculo():
     body = request.json
-    me = Favoritos_vehiculos(vehiculos_relacion=body["vehiculos_relacion"], usuarios_relacion=body["usuarios_relacion"])
-    db.session.add(me)
-    db.session.commit()
+    if isinstance(body, list):
+        return bulk_response(Favoritos_vehiculos, ["vehiculos_relacion", "usuarios_relacion"], body)  # Inserción masiva cuando se envía una lista de objetos
+    favorito_id = insert_one(Favoritos_vehiculos, ["vehiculos_relacion", "usuarios_relacion"], body)  # Si el favorito ya existe no se duplica: se devuelve su id
     response_body = {
         "msg": "Ok",
-        "id": me.id
+        "id": favorito_id
     }
     return jsonify(response_body), 200
 
@@ -122,34 +151,130 @@ def create_favorito_vehiculo():
 @app.route('/favoritos_planetas', methods=['POST'])
 def create_favorito_planeta():
     body = request.json
-    me = Favoritos_planetas(planetas_relacion=body["planetas_relacion"], usuarios_relacion=body["usuarios_relacion"])
-    db.session.add(me)
-    db.session.commit()
+    if isinstance(body, list):
+        return bulk_response(Favoritos_planetas, ["planetas_relacion", "usuarios_relacion"], body)  # Inserción masiva cuando se envía una lista de objetos
+    favorito_id = insert_one(Favoritos_planetas, ["planetas_relacion", "usuarios_relacion"], body)  # Si el favorito ya existe no se duplica: se devuelve su id
     response_body = {
         "msg": "Ok",
-        "id": me.id
+        "id": favorito_id
     }
     return jsonify(response_body), 200
 
+# Lecturas del catálogo a través de la caché. La clave lleva la versión de la tabla (la misma del ETag):
+# una escritura en otro proceso cambia la versión y las entradas anteriores dejan de usarse; el commit
+# de este proceso además las borra
+
+def serialize_page(model, fields):
+    if FAST_JSON or fields != model.serialized_fields:
+        return select_page(model, fields, request.args)  # Solo las columnas necesarias, sin hidratar objetos ORM
+    items, next_cursor = paginate(model.query.filter(not_deleted(model)), model.id, request.args)
+    return list(map(lambda item:item.serialize(), items)), next_cursor
+
+
+def versioned_key(model, key):
+    return "v{}:{}".format(versioning.request_version(model), key)
+
+
+def load_page(model):
+    fields = parse_fields(model, request.args)  # ?fields=id,name: la proyección se hace en el SELECT
+    return cache.get_or_set(model.__tablename__, versioned_key(model, page_cache_key(request.args, fields)), lambda: serialize_page(model, fields))
+
+
+def load_search(model):
+    fields = parse_fields(model, request.args)
+    return cache.get_or_set(model.__tablename__, versioned_key(model, search.search_cache_key(request.args, fields)), lambda: search.search_model(model, fields, request.args))
+
+
+def entity_cache_key(model, entity_id, fields):
+    key = entity_id if fields == model.serialized_fields else "{}:{}".format(entity_id, ",".join(fields))
+    return versioned_key(model, key)
+
+
+def load_entity(model, entity_id, label):
+    fields = parse_fields(model, request.args)
+    data = cache.get_or_set(model.__tablename__, entity_cache_key(model, entity_id, fields), lambda: select_entity(model, fields, entity_id))
+    if data is None:
+        raise APIException("{} not found".format(label), status_code=404)
+    return data
+
+
+def load_entities(model, ids):
+    """
+    Lote de entidades por id: las que están en la caché se leen de ahí y el resto con una sola consulta IN.
+
+    Returns:
+        tuple: Entidades encontradas en el orden de `ids` y lista de ids que no existen.
+    """
+    fields = parse_fields(model, request.args)
+    found = {}
+    for entity_id in ids:
+        data = cache.get(model.__tablename__, entity_cache_key(model, entity_id, fields))
+        if data is not None:
+            found[entity_id] = data
+    pending = [entity_id for entity_id in ids if entity_id not in found]
+    if pending:
+        for data in select_entities(model, fields, pending):
+            found[data["id"]] = data
+            cache.set(model.__tablename__, entity_cache_key(model, data["id"], fields), data)
+    return [found[entity_id] for entity_id in ids if entity_id in found], [entity_id for entity_id in ids if entity_id not in found]
+
+
+def batch_response(model):
+    items, missing = load_entities(model, parse_ids(request.args["ids"]))
+    response_body = {
+        "msg": "OK",
+        "data": items,  # Entidades en el mismo orden en que se pidieron
+        "missing": missing  # Ids pedidos que no existen
+    }
+    return json_response(response_body), 200
+
+
+def top_response(model):
+    response_body = {
+        "msg": "OK",
+        "data": counters.top(model, parse_limit(request.args))  # Las N entidades con más favoritos, con su favorite_count
+    }
+    return json_response(response_body), 200
+
+
+def stream_collection(model):
+    fields = parse_fields(model, request.args)
+    return stream_ndjson(model.query.filter(not_deleted(model)), model.id, fields if fields != model.serialized_fields else None)
+
+
+@app.route('/db/pool', methods=['GET'])
+def get_pool_stats():
+    data = pool_status(db.engine)  # Conexiones abiertas, en uso y desbordadas del pool
+    router = app.extensions.get("replicas")
+    if router is not None:
+        data["replicas"] = [dict(status, **pool_status(engine)) for status, engine in zip(router.status(), router.engines)]  # Estado y pool de cada réplica
+    return jsonify({"msg": "OK", "data": data}), 200
+
+
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({"msg": "OK", "data": cache.stats()}), 200  # Aciertos, fallos y expulsiones de la caché
+
 # Definición de endpoints GET
 
 @app.route('/users', methods=['GET'])
 def get_all_users():
-    users = Users.query.all()  # Consulta todos los usuarios en la base de datos
-    users_serialized = list(map(lambda item:item.serialize(), users))  # Serializa la lista de usuarios
+    users_serialized, next_cursor = serialize_page(Users, parse_fields(Users, request.args))  # Consulta y serializa una página de usuarios
 
     response_body = {
         "msg": "OK",
-        "data": users_serialized  # Retorna los usuarios serializados en la respuesta
+        "data": users_serialized,  # Retorna los usuarios serializados en la respuesta
+        "next_cursor": next_cursor  # Cursor para pedir la siguiente página (None si no hay más)
     }
 
-    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
 
 
 @app.route('/users/<int:user_id>', methods=['GET'])
 def get_user_by_id(user_id):
-    user = Users.query.filter_by(id=user_id).first()  # Consulta un usuario por su ID en la base de datos
-    user_serialize = user.serialize()  # Serializa el usuario encontrado
+    user_serialize = select_entity(Users, parse_fields(Users, request.args), user_id)  # Consulta las columnas pedidas del usuario por su ID
+    if user_serialize is None:
+        raise APIException("User not found", status_code=404)
 
     response_body = {
         "msg": "Ok",
@@ -161,116 +286,257 @@ def get_user_by_id(user_id):
 
 @app.route('/users/favorites', methods=['GET'])
 def get_users_favorites():
-    users = Users.query.all()  # Consulta todos los usuarios en la base de datos
-    users_serialized = list(map(lambda item:item.serialize(), users))  # Serializa la lista de usuarios
+    query = Users.query.filter(not_deleted(Users)).options(*FAVORITES_LOADER_OPTIONS)  # Precarga los favoritos y sus entidades en un número fijo de consultas
+    next_cursor = None
+    if request.args.get("ids"):
+        ids = parse_ids(request.args["ids"])  # Lote de usuarios pedido por el cliente (?ids=1,2,3)
+        users = query.filter(Users.id.in_(ids)).order_by(Users.id).all()
+    else:
+        users, next_cursor = paginate(query, Users.id, request.args)  # Sin ids se devuelve una página de usuarios
+    users_serialized = list(map(lambda item:item.serialize_favorites(), users))  # Serializa los usuarios con sus favoritos resueltos
 
     response_body = {
         "msg": "OK",
-        "data": users_serialized  # Retorna los usuarios serializados en la respuesta
+        "data": users_serialized,  # Retorna los usuarios con sus favoritos en la respuesta
+        "next_cursor": next_cursor
+    }
+
+    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+
+
+@app.route('/users/<int:user_id>/favorites', methods=['GET'])
+def get_user_favorites(user_id):
+    user = Users.query.filter(not_deleted(Users)).options(*FAVORITES_LOADER_OPTIONS).filter_by(id=user_id).first()  # Consulta el usuario con todos sus favoritos
+    if user is None:
+        raise APIException("User not found", status_code=404)
+
+    response_body = {
+        "msg": "Ok",
+        "data": user.serialize_favorites()  # Retorna los personajes, vehículos y planetas favoritos del usuario
     }
 
     return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
 
 
+@app.route('/personajes/top', methods=['GET'])
+def get_top_personajes():
+    return top_response(Personajes)  # Ranking por favorite_count (sin ETag: el contador no cambia la versión de la tabla)
+
+
 @app.route('/personajes', methods=['GET'])
+@conditional(Personajes)  # ETag/Last-Modified según la versión de la tabla; 304 sin tocar las filas
 def handle_personajes():
-    personajes = Personajes.query.all()  # Consulta todos los personajes en la base de datos
-    personajes_serialized = list(map(lambda item:item.serialize(), personajes))  # Serializa la lista de personajes
+    if request.args.get("ids"):
+        return batch_response(Personajes)  # ?ids=1,2,3: varios personajes en una sola consulta IN
+    if wants_ndjson(request):
+        return stream_collection(Personajes)  # Exporta todos los personajes en streaming (NDJSON)
+
+    if request.args.get("name"):
+        personajes_serialized, next_cursor = load_search(Personajes)  # Filtro ?name= ordenado por relevancia
+    else:
+        personajes_serialized, next_cursor = load_page(Personajes)  # Consulta (o lee de la caché) una página de personajes serializados
 
     response_body = {
         "msg": "OK",
-        "data": personajes_serialized  # Retorna los personajes serializados en la respuesta
+        "data": personajes_serialized,  # Retorna los personajes serializados en la respuesta
+        "next_cursor": next_cursor  # Cursor para pedir la siguiente página (None si no hay más)
     }
 
-    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
 
 
 @app.route('/personajes/<int:personaje_id>', methods=['GET'])
+@conditional(Personajes)  # ETag/Last-Modified según la versión de la tabla; 304 sin tocar las filas
 def get_personaje_by_id(personaje_id):
-    personaje = Personajes.query.filter_by(id=personaje_id).first()  # Consulta un personaje por su ID en la base de datos
-    personaje_serialize = personaje.serialize()  # Serializa el personaje encontrado
+    personaje_serialize = load_entity(Personajes, personaje_id, "Personaje")  # Consulta (o lee de la caché) el personaje por su ID
 
     response_body = {
         "msg": "Ok",
         "data": personaje_serialize  # Retorna el personaje serializado en la respuesta
     }
 
-    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+
+
+@app.route('/vehiculos/top', methods=['GET'])
+def get_top_vehiculos():
+    return top_response(Vehiculos)  # Ranking por favorite_count (sin ETag: el contador no cambia la versión de la tabla)
 
 
 @app.route('/vehiculos', methods=['GET'])
+@conditional(Vehiculos)  # ETag/Last-Modified según la versión de la tabla; 304 sin tocar las filas
 def handle_vehiculos():
-    vehiculos = Vehiculos.query.all()  # Consulta todos los vehículos en la base de datos
-    vehiculos_serialized = list(map(lambda item:item.serialize(), vehiculos))  # Serializa la lista de vehículos
+    if request.args.get("ids"):
+        return batch_response(Vehiculos)  # ?ids=1,2,3: varios vehículos en una sola consulta IN
+    if wants_ndjson(request):
+        return stream_collection(Vehiculos)  # Exporta todos los vehículos en streaming (NDJSON)
+
+    if request.args.get("name"):
+        vehiculos_serialized, next_cursor = load_search(Vehiculos)  # Filtro ?name= ordenado por relevancia
+    else:
+        vehiculos_serialized, next_cursor = load_page(Vehiculos)  # Consulta (o lee de la caché) una página de vehículos serializados
 
     response_body = {
         "msg": "OK",
-        "data": vehiculos_serialized  # Retorna los vehículos serializados en la respuesta
+        "data": vehiculos_serialized,  # Retorna los vehículos serializados en la respuesta
+        "next_cursor": next_cursor  # Cursor para pedir la siguiente página (None si no hay más)
     }
 
-    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
 
 
 @app.route('/vehiculo/<int:vehiculo_id>', methods=['GET'])
+@conditional(Vehiculos)  # ETag/Last-Modified según la versión de la tabla; 304 sin tocar las filas
 def get_vehiculo_by_id(vehiculo_id):
-    vehiculo = Vehiculos.query.filter_by(id=vehiculo_id).first()  # Consulta un vehículo por su ID en la base de datos
-    vehiculo_serialize = vehiculo.serialize()  # Serializa el vehículo encontrado
+    vehiculo_serialize = load_entity(Vehiculos, vehiculo_id, "Vehiculo")  # Consulta (o lee de la caché) el vehículo por su ID
 
     response_body = {
         "msg": "Ok",
         "data": vehiculo_serialize  # Retorna el vehículo serializado en la respuesta
     }
 
-    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+
+
+@app.route('/planetas/top', methods=['GET'])
+def get_top_planetas():
+    return top_response(Planetas)  # Ranking por favorite_count (sin ETag: el contador no cambia la versión de la tabla)
 
 
 @app.route('/planetas', methods=['GET'])
+@conditional(Planetas)  # ETag/Last-Modified según la versión de la tabla; 304 sin tocar las filas
 def handle_planetas():
-    planetas = Planetas.query.all()  # Consulta todos los planetas en la base de datos
-    planetas_serialized = list(map(lambda item:item.serialize(), planetas))  # Serializa la lista de planetas
+    if request.args.get("ids"):
+        return batch_response(Planetas)  # ?ids=1,2,3: varios planetas en una sola consulta IN
+    if wants_ndjson(request):
+        return stream_collection(Planetas)  # Exporta todos los planetas en streaming (NDJSON)
+
+    if request.args.get("name"):
+        planetas_serialized, next_cursor = load_search(Planetas)  # Filtro ?name= ordenado por relevancia
+    else:
+        planetas_serialized, next_cursor = load_page(Planetas)  # Consulta (o lee de la caché) una página de planetas serializados
 
     response_body = {
         "msg": "OK",
-        "data": planetas_serialized  # Retorna los planetas serializados en la respuesta
+        "data": planetas_serialized,  # Retorna los planetas serializados en la respuesta
+        "next_cursor": next_cursor  # Cursor para pedir la siguiente página (None si no hay más)
     }
 
-    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
 
 
 @app.route('/planeta/<int:planeta_id>', methods=['GET'])
+@conditional(Planetas)  # ETag/Last-Modified según la versión de la tabla; 304 sin tocar las filas
 def get_planeta_by_id(planeta_id):
-    planeta = Planetas.query.filter_by(id=planeta_id).first()  # Consulta un planeta por su ID en la base de datos
-    planeta_serialize = planeta.serialize()  # Serializa el planeta encontrado
+    planeta_serialize = load_entity(Planetas, planeta_id, "Planeta")  # Consulta (o lee de la caché) el planeta por su ID
 
     response_body = {
         "msg": "Ok",
         "data": planeta_serialize  # Retorna el planeta serializado en la respuesta
     }
 
-    return jsonify(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+
+
+@app.route('/search', methods=['GET'])
+def search_catalog():
+    results, next_cursor = search.search_all(request.args)  # Busca ?q= en personajes, vehículos y planetas
+
+    response_body = {
+        "msg": "OK",
+        "data": results,  # Resultados de todos los recursos ordenados por relevancia
+        "next_cursor": next_cursor  # Cursor para pedir la siguiente página (None si no hay más)
+    }
+
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+
+
+@app.route('/changes', methods=['GET'])
+def get_changes():
+    changes_list, next_since, has_more = changes.changes_since(request.args)  # Cambios posteriores a ?since= (upserts y tombstones)
+
+    response_body = {
+        "msg": "OK",
+        "data": changes_list,  # Último cambio de cada fila, en orden de secuencia
+        "next_since": next_since,  # Valor de ?since= para la siguiente petición
+        "has_more": has_more  # True si quedan cambios por leer
+    }
+
+    return json_response(response_body), 200  # Retorna la respuesta en formato JSON con el código de estado 200
+
+
+# Trabajos en segundo plano (los ejecuta src/worker.py)
+
+@app.route('/jobs/purge', methods=['POST'])
+def create_purge_job():
+    body = request.get_json(silent=True) or {}
+    payload = {}
+    for name in ("batch_size", "grace_seconds"):
+        if name in body:
+            if type(body[name]) is not int or body[name] < 0:
+                raise APIException("Field '{}' must be a non-negative integer".format(name), status_code=400)
+            payload[name] = body[name]
+    job_id = jobs.enqueue("purge", payload)  # Encola la purga de los borrados lógicos y responde al momento
+
+    response_body = {
+        "msg": "Accepted",
+        "id": job_id  # Id para consultar el estado en GET /jobs/<id>
+    }
+
+    return jsonify(response_body), 202
+
+
+@app.route('/jobs/reconcile-counts', methods=['POST'])
+def create_reconcile_job():
+    body = request.get_json(silent=True) or {}
+    payload = {}
+    if "batch_size" in body:
+        if type(body["batch_size"]) is not int or body["batch_size"] < 1:
+            raise APIException("Field 'batch_size' must be a positive integer", status_code=400)
+        payload["batch_size"] = body["batch_size"]
+    job_id = jobs.enqueue("reconcile_counts", payload)  # Recalcula favorite_count en segundo plano
+
+    response_body = {
+        "msg": "Accepted",
+        "id": job_id  # Id para consultar el estado en GET /jobs/<id>
+    }
+
+    return jsonify(response_body), 202
+
+
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    response_body = {
+        "msg": "OK",
+        "data": jobs.get_job(job_id)  # Estado, progreso y resultado (o error) del trabajo
+    }
+
+    return jsonify(response_body), 200
 
 
 # Definición de endpoints DELETE
+# Los DELETE hacen un borrado lógico (deleted_at) y responden al momento; la fila y sus favoritos
+# los borra después `flask purge` en lotes pequeños, sin bloquear la petición
+
+def soft_delete(model, entity_id):
+    result = db.session.execute(
+        update(model).where(model.id == entity_id, not_deleted(model)).values(deleted_at=utcnow())
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
 
 @app.route("/user/<int:user_id>", methods=["DELETE"])
 def delete_user(user_id):
-    user = Users.query.get(user_id)  # Consulta un usuario por su ID en la base de datos
-    if user is None:
-        return "User not found", 404  # Retorna un mensaje de error si el usuario no se encuentra
-
-    db.session.delete(user)  # Elimina el usuario de la sesión de la base de datos
-    db.session.commit()  # Confirma la transacción en la base de datos
+    if not soft_delete(Users, user_id):  # Marca el usuario como borrado (deleted_at) en una sola sentencia
+        return "User not found", 404  # Retorna un mensaje de error si no existe o ya estaba borrado
     return jsonify({'message': 'User deleted'}), 200  # Retorna la respuesta en formato JSON con el código de estado 200
 
 
 @app.route('/favorite/personaje/<int:personaje_id>', methods=['DELETE'])
 def delete_personaje_by_id(personaje_id):
-    personaje = Personajes.query.get(personaje_id)  # Consulta un personaje por su ID en la base de datos
-    if personaje is None:
-        return "Personaje not found", 404  # Retorna un mensaje de error si el personaje no se encuentra
-
-    db.session.delete(personaje)  # Elimina el personaje de la sesión de la base de datos
-    db.session.commit()  # Confirma la transacción en la base de datos
+    if not soft_delete(Personajes, personaje_id):  # Marca el personaje como borrado (deleted_at) en una sola sentencia
+        return "Personaje not found", 404  # Retorna un mensaje de error si no existe o ya estaba borrado
     response_body = {
         "msg": "Personaje deleted",        
     }
@@ -280,12 +546,8 @@ def delete_personaje_by_id(personaje_id):
 
 @app.route('/favorite/vehiculo/<int:vehiculo_id>', methods=['DELETE'])
 def delete_vehiculo_by_id(vehiculo_id):
-    vehiculo = Vehiculos.query.get(vehiculo_id)  # Consulta un vehículo por su ID en la base de datos
-    if vehiculo is None:
-        return "Vehiculo not found", 404  # Retorna un mensaje de error si el vehículo no se encuentra
-
-    db.session.delete(vehiculo)  # Elimina el vehículo de la sesión de la base de datos
-    db.session.commit()  # Confirma la transacción en la base de datos
+    if not soft_delete(Vehiculos, vehiculo_id):  # Marca el vehículo como borrado (deleted_at) en una sola sentencia
+        return "Vehiculo not found", 404  # Retorna un mensaje de error si no existe o ya estaba borrado
     response_body = {
         "msg": "Vehiculo deleted",        
     }
@@ -295,12 +557,8 @@ def delete_vehiculo_by_id(vehiculo_id):
 
 @app.route('/favorite/planeta/<int:planeta_id>', methods=['DELETE'])
 def delete_planeta_by_id(planeta_id):
-    planeta = Planetas.query.get(planeta_id)  # Consulta un planeta por su ID en la base de datos
-    if planeta is None:
-        return "Planeta not found", 404  # Retorna un mensaje de error si el planeta no se encuentra
-
-    db.session.delete(planeta)  # Elimina el planeta de la sesión de la base de datos
-    db.session.commit()  # Confirma la transacción en la base de datos
+    if not soft_delete(Planetas, planeta_id):  # Marca el planeta como borrado (deleted_at) en una sola sentencia
+        return "Planeta not found", 404  # Retorna un mensaje de error si no existe o ya estaba borrado
     response_body = {
         "msg": "Planeta deleted",        
     }
@@ -0,0 +1,199 @@
+"""
+Modo de servicio ASGI (asíncrono) para las lecturas del catálogo, con el motor asyncio de SQLAlchemy.
+
+`wsgi.py` sigue siendo el punto de entrada por defecto y el único que acepta escrituras. Este módulo
+sirve los GET de colección y detalle (paginación, `?fields=`, `?ids=`, `?name=`, exportación NDJSON y
+ETag/304) sin bloquear un worker mientras espera a la base de datos, así cada proceso atiende muchas
+conexiones a la vez:
+
+    $ gunicorn asgi:application --chdir src -k uvicorn.workers.UvicornWorker --workers 2
+    $ uvicorn asgi:application --app-dir src --port 3001
+
+El driver asíncrono sale de DATABASE_URL (aiosqlite, asyncpg o aiomysql) y el pool se configura con
+las mismas variables que el modo síncrono (`config.py`). No usa la caché de respuestas: las escrituras
+ocurren en otros procesos y la caché en memoria no se enteraría; el ETag evita igualmente el trabajo
+cuando el cliente ya tiene la versión actual.
+"""
+from quart import Quart, request, jsonify, Response
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config import database_uri, engine_options, async_url
+from utils import APIException, parse_ids, wants_ndjson, NDJSON_MIMETYPE
+from serialization import (
+    dumps, dumps_stdlib, parse_fields, page_statement, page_result, entity_statement, entities_statement, stream_statement
+)
+from search import fts_statement, search_statement, search_result
+from versioning import version_statement, version_result, make_etag, not_modified
+from models import Users, Personajes, Vehiculos, Planetas
+
+app = Quart(__name__)
+app.url_map.strict_slashes = False
+
+# Misma base de datos que src/app.py, con el driver asíncrono correspondiente
+DATABASE_URL = async_url(database_uri())
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+
+@app.after_serving
+async def dispose_engine():
+    await engine.dispose()
+
+
+@app.errorhandler(APIException)
+async def handle_invalid_usage(error):
+    return jsonify(error.to_dict()), error.status_code
+
+
+async def fetch_all(statement):
+    async with engine.connect() as connection:
+        return (await connection.execute(statement)).all()
+
+
+async def fetch_one(statement):
+    async with engine.connect() as connection:
+        return (await connection.execute(statement)).first()
+
+
+async def fetch_mappings(statement):
+    async with engine.connect() as connection:
+        return (await connection.execute(statement)).mappings().all()
+
+
+# Tablas FTS5 ya encontradas (como en search.has_fts, solo se recuerdan las que existen)
+_fts_tables = set()
+
+
+async def has_fts(model):
+    if model.__tablename__ not in _fts_tables:
+        if await fetch_one(fts_statement(model)) is None:
+            return False
+        _fts_tables.add(model.__tablename__)
+    return True
+
+
+def json_body(body):
+    return Response(dumps(body), mimetype="application/json")
+
+
+async def conditional(model, load):
+    """
+    Igual que `versioning.conditional`: 304 si el cliente ya tiene la versión actual de la tabla,
+    si no el cuerpo que devuelve `load()`, siempre con ETag y Last-Modified.
+    """
+    version, last_modified = version_result(await fetch_one(version_statement(model.__tablename__)))
+    etag = make_etag(model.__tablename__, version, "ndjson" if wants_ndjson(request) else "json")
+    if not_modified(request, etag, last_modified):
+        response = Response(b"", status=304)
+    else:
+        response = await load()
+        if not isinstance(response, Response):
+            response = json_body(response)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+async def load_page(model):
+    fields = parse_fields(model, request.args)
+    statement, limit = page_statement(model, fields, request.args)
+    data, next_cursor = page_result(await fetch_all(statement), fields, limit)
+    return {"msg": "OK", "data": data, "next_cursor": next_cursor}
+
+
+async def load_collection(model):
+    # Mismo orden de casos que las vistas de colección de src/app.py
+    if request.args.get("ids"):
+        return await load_entities(model, parse_ids(request.args["ids"]))
+    if wants_ndjson(request):
+        return stream_collection(model)
+    if request.args.get("name"):
+        return await load_search(model)
+    return await load_page(model)
+
+
+async def load_entities(model, ids):
+    fields = parse_fields(model, request.args)
+    found = {row[0]: dict(zip(fields, row)) for row in await fetch_all(entities_statement(model, fields, ids))}
+    return {
+        "msg": "OK",
+        "data": [found[entity_id] for entity_id in ids if entity_id in found],
+        "missing": [entity_id for entity_id in ids if entity_id not in found],
+    }
+
+
+async def load_search(model):
+    fields = parse_fields(model, request.args)
+    dialect = engine.dialect.name
+    fts = dialect == "sqlite" and await has_fts(model)
+    statement, limit, offset = search_statement(model, fields, request.args, dialect, fts)
+    data, next_cursor = search_result(await fetch_mappings(statement), fields, limit, offset)
+    return {"msg": "OK", "data": data, "next_cursor": next_cursor}
+
+
+def stream_collection(model):
+    """
+    Exportación NDJSON de toda la colección, en bloques con un cursor del servidor (como utils.stream_ndjson).
+    """
+    fields = parse_fields(model, request.args)
+    statement = stream_statement(model, fields)
+
+    async def generate():
+        async with engine.connect() as connection:
+            async for row in await connection.stream(statement):
+                # Mismas líneas que la exportación de src/app.py (json de Flask + salto de línea)
+                yield dumps_stdlib(dict(zip(fields, row)))
+
+    return Response(generate(), mimetype=NDJSON_MIMETYPE)
+
+
+async def load_entity(model, entity_id, label):
+    fields = parse_fields(model, request.args)
+    row = await fetch_one(entity_statement(model, fields, entity_id))
+    if row is None:
+        raise APIException("{} not found".format(label), status_code=404)
+    return {"msg": "Ok", "data": dict(zip(fields, row))}
+
+# Definición de endpoints GET (mismas rutas y respuestas que src/app.py)
+
+@app.route('/users', methods=['GET'])
+async def get_all_users():
+    return json_body(await load_page(Users))
+
+
+@app.route('/users/<int:user_id>', methods=['GET'])
+async def get_user_by_id(user_id):
+    return json_body(await load_entity(Users, user_id, "User"))
+
+
+@app.route('/personajes', methods=['GET'])
+async def handle_personajes():
+    return await conditional(Personajes, lambda: load_collection(Personajes))
+
+
+@app.route('/personajes/<int:personaje_id>', methods=['GET'])
+async def get_personaje_by_id(personaje_id):
+    return await conditional(Personajes, lambda: load_entity(Personajes, personaje_id, "Personaje"))
+
+
+@app.route('/vehiculos', methods=['GET'])
+async def handle_vehiculos():
+    return await conditional(Vehiculos, lambda: load_collection(Vehiculos))
+
+
+@app.route('/vehiculo/<int:vehiculo_id>', methods=['GET'])
+async def get_vehiculo_by_id(vehiculo_id):
+    return await conditional(Vehiculos, lambda: load_entity(Vehiculos, vehiculo_id, "Vehiculo"))
+
+
+@app.route('/planetas', methods=['GET'])
+async def handle_planetas():
+    return await conditional(Planetas, lambda: load_collection(Planetas))
+
+
+@app.route('/planeta/<int:planeta_id>', methods=['GET'])
+async def get_planeta_by_id(planeta_id):
+    return await conditional(Planetas, lambda: load_entity(Planetas, planeta_id, "Planeta"))
+
+
+application = app
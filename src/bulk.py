@@ -0,0 +1,289 @@
+"""
+Inserción masiva de filas: valida cada elemento por separado y guarda los válidos en una sola transacción.
+"""
+import os
+from collections import deque
+from flask import jsonify, request
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from utils import APIException
+from models import db
+import counters
+import jobs
+
+# Filas por sentencia INSERT (executemany / VALUES múltiples) dentro de la transacción
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+# Número máximo de elementos aceptados en una sola petición
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 50000))
+
+
+def chunked(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def validate_item(model, fields, item):
+    """
+    Valida un elemento contra las columnas del modelo (tipo, longitud y obligatoriedad).
+
+    Returns:
+        tuple: La fila lista para insertar y None, o None y el mensaje de error.
+    """
+    if not isinstance(item, dict):
+        return None, "Item must be an object"
+    row = {}
+    for name in fields:
+        column = model.__table__.columns[name]
+        value = item.get(name)
+        if value is None:
+            if not column.nullable:
+                return None, "Missing field '{}'".format(name)
+            row[name] = None
+            continue
+        expected = column.type.python_type
+        # bool es subclase de int, así que se comprueba el tipo exacto
+        if type(value) is not expected:
+            return None, "Field '{}' must be of type {}".format(name, expected.__name__)
+        length = getattr(column.type, "length", None)
+        if length is not None and len(value) > length:
+            return None, "Field '{}' is longer than {} characters".format(name, length)
+        row[name] = value
+    return row, None
+
+
+def existing_values(column, values, exclude_deleted=False):
+    # Consulta por lotes qué valores ya existen en la columna (claves foráneas o columnas únicas)
+    found = set()
+    values = list(values)
+    statement = db.select(column)
+    if exclude_deleted and "deleted_at" in column.table.c:
+        # Una clave foránea no puede apuntar a una fila con borrado lógico (pendiente de purga)
+        statement = statement.where(column.table.c.deleted_at.is_(None))
+    for chunk in chunked(values):
+        found.update(db.session.execute(statement.where(column.in_(chunk))).scalars())
+    return found
+
+
+def unique_key(model):
+    # Columnas del índice único compuesto del modelo (por ejemplo usuario + personaje en los favoritos)
+    for index in model.__table__.indexes:
+        if index.unique and len(index.columns) > 1:
+            return tuple(column.name for column in index.columns)
+    return None
+
+
+def insert_ignoring_duplicates(model, key):
+    """
+    INSERT que no falla si la fila ya existe (ON CONFLICT DO NOTHING / INSERT IGNORE).
+
+    Donde la base de datos lo permite devuelve el id y la clave de las filas realmente insertadas.
+
+    Returns:
+        tuple: La sentencia y si tiene RETURNING.
+    """
+    dialect = db.session.get_bind().dialect
+    if dialect.name == "postgresql":
+        statement = postgresql.insert(model).on_conflict_do_nothing(index_elements=list(key))
+    elif dialect.name == "sqlite":
+        statement = sqlite.insert(model).on_conflict_do_nothing(index_elements=list(key))
+    else:
+        statement = insert(model).prefix_with("IGNORE")
+    if dialect.insert_returning:
+        statement = statement.returning(model.id, *[model.__table__.c[name] for name in key])
+    return statement, dialect.insert_returning
+
+
+def existing_ids(model, key, keys):
+    # Ids de las filas que ya existen para las claves dadas (una consulta por bloque)
+    first = model.__table__.c[key[0]]
+    columns = [model.id] + [model.__table__.c[name] for name in key]
+    wanted = set(keys)
+    found = {}
+    for chunk in chunked(list({value[0] for value in wanted})):
+        for row in db.session.execute(select(*columns).where(first.in_(chunk))):
+            if tuple(row[1:]) in wanted:
+                found[tuple(row[1:])] = row[0]
+    return found
+
+
+def insert_deduplicated(model, key, candidates, progress=None):
+    """
+    Inserta con semántica de upsert "no hacer nada": un favorito repetido (en el lote o ya guardado)
+    no crea otra fila y se devuelve con el id existente y `"duplicate": True`.
+    """
+    statement, returning = insert_ignoring_duplicates(model, key)
+    ids, inserted_by = {}, {}
+    for chunk in chunked(candidates):
+        pending = {}
+        for index, row in chunk:
+            row_key = tuple(row[name] for name in key)
+            if row_key not in ids and row_key not in pending:
+                pending[row_key] = (index, row)
+        if not returning:
+            # Sin RETURNING no se sabe qué filas ignoró el INSERT: las que ya existían se descartan antes
+            # y el resto se inserta de una en una, comprobando en rowcount si la fila entró de verdad
+            ids.update(existing_ids(model, key, list(pending)))
+            for row_key, (index, row) in pending.items():
+                if row_key not in ids and db.session.execute(statement.values(**row)).rowcount == 1:
+                    inserted_by[row_key] = index
+            pending = {row_key: value for row_key, value in pending.items() if row_key not in ids}
+        elif pending:
+            for row in db.session.execute(statement, [row for _, row in pending.values()]):
+                row_key = tuple(row[1:])
+                ids[row_key] = row[0]
+                inserted_by[row_key] = pending[row_key][0]
+        missing = [row_key for row_key in pending if row_key not in ids]
+        if missing:
+            # Filas que ya existían (o, sin RETURNING, las recién insertadas): se buscan sus ids
+            ids.update(existing_ids(model, key, missing))
+        if progress is not None:
+            progress(chunk[-1][0] + 1)
+
+    created = []
+    for index, row in candidates:
+        row_key = tuple(row[name] for name in key)
+        entry = {"index": index, "id": ids[row_key]}
+        if inserted_by.get(row_key) != index:
+            entry["duplicate"] = True
+        created.append(entry)
+    return created
+
+
+def insert_returning_ids(model, fields, candidates, progress=None):
+    """
+    Inserta las filas con un INSERT de varias filas por bloque y devuelve el id de cada elemento.
+
+    El orden de RETURNING no está garantizado y pedirlo (`sort_by_parameter_order`) hace que SQLAlchemy
+    inserte fila a fila en SQLite, así que se devuelven también las columnas insertadas y cada id se
+    asigna a un elemento con los mismos valores (los elementos idénticos son intercambiables).
+    Sin RETURNING (MySQL) se inserta fila a fila para conocer cada id.
+    """
+    created = []
+    if not db.session.get_bind().dialect.insert_returning:
+        for index, row in candidates:
+            new_id = db.session.execute(insert(model).values(**row)).inserted_primary_key[0]
+            created.append({"index": index, "id": new_id})
+            if progress is not None and len(created) % BULK_CHUNK_SIZE == 0:
+                progress(index + 1)
+        return created
+
+    statement = insert(model).returning(model.id, *[model.__table__.c[name] for name in fields])
+    for chunk in chunked(candidates):
+        waiting = {}
+        for index, row in chunk:
+            waiting.setdefault(tuple(row[name] for name in fields), deque()).append(index)
+        found = {}
+        for new_id, *values in db.session.execute(statement, [row for _, row in chunk]):
+            found[waiting[tuple(values)].popleft()] = new_id
+        created.extend({"index": index, "id": found[index]} for index, _ in chunk)
+        if progress is not None:
+            progress(chunk[-1][0] + 1)
+    return created
+
+
+def bulk_insert(model, fields, items, progress=None):
+    """
+    Inserta una lista de elementos en bloques dentro de una única transacción.
+
+    Los elementos inválidos (campos que faltan, tipos incorrectos, claves foráneas inexistentes
+    o valores únicos repetidos) se descartan y se reportan por índice sin abortar el lote.
+
+    Args:
+        model (db.Model): Modelo donde se insertan las filas.
+        fields (list): Columnas que se leen de cada elemento.
+        items (list): Elementos recibidos en la petición.
+        progress (callable): Recibe los elementos procesados tras cada bloque insertado (latido de los trabajos).
+
+    Returns:
+        tuple: Lista de {"index", "id"} creados y lista de {"index", "error"} rechazados.
+    """
+    if len(items) > BULK_MAX_ITEMS:
+        raise APIException("Too many items (max {})".format(BULK_MAX_ITEMS), status_code=413)
+
+    candidates, errors = [], []
+    for index, item in enumerate(items):
+        row, error = validate_item(model, fields, item)
+        if error is None:
+            candidates.append((index, row))
+        else:
+            errors.append({"index": index, "error": error})
+
+    # Comprobaciones que harían fallar la transacción completa: se hacen antes con una consulta por columna
+    for name in fields:
+        column = model.__table__.columns[name]
+        checks = []
+        for foreign_key in column.foreign_keys:
+            checks.append((foreign_key.column, False))
+        if column.unique:
+            checks.append((getattr(model, name), True))
+        for target, must_be_new in checks:
+            found = existing_values(target, {row[name] for _, row in candidates if row[name] is not None},
+                                    exclude_deleted=not must_be_new)
+            seen = set()
+            valid = []
+            for index, row in candidates:
+                value = row[name]
+                if must_be_new and (value in found or value in seen):
+                    errors.append({"index": index, "error": "Field '{}' must be unique".format(name)})
+                elif not must_be_new and value is not None and value not in found:
+                    errors.append({"index": index, "error": "Field '{}' references a missing row".format(name)})
+                else:
+                    seen.add(value)
+                    valid.append((index, row))
+            candidates = valid
+
+    key = unique_key(model)
+    if key is not None:
+        created = insert_deduplicated(model, key, candidates, progress)
+        # Contadores de favoritos: solo las filas insertadas de verdad, no los duplicados
+        counters.added(model, [row for (_, row), entry in zip(candidates, created) if not entry.get("duplicate")])
+    else:
+        created = insert_returning_ids(model, fields, candidates, progress)
+    db.session.commit()
+
+    errors.sort(key=lambda error: error["index"])
+    return created, errors
+
+
+def insert_one(model, fields, item):
+    """
+    Inserta un único elemento con las mismas validaciones que la inserción masiva.
+
+    Returns:
+        int: Id de la fila creada (o de la ya existente si el modelo tiene clave única y estaba repetida).
+    """
+    created, errors = bulk_insert(model, fields, [item])
+    if errors:
+        raise APIException(errors[0]["error"], status_code=400)
+    return created[0]["id"]
+
+
+@jobs.job("import")
+def import_job(payload, progress):
+    # Inserción masiva encolada con ?async=1; una sola transacción, como en la petición síncrona.
+    # Cada bloque insertado manda un latido: si no, una importación más larga que JOB_TIMEOUT_SECONDS se daría
+    # por abandonada y otro worker la repetiría (el catálogo no tiene clave única: duplicaría las filas).
+    # En SQLite no hace falta ni se puede: la transacción bloquea las escrituras de las demás conexiones,
+    # tanto el latido como el claim() de otro worker.
+    model = next(mapper.class_ for mapper in db.Model.registry.mappers if mapper.class_.__tablename__ == payload["table"])
+    progress(0, len(payload["items"]))
+    heartbeat = progress if db.engine.dialect.name != "sqlite" else None
+    created, errors = bulk_insert(model, payload["fields"], payload["items"], heartbeat)
+    progress(len(payload["items"]))
+    return {"created": created, "errors": errors}
+
+
+def bulk_response(model, fields, items):
+    if request.args.get("async") in ("1", "true"):
+        # Lotes grandes: se encolan y se responde al momento con el id del trabajo (GET /jobs/<id>)
+        if len(items) > BULK_MAX_ITEMS:
+            raise APIException("Too many items (max {})".format(BULK_MAX_ITEMS), status_code=413)
+        job_id = jobs.enqueue("import", {"table": model.__tablename__, "fields": fields, "items": items})
+        return jsonify({"msg": "Accepted", "id": job_id}), 202
+    created, errors = bulk_insert(model, fields, items)
+    response_body = {
+        "msg": "Ok",
+        "created": created,  # Índice de cada elemento insertado y su nuevo id
+        "errors": errors  # Elementos rechazados con el motivo
+    }
+    return jsonify(response_body), 200
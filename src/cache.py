@@ -0,0 +1,287 @@
+"""
+Caché de las entidades y páginas serializadas del catálogo.
+
+Hay dos backends con la misma interfaz:
+- `MemoryCache`: LRU con caducidad dentro de cada proceso (por defecto).
+- `RedisCache`: caché compartida por todos los workers y nodos a través de Redis.
+
+Con `CACHE_BACKEND=memory` y `CACHE_REDIS_URL` configurada, cada worker mantiene su caché local
+pero publica y escucha las invalidaciones en un canal de Redis, así ningún worker sirve datos viejos.
+"""
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import tracking
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory | redis | none
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+# Número máximo de entradas (solo memoria) y segundos de vida de cada una
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", 4096))
+CACHE_TTL = float(os.getenv("CACHE_TTL", 300))
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") not in ("0", "false")
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "swapi:cache:")
+INVALIDATION_CHANNEL = CACHE_PREFIX + "invalidate"
+
+
+class BaseCache:
+    """
+    Interfaz común de los backends: `get`, `set`, `invalidate` y `stats`.
+    """
+
+    def get(self, namespace, key):
+        raise NotImplementedError
+
+    def set(self, namespace, key, value):
+        raise NotImplementedError
+
+    def invalidate(self, namespace):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def get_or_set(self, namespace, key, loader):
+        # Lectura a través de la caché: si no está, se calcula con `loader` y se guarda (salvo None)
+        value = self.get(namespace, key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(namespace, key, value)
+        return value
+
+
+class MemoryCache(BaseCache):
+    """
+    Caché LRU acotada con TTL, agrupada por espacio de nombres (normalmente el nombre de la tabla).
+
+    Args:
+        maxsize (int): Número máximo de entradas antes de expulsar la menos usada.
+        ttl (float): Segundos que una entrada se considera válida.
+        bus (InvalidationBus): Canal opcional para compartir invalidaciones con otros procesos.
+    """
+
+    def __init__(self, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL, bus=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.bus = bus
+        self._entries = OrderedDict()  # (namespace, key) -> (caduca_en, valor)
+        self._namespaces = {}  # namespace -> conjunto de claves, para invalidar sin recorrer toda la caché
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, namespace, key):
+        if self.bus is not None:
+            self.bus.subscribe(self)
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove((namespace, key))
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            self._entries[(namespace, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((namespace, key))
+            self._namespaces.setdefault(namespace, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, namespace):
+        self.invalidate_local(namespace)
+        if self.bus is not None:
+            self.bus.publish(namespace)
+
+    def invalidate_local(self, namespace):
+        with self._lock:
+            for key in self._namespaces.pop(namespace, ()):
+                self._entries.pop((namespace, key), None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "shared_invalidation": self.bus is not None,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, entry_key):
+        self._entries.pop(entry_key, None)
+        keys = self._namespaces.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key[1])
+
+
+class RedisCache(BaseCache):
+    """
+    Caché compartida en Redis. Los valores se guardan como JSON con caducidad y cada espacio
+    de nombres lleva un conjunto con sus claves para poder invalidarlo entero.
+
+    Args:
+        client: Cliente con la API de redis-py (sirve también `fakeredis.FakeRedis`).
+        ttl (float): Segundos de vida de cada entrada.
+        prefix (str): Prefijo de todas las claves en Redis.
+    """
+
+    def __init__(self, client, ttl=CACHE_TTL, prefix=CACHE_PREFIX):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, namespace, key):
+        return "{}{}:{}".format(self.prefix, namespace, key)
+
+    def _members(self, namespace):
+        return "{}{}:__keys__".format(self.prefix, namespace)
+
+    def get(self, namespace, key):
+        raw = self.client.get(self._key(namespace, key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, namespace, key, value):
+        ttl = max(int(self.ttl), 1)
+        pipe = self.client.pipeline()
+        pipe.set(self._key(namespace, key), json.dumps(value), ex=ttl)
+        pipe.sadd(self._members(namespace), key)
+        pipe.expire(self._members(namespace), ttl)
+        pipe.execute()
+
+    def invalidate(self, namespace):
+        members = self._members(namespace)
+        keys = [self._key(namespace, key.decode() if isinstance(key, bytes) else key)
+                for key in self.client.smembers(members)]
+        pipe = self.client.pipeline()
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(members)
+        # Aviso para los workers que tengan además una caché local
+        pipe.publish(INVALIDATION_CHANNEL, namespace)
+        pipe.execute()
+        self.invalidations += 1
+
+    def stats(self):
+        # Contadores de este proceso; las expulsiones las gestiona Redis (maxmemory-policy, INFO stats)
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+class InvalidationBus:
+    """
+    Publica las invalidaciones en un canal de Redis y las aplica a la caché local de este proceso.
+
+    El hilo que escucha el canal se arranca en el primer uso dentro de cada proceso, de modo que
+    funciona igual con los workers de gunicorn creados con fork.
+    """
+
+    def __init__(self, client, channel=INVALIDATION_CHANNEL):
+        self.client = client
+        self.channel = channel
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, namespace):
+        self.client.publish(self.channel, namespace)
+
+    def subscribe(self, cache):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+            thread = threading.Thread(target=self._listen, args=(pubsub, cache), daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _listen(self, pubsub, cache):
+        for message in pubsub.listen():
+            namespace = message["data"]
+            if isinstance(namespace, bytes):
+                namespace = namespace.decode()
+            cache.invalidate_local(namespace)
+
+
+class NullCache(BaseCache):
+    # Se usa cuando la caché está deshabilitada: siempre consulta la base de datos
+    def get(self, namespace, key):
+        return None
+
+    def set(self, namespace, key, value):
+        pass
+
+    def invalidate(self, namespace):
+        pass
+
+    def stats(self):
+        return {"backend": "disabled"}
+
+
+def redis_client(url):
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError("The 'redis' package is required when CACHE_REDIS_URL is set")
+    return redis.Redis.from_url(url)
+
+
+def create_cache(backend=CACHE_BACKEND, redis_url=CACHE_REDIS_URL):
+    """
+    Crea el backend de caché configurado por las variables de entorno.
+    """
+    if not CACHE_ENABLED or backend == "none":
+        return NullCache()
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("CACHE_BACKEND=redis requires CACHE_REDIS_URL")
+        return RedisCache(redis_client(redis_url))
+    if backend == "memory":
+        bus = InvalidationBus(redis_client(redis_url)) if redis_url else None
+        return MemoryCache(bus=bus)
+    raise RuntimeError("Unknown CACHE_BACKEND '{}'".format(backend))
+
+
+cache = create_cache()
+
+
+@tracking.on_commit
+def invalidate_tables(tables):
+    # Cada commit que toca una tabla descarta todas las entradas cacheadas de esa tabla (en todos los workers)
+    for table in tables:
+        cache.invalidate(table)
@@ -0,0 +1,163 @@
+"""
+Registro de cambios para la sincronización incremental (`GET /changes?since=<seq>&limit=`).
+
+Cada insert, update o delete en las tablas de `TRACKED` añade una fila a `changes` mediante triggers de
+la base de datos, así se registran todos los caminos de escritura: el ORM, las inserciones masivas, los
+UPDATE del borrado lógico, la purga y el panel de administración. Los UPDATE que solo tocan columnas que
+no devuelve la API (por ejemplo `favorite_count`) no generan cambio.
+
+Un cliente guarda el `next_since` de la última respuesta y pide solo lo posterior: recibe un "upsert"
+con los datos actuales de cada fila cambiada o un "delete" (tombstone) si se borró. Sin `since` la
+respuesta no trae cambios, solo el `next_since` actual, para empezar a seguir los cambios tras una
+descarga completa.
+
+Los triggers los crea la migración en las bases de datos existentes y `db.create_all()` en las nuevas
+(PostgreSQL y SQLite).
+"""
+from sqlalchemy import select, func, or_, event, text
+
+from models import (
+    db, not_deleted, Changes, Users, Personajes, Vehiculos, Planetas,
+    Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas
+)
+from utils import APIException, parse_limit
+
+TRACKED = {model.__tablename__: model for model in (
+    Users, Personajes, Vehiculos, Planetas, Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas
+)}
+
+
+def fields(model):
+    # Columnas que devuelve la API para el modelo (todas, en los favoritos)
+    return getattr(model, "serialized_fields", None) or tuple(column.name for column in model.__table__.columns)
+
+
+def watched_columns(model):
+    # Columnas cuyo UPDATE es un cambio visible para los clientes
+    names = [name for name in fields(model) if name != "id"]
+    if "deleted_at" in model.__table__.c:
+        names.append("deleted_at")
+    return names
+
+
+def trigger_statements(dialect):
+    """
+    Sentencias que crean los triggers del registro de cambios (PostgreSQL o SQLite).
+    """
+    statements = []
+    if dialect == "postgresql":
+        # to_jsonb(...) ->> 'deleted_at' es NULL en las tablas sin borrado lógico
+        statements.append(
+            "CREATE OR REPLACE FUNCTION record_change() RETURNS trigger AS $$ BEGIN "
+            "IF TG_OP = 'DELETE' THEN "
+            "IF to_jsonb(OLD) ->> 'deleted_at' IS NULL THEN "
+            "INSERT INTO changes (table_name, row_id, op, txid, changed_at) "
+            "VALUES (TG_TABLE_NAME, OLD.id, 'delete', txid_current(), now() AT TIME ZONE 'utc'); "
+            "END IF; RETURN OLD; END IF; "
+            "INSERT INTO changes (table_name, row_id, op, txid, changed_at) "
+            "VALUES (TG_TABLE_NAME, NEW.id, CASE WHEN to_jsonb(NEW) ->> 'deleted_at' IS NULL THEN 'upsert' ELSE 'delete' END, "
+            "txid_current(), now() AT TIME ZONE 'utc'); "
+            "RETURN NEW; END $$ LANGUAGE plpgsql"
+        )
+        for table, model in TRACKED.items():
+            statements.append("DROP TRIGGER IF EXISTS changes_{table} ON {table}".format(table=table))
+            statements.append(
+                "CREATE TRIGGER changes_{table} AFTER INSERT OR UPDATE OF {columns} OR DELETE ON {table} "
+                "FOR EACH ROW EXECUTE PROCEDURE record_change()".format(table=table, columns=", ".join(watched_columns(model)))
+            )
+    elif dialect == "sqlite":
+        for table, model in TRACKED.items():
+            soft_delete = "deleted_at" in model.__table__.c
+            op = "CASE WHEN NEW.deleted_at IS NULL THEN 'upsert' ELSE 'delete' END" if soft_delete else "'upsert'"
+            insert = ("INSERT INTO changes (table_name, row_id, op, changed_at) "
+                      "VALUES ('{table}', {{row}}.id, {{op}}, CURRENT_TIMESTAMP); END").format(table=table)
+            statements.append("CREATE TRIGGER IF NOT EXISTS changes_{table}_ai AFTER INSERT ON {table} BEGIN ".format(table=table)
+                              + insert.format(row="NEW", op=op))
+            statements.append("CREATE TRIGGER IF NOT EXISTS changes_{table}_au AFTER UPDATE OF {columns} ON {table} BEGIN ".format(
+                table=table, columns=", ".join(watched_columns(model))) + insert.format(row="NEW", op=op))
+            # Una fila ya marcada con deleted_at ya tiene su tombstone: la purga no repite el cambio
+            statements.append("CREATE TRIGGER IF NOT EXISTS changes_{table}_ad AFTER DELETE ON {table} {when}BEGIN ".format(
+                table=table, when="WHEN OLD.deleted_at IS NULL " if soft_delete else "") + insert.format(row="OLD", op="'delete'"))
+    return statements
+
+
+@event.listens_for(db.metadata, "after_create")
+def create_triggers(metadata, connection, **kwargs):
+    for statement in trigger_statements(connection.dialect.name):
+        connection.execute(text(statement))
+
+
+def parse_since(args):
+    value = args.get("since")
+    if value is None:
+        return None
+    try:
+        since = int(value)
+    except ValueError:
+        raise APIException("Invalid since (use a sequence number)", status_code=400)
+    if since < 0:
+        raise APIException("Invalid since (use a sequence number)", status_code=400)
+    return since
+
+
+def changes_statement(since, limit):
+    table = Changes.__table__
+    statement = select(table.c.seq, table.c.table_name, table.c.row_id, table.c.op).where(table.c.seq > since)
+    if db.session.get_bind().dialect.name == "postgresql":
+        # Las secuencias se asignan antes del commit: no se pasa de un cambio cuya transacción
+        # (o una anterior) sigue abierta, o el cliente se saltaría ese cambio al confirmarse
+        pending = select(func.min(table.c.seq)).where(
+            table.c.seq > since, table.c.txid >= func.txid_snapshot_xmin(func.txid_current_snapshot())
+        ).scalar_subquery()
+        statement = statement.where(or_(pending.is_(None), table.c.seq < pending))
+    return statement.order_by(table.c.seq).limit(limit + 1)
+
+
+def current_rows(model, ids):
+    """
+    Returns:
+        dict: Id -> datos actuales de las filas que siguen existiendo (sin borrado lógico).
+    """
+    names = fields(model)
+    statement = select(*[model.__table__.c[name] for name in names]).where(model.__table__.c.id.in_(ids))
+    if "deleted_at" in model.__table__.c:
+        statement = statement.where(not_deleted(model))
+    return {row[0]: dict(zip(names, row)) for row in db.session.execute(statement)}
+
+
+def changes_since(args):
+    """
+    Cambios posteriores a `since`, con un solo resultado por fila (el último) y los datos actuales.
+
+    Returns:
+        tuple: Lista de cambios, siguiente `since` y si quedan más cambios por leer.
+    """
+    since = parse_since(args)
+    if since is None:
+        latest = db.session.execute(select(func.max(Changes.seq))).scalar()
+        return [], latest or 0, False
+    limit = parse_limit(args)
+    rows = db.session.execute(changes_statement(since, limit)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for seq, table_name, row_id, op in rows:
+        latest.pop((table_name, row_id), None)  # El orden final es el del último cambio de cada fila
+        latest[(table_name, row_id)] = (seq, op)
+
+    ids_by_table = {}
+    for (table_name, row_id), (_, op) in latest.items():
+        if op == "upsert":
+            ids_by_table.setdefault(table_name, []).append(row_id)
+    data = {table_name: current_rows(TRACKED[table_name], ids) for table_name, ids in ids_by_table.items()}
+
+    changes = []
+    for (table_name, row_id), (seq, op) in latest.items():
+        row = data.get(table_name, {}).get(row_id)
+        if row is None:
+            # Borrada (o marcada) después del cambio: el cliente la elimina
+            changes.append({"seq": seq, "table": table_name, "id": row_id, "op": "delete"})
+        else:
+            changes.append({"seq": seq, "table": table_name, "id": row_id, "op": "upsert", "data": row})
+    return changes, rows[-1][0] if rows else since, has_more
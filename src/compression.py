@@ -0,0 +1,110 @@
+"""
+Compresión negociada de las respuestas JSON (brotli si está instalado y el cliente lo acepta, si no gzip).
+
+Variables:
+    COMPRESSION_ENABLED       Activa la compresión (1)
+    COMPRESSION_MIN_SIZE      Bytes mínimos del cuerpo para comprimirlo (1024); por debajo no compensa
+    COMPRESSION_GZIP_LEVEL    Nivel de gzip, 1-9 (6)
+    COMPRESSION_BROTLI_LEVEL  Nivel de brotli, 0-11 (5)
+    COMPRESSION_CACHE_SIZE    Cuerpos comprimidos que se guardan por proceso (512)
+
+Las respuestas con ETag (las del catálogo, ver `versioning.conditional`) guardan el cuerpo comprimido
+con el ETag como clave: el ETag cambia con cada escritura en la tabla, así que no hay que invalidar nada
+y los aciertos repetidos no vuelven a comprimir.
+"""
+import os
+import gzip
+
+from flask import request
+
+from cache import MemoryCache, CACHE_TTL
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") not in ("0", "false")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_LEVEL = int(os.getenv("COMPRESSION_BROTLI_LEVEL", 5))
+COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", 512))
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain"}
+
+# (codificación, ETag:ruta) -> cuerpo comprimido
+compressed_bodies = MemoryCache(maxsize=COMPRESSION_CACHE_SIZE, ttl=CACHE_TTL)
+
+
+def available_encodings():
+    # Por orden de preferencia del servidor
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(req):
+    """
+    Codificación a usar según Accept-Encoding (la de mayor calidad; a igualdad, brotli), o None.
+    """
+    if not COMPRESSION_ENABLED:
+        return None
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = req.accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESSION_BROTLI_LEVEL if level is None else level)
+    # mtime=0 para que el mismo cuerpo produzca siempre los mismos bytes
+    return gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+def eligible(response):
+    # Respuestas que se pueden comprimir: completas, sin codificar y de un tipo de texto
+    return not (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES)
+
+
+def will_compress(response, encoding):
+    """
+    Si `compress_response` comprimirá esta respuesta con `encoding` (para elegir el ETag de lo que se envía).
+    """
+    return (COMPRESSION_ENABLED and encoding is not None and eligible(response)
+            and len(response.get_data()) >= COMPRESSION_MIN_SIZE)
+
+
+def compress_response(response):
+    if not eligible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+
+    etag, _ = response.get_etag()
+    if etag is None:
+        body = compress(data, encoding)
+    else:
+        key = "{}:{}".format(etag, request.full_path)
+        body = compressed_bodies.get(encoding, key)
+        if body is None:
+            body = compress(data, encoding)
+            compressed_bodies.set(encoding, key, body)
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    """
+    Registra la compresión de las respuestas. Debe llamarse después de `instrumentation` y `metrics`:
+    Flask ejecuta los `after_request` en orden inverso, así el tiempo de compresión entra en sus medidas.
+    """
+    if COMPRESSION_ENABLED:
+        app.after_request(compress_response)
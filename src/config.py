@@ -0,0 +1,117 @@
+"""
+Opciones del motor de base de datos (pool de conexiones y tiempo máximo por sentencia) leídas del entorno.
+
+Variables:
+    DB_POOL_MODE            "queue" (pool propio, por defecto) o "null" (sin pool, para pgbouncer en modo transacción)
+    DB_POOL_SIZE            Conexiones que se mantienen abiertas por proceso (5)
+    DB_MAX_OVERFLOW         Conexiones extra permitidas en picos (10)
+    DB_POOL_TIMEOUT         Segundos de espera por una conexión libre antes de fallar (30)
+    DB_POOL_RECYCLE         Segundos tras los que se recicla una conexión (1800, -1 para no reciclar)
+    DB_POOL_PRE_PING        Comprueba la conexión antes de usarla (1)
+    DB_STATEMENT_TIMEOUT_MS Tiempo máximo de cada sentencia en milisegundos (0 = sin límite)
+"""
+import os
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+# Driver asíncrono de cada motor para el modo ASGI (src/asgi.py)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def database_uri(env=os.environ):
+    """
+    URL de la base de datos de DATABASE_URL (con el esquema que espera SQLAlchemy) o un SQLite local.
+    """
+    url = env.get("DATABASE_URL")
+    if url is None:
+        return "sqlite:////tmp/test.db"
+    return url.replace("postgres://", "postgresql://")
+
+
+def env_int(env, name, default):
+    return int(env.get(name, default))
+
+
+def env_flag(env, name, default):
+    return env.get(name, default) not in ("0", "false")
+
+
+def engine_options(url, env=os.environ):
+    """
+    Construye SQLALCHEMY_ENGINE_OPTIONS para la URL dada.
+
+    Args:
+        url (str): URL de conexión (SQLALCHEMY_DATABASE_URI).
+        env (dict): Variables de entorno de donde leer la configuración.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    options = {"pool_pre_ping": env_flag(env, "DB_POOL_PRE_PING", "1")}
+
+    # SQLite en memoria usa un pool de una sola conexión: no admite opciones de tamaño
+    in_memory = backend == "sqlite" and url.database in (None, "", ":memory:")
+    if env.get("DB_POOL_MODE", "queue") == "null":
+        # Cada petición abre y cierra su conexión; el pooling lo hace un pooler externo (pgbouncer)
+        options["poolclass"] = NullPool
+    elif not in_memory:
+        options["pool_size"] = env_int(env, "DB_POOL_SIZE", 5)
+        options["max_overflow"] = env_int(env, "DB_MAX_OVERFLOW", 10)
+        options["pool_timeout"] = env_int(env, "DB_POOL_TIMEOUT", 30)
+        options["pool_recycle"] = env_int(env, "DB_POOL_RECYCLE", 1800)
+
+    timeout_ms = env_int(env, "DB_STATEMENT_TIMEOUT_MS", 0)
+    if timeout_ms > 0:
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+        elif backend == "postgresql":
+            # Parámetro de arranque: se aplica a toda la sesión sin una consulta extra por conexión
+            options["connect_args"] = {"options": "-c statement_timeout={}".format(timeout_ms)}
+        elif backend == "mysql":
+            options["connect_args"] = {"init_command": "SET SESSION max_execution_time={}".format(timeout_ms)}
+    return options
+
+
+def async_url(url):
+    """
+    Misma URL de conexión con el driver asíncrono del motor (para `create_async_engine`).
+    """
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError("No async driver for {}".format(url.get_backend_name()))
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def dispose_engines(app):
+    """
+    Descarta, sin cerrarlas, las conexiones heredadas del proceso padre (gunicorn con preload_app):
+    cada worker abre las suyas en lugar de compartir sockets con los demás.
+    """
+    with app.app_context():
+        engines = list(app.extensions["sqlalchemy"].engines.values())
+    router = app.extensions.get("replicas")
+    if router is not None:
+        engines += router.engines
+    for engine in engines:
+        engine.dispose(close=False)
+
+
+def pool_status(engine):
+    """
+    Estado actual del pool de conexiones de un motor.
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    timeout = getattr(pool, "timeout", None)
+    if callable(timeout):
+        status["timeout"] = timeout()
+    return status
@@ -0,0 +1,133 @@
+"""
+Contadores de favoritos desnormalizados (`favorite_count`) en personajes, vehículos y planetas.
+
+Se actualizan en la misma transacción que crea o purga los favoritos (`bulk.bulk_insert` y
+`purge.delete_batch`) con incrementos `favorite_count = favorite_count + n`, que son seguros con
+escrituras concurrentes. Los endpoints `/personajes/top`, `/vehiculos/top` y `/planetas/top` leen
+solo las N primeras filas del índice sobre el contador, sin `GROUP BY` sobre los favoritos.
+
+Las escrituras van contra la tabla (no el modelo ORM): el contador no forma parte de `serialize()`,
+así que no invalida la caché ni cambia el ETag del catálogo.
+
+Si el contador se desvía (restauraciones, cambios manuales en la base de datos), se recalcula con:
+
+    $ flask reconcile-counts
+    $ curl -X POST /jobs/reconcile-counts
+"""
+import os
+from collections import Counter, defaultdict
+
+import click
+from sqlalchemy import select, update, func
+
+from models import (
+    db, not_deleted, Personajes, Vehiculos, Planetas,
+    Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas
+)
+import jobs
+
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", 1000))
+
+# Tabla de favoritos -> (columna que referencia la entidad, modelo con el contador)
+COUNTED = {
+    Favoritos_personajes: ("personajes_relacion", Personajes),
+    Favoritos_vehiculos: ("vehiculos_relacion", Vehiculos),
+    Favoritos_planetas: ("planetas_relacion", Planetas),
+}
+
+
+def adjust(favorite_model, rows, sign):
+    """
+    Suma (`sign=1`) o resta (`sign=-1`) al contador de cada entidad los favoritos de `rows`,
+    dentro de la transacción en curso. No hace nada si `favorite_model` no es una tabla de favoritos.
+    """
+    if favorite_model not in COUNTED:
+        return
+    column, model = COUNTED[favorite_model]
+    table = model.__table__
+    # Una sentencia por cada incremento distinto (normalmente 1) y los ids en orden para no bloquearse mutuamente
+    ids_by_delta = defaultdict(list)
+    for entity_id, count in Counter(row[column] for row in rows).items():
+        ids_by_delta[count * sign].append(entity_id)
+    for delta, ids in sorted(ids_by_delta.items()):
+        db.session.execute(
+            update(table).where(table.c.id.in_(sorted(ids))).values(favorite_count=table.c.favorite_count + delta)
+        )
+
+
+def added(favorite_model, rows):
+    adjust(favorite_model, rows, 1)
+
+
+def removed(favorite_model, rows):
+    adjust(favorite_model, rows, -1)
+
+
+def top(model, limit):
+    """
+    Entidades con más favoritos (las N primeras del índice sobre `favorite_count`).
+
+    Returns:
+        list: Diccionarios con las columnas de `serialize()` más `favorite_count`.
+    """
+    fields = model.serialized_fields + ("favorite_count",)
+    columns = [model.__table__.c[name] for name in fields]
+    rows = db.session.execute(
+        select(*columns).where(not_deleted(model))
+        .order_by(model.favorite_count.desc(), model.id).limit(limit)
+    ).all()
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def reconcile(batch_size=RECONCILE_BATCH_SIZE, progress=None):
+    """
+    Recalcula `favorite_count` desde las tablas de favoritos, por rangos de ids y con un commit por rango.
+
+    Returns:
+        dict: Filas corregidas por tabla.
+    """
+    fixed, done = {}, 0
+    for favorite_model, (column, model) in COUNTED.items():
+        table = model.__table__
+        actual = (
+            select(func.count()).select_from(favorite_model.__table__)
+            .where(favorite_model.__table__.c[column] == table.c.id)
+            .scalar_subquery()
+        )
+        last_id = 0
+        fixed[table.name] = 0
+        while True:
+            ids = db.session.execute(
+                select(table.c.id).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                db.session.rollback()
+                break
+            result = db.session.execute(
+                update(table).where(table.c.id.between(ids[0], ids[-1]), table.c.favorite_count != actual)
+                .values(favorite_count=actual)
+            )
+            db.session.commit()
+            fixed[table.name] += result.rowcount
+            last_id = ids[-1]
+            done += len(ids)
+            if progress is not None:
+                progress(done)
+    return fixed
+
+
+@jobs.job("reconcile_counts")
+def reconcile_job(payload, progress):
+    return reconcile(payload.get("batch_size", RECONCILE_BATCH_SIZE), progress=progress)
+
+
+def init_app(app):
+    """
+    Registra el comando `flask reconcile-counts`.
+    """
+    @app.cli.command("reconcile-counts")
+    @click.option("--batch-size", type=int, default=RECONCILE_BATCH_SIZE, show_default=True, help="Filas por transacción")
+    def reconcile_command(batch_size):
+        """Recalcula favorite_count desde las tablas de favoritos."""
+        fixed = reconcile(batch_size)
+        click.echo(", ".join("{} {} fixed".format(count, table) for table, count in fixed.items()))
@@ -0,0 +1,110 @@
+"""
+Instrumentación opcional por petición: número de sentencias SQL, tiempo total en base de datos,
+tiempo de serialización y las sentencias más lentas.
+
+Se activa con `SQL_INSTRUMENTATION=1`. Los datos se devuelven en la cabecera `Server-Timing`
+y en una línea de log JSON por petición; las sentencias que superan `SLOW_QUERY_MS` se registran
+además como aviso.
+"""
+import os
+import json
+import time
+import logging
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "0") not in ("0", "false")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+# Cuántas de las sentencias más lentas se guardan por petición
+SLOWEST_KEPT = int(os.getenv("SLOWEST_QUERIES_KEPT", 3))
+
+logger = logging.getLogger("swapi.instrumentation")
+
+
+def current_stats():
+    if has_request_context():
+        return g.get("request_stats")
+    return None
+
+
+def record_serialization(seconds):
+    stats = current_stats()
+    if stats is not None:
+        stats["serialization"] += seconds
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning(json.dumps({"event": "slow_query", "duration_ms": round(elapsed_ms, 3), "statement": statement}))
+    stats = current_stats()
+    if stats is None:
+        return
+    stats["queries"] += 1
+    stats["db"] += elapsed
+    slowest = stats["slowest"]
+    slowest.append((elapsed_ms, statement))
+    slowest.sort(key=lambda item: item[0], reverse=True)
+    del slowest[SLOWEST_KEPT:]
+
+
+def handle_error(exception_context):
+    # Si la sentencia falla no llega after_cursor_execute: se descarta su marca de inicio
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def start_request():
+    g.request_stats = {"started": time.perf_counter(), "queries": 0, "db": 0.0, "serialization": 0.0, "slowest": []}
+
+
+def finish_request(response):
+    stats = g.pop("request_stats", None)
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - stats["started"]) * 1000
+    db_ms = stats["db"] * 1000
+    serialization_ms = stats["serialization"] * 1000
+    response.headers.add("Server-Timing", 'db;dur={:.2f};desc="{} queries"'.format(db_ms, stats["queries"]))
+    response.headers.add("Server-Timing", "ser;dur={:.2f}".format(serialization_ms))
+    response.headers.add("Server-Timing", "total;dur={:.2f}".format(total_ms))
+    logger.info(json.dumps({
+        "event": "request",
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "duration_ms": round(total_ms, 3),
+        "db_ms": round(db_ms, 3),
+        "queries": stats["queries"],
+        "serialization_ms": round(serialization_ms, 3),
+        "slowest": [{"duration_ms": round(duration, 3), "statement": statement[:300]}
+                    for duration, statement in stats["slowest"]],
+    }))
+    return response
+
+
+def init_app(app, enabled=SQL_INSTRUMENTATION):
+    """
+    Conecta los eventos de SQLAlchemy (para todos los motores) y los hooks de petición de Flask.
+    """
+    if not enabled:
+        return
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(Engine, "handle_error", handle_error)
+    app.before_request(start_request)
+    app.after_request(finish_request)
@@ -0,0 +1,154 @@
+"""
+Cola de trabajos en segundo plano guardada en la propia base de datos (tabla `jobs`, sin broker externo).
+
+Los endpoints encolan con `enqueue()` y responden 202 con el id; un proceso aparte (`src/worker.py`)
+reclama los trabajos pendientes de uno en uno y ejecuta la función registrada para su tipo con `@job`.
+El estado y el progreso se consultan en `GET /jobs/<id>`.
+
+La tabla se escribe con conexiones propias del motor (no con `db.session`): así el progreso se guarda
+aunque el trabajo tenga su transacción abierta y la cola no invalida cachés ni versiones del catálogo.
+
+Variables:
+    JOB_POLL_INTERVAL    Segundos de espera del worker cuando no hay trabajos (1)
+    JOB_TIMEOUT_SECONDS  Sin latido durante este tiempo un trabajo en curso se da por abandonado (900)
+    JOB_MAX_ATTEMPTS     Veces que se reintenta un trabajo abandonado antes de marcarlo como fallido (3)
+"""
+import os
+import time
+import socket
+import logging
+from datetime import timedelta
+
+from sqlalchemy import select, insert, update, or_, and_
+
+from models import db, Jobs
+from utils import APIException
+from versioning import utcnow
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1))
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", 900))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+logger = logging.getLogger("swapi.jobs")
+
+# Tipo de trabajo -> función(payload, progress) que devuelve el resultado (serializable a JSON)
+HANDLERS = {}
+
+
+def job(kind):
+    """
+    Registra la función que ejecuta los trabajos de tipo `kind`. Se usa como decorador.
+
+    La función recibe el payload y `progress(done, total=None)` para informar del avance.
+    """
+    def decorator(handler):
+        HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+def enqueue(kind, payload=None):
+    """
+    Returns:
+        int: Id del trabajo encolado.
+    """
+    if kind not in HANDLERS:
+        raise APIException("Unknown job kind '{}'".format(kind), status_code=404)
+    now = utcnow()
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            insert(Jobs.__table__).values(kind=kind, status="queued", payload=payload, progress=0, attempts=0,
+                                          created_at=now, updated_at=now)
+        )
+    return result.inserted_primary_key[0]
+
+
+def get_job(job_id):
+    job_row = db.session.get(Jobs, job_id)
+    if job_row is None:
+        raise APIException("Job not found", status_code=404)
+    return job_row.serialize()
+
+
+def set_fields(job_id, **values):
+    values["updated_at"] = utcnow()
+    with db.engine.begin() as connection:
+        connection.execute(update(Jobs.__table__).where(Jobs.__table__.c.id == job_id).values(**values))
+
+
+def claim():
+    """
+    Reclama el trabajo pendiente más antiguo (o uno abandonado por un worker caído).
+
+    Returns:
+        int: Id del trabajo reclamado, o None si no hay ninguno.
+    """
+    table = Jobs.__table__
+    now = utcnow()
+    stale = and_(table.c.status == "running", table.c.updated_at < now - timedelta(seconds=JOB_TIMEOUT_SECONDS))
+    runnable = or_(table.c.status == "queued", and_(stale, table.c.attempts < JOB_MAX_ATTEMPTS))
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(table).where(stale, table.c.attempts >= JOB_MAX_ATTEMPTS)
+            .values(status="failed", error="Timed out", finished_at=now, updated_at=now)
+        )
+        statement = select(table.c.id).where(runnable).order_by(table.c.id).limit(1)
+        if connection.dialect.name == "postgresql":
+            # Varios workers a la vez: cada uno salta las filas que otro está reclamando
+            statement = statement.with_for_update(skip_locked=True)
+        job_id = connection.execute(statement).scalar()
+        if job_id is None:
+            return None
+        # La condición se repite en el UPDATE: si otro worker lo reclamó antes, no se actualiza ninguna fila
+        claimed = connection.execute(
+            update(table).where(table.c.id == job_id, runnable)
+            .values(status="running", started_at=now, updated_at=now, attempts=table.c.attempts + 1)
+        ).rowcount
+    return job_id if claimed else None
+
+
+def run(job_id):
+    """
+    Ejecuta un trabajo reclamado y guarda su resultado o su error.
+    """
+    job_row = db.session.get(Jobs, job_id)
+    kind, payload = job_row.kind, job_row.payload or {}
+    db.session.rollback()  # No se mantiene abierta la transacción de la lectura mientras dura el trabajo
+
+    def progress(done, total=None):
+        values = {"progress": done}
+        if total is not None:
+            values["total"] = total
+        set_fields(job_id, **values)
+
+    started = time.perf_counter()
+    try:
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            raise LookupError("Unknown job kind '{}'".format(kind))
+        result = handler(payload, progress)
+    except Exception as error:
+        db.session.rollback()
+        logger.exception("job %s (%s) failed", job_id, kind)
+        set_fields(job_id, status="failed", error="{}: {}".format(type(error).__name__, error), finished_at=utcnow())
+    else:
+        set_fields(job_id, status="done", result=result, finished_at=utcnow())
+        logger.info("job %s (%s) done in %.2fs", job_id, kind, time.perf_counter() - started)
+    finally:
+        db.session.remove()
+
+
+def run_worker(app, once=False, poll_interval=JOB_POLL_INTERVAL):
+    """
+    Bucle del worker: reclama y ejecuta trabajos hasta que se interrumpe (o hasta vaciar la cola con `once`).
+    """
+    logger.info("worker %s:%s polling every %ss", socket.gethostname(), os.getpid(), poll_interval)
+    while True:
+        with app.app_context():
+            job_id = claim()
+            if job_id is not None:
+                run(job_id)
+                continue
+        if once:
+            return
+        time.sleep(poll_interval)
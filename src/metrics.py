@@ -0,0 +1,121 @@
+"""
+Métricas en formato de exposición de Prometheus en `/metrics`.
+
+Bajo gunicorn, `gunicorn.conf.py` define `PROMETHEUS_MULTIPROC_DIR` antes de cargar la aplicación:
+cada worker escribe sus valores en ficheros mmap de ese directorio y `/metrics` agrega los de
+todos los workers (vivos y terminados), así cualquier worker devuelve el total del servicio.
+"""
+import os
+import time
+
+from flask import g, request, Response
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, multiprocess
+except ImportError:  # prometheus-client es opcional: sin él /metrics responde 501
+    prometheus_client = None
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false")
+
+if prometheus_client is not None:
+    REQUESTS = Counter("http_requests_total", "HTTP requests processed", ["method", "endpoint", "status"])
+    LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "endpoint"],
+                        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+    IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being processed", ["method", "endpoint"],
+                        multiprocess_mode="livesum")
+    API_ERRORS = Counter("api_exceptions_total", "APIException responses by status code", ["status"])
+    POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out from the SQLAlchemy pool")
+    POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", multiprocess_mode="livesum")
+    POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections opened above pool_size", multiprocess_mode="livesum")
+    POOL_SIZE = Gauge("db_pool_size", "Configured pool size", multiprocess_mode="livesum")
+
+
+def endpoint_label():
+    # Se usa la plantilla de la ruta (no la URL) para que el número de series esté acotado
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_endpoint = endpoint_label()
+    IN_PROGRESS.labels(request.method, g.metrics_endpoint).inc()
+
+
+def finish_request(response):
+    observe(response.status_code)
+    return response
+
+
+def teardown_request(exception):
+    # Las excepciones no controladas no pasan por after_request: se cuentan como 500
+    if "metrics_started" in g:
+        observe(500)
+
+
+def observe(status):
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    endpoint = g.pop("metrics_endpoint")
+    LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - started)
+    REQUESTS.labels(request.method, endpoint, str(status)).inc()
+    IN_PROGRESS.labels(request.method, endpoint).dec()
+
+
+def record_api_error(status_code):
+    if prometheus_client is not None and METRICS_ENABLED:
+        API_ERRORS.labels(str(status_code)).inc()
+
+
+def instrument_pool(engine):
+    """
+    Sigue el uso del pool de conexiones de un motor (conexiones en uso, desbordamiento y tamaño).
+    """
+    pool = engine.pool
+
+    def update_pool_gauges():
+        if hasattr(pool, "overflow"):
+            POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc()
+        POOL_CHECKED_OUT.inc()
+        update_pool_gauges()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec()
+        update_pool_gauges()
+
+    if hasattr(pool, "size"):
+        POOL_SIZE.set(pool.size())
+
+
+def render():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(prometheus_client.generate_latest(registry), mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_app(app, engine):
+    """
+    Registra los hooks de petición, los eventos del pool y la ruta `/metrics`.
+    """
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        if prometheus_client is None or not METRICS_ENABLED:
+            return Response("prometheus-client is not installed or METRICS_ENABLED=0\n", status=501, mimetype="text/plain")
+        return render()
+
+    if prometheus_client is None or not METRICS_ENABLED:
+        return
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.teardown_request(teardown_request)
+    instrument_pool(engine)
@@ -1,8 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Column, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, selectinload
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # Las lecturas GET pueden ir a una réplica (ver replicas.py)
+
+def not_deleted(model):
+    # Condición de las lecturas en los modelos con borrado lógico: las filas marcadas con deleted_at no existen para la API
+    return model.__table__.c.deleted_at.is_(None)
 
 # Modelo para la tabla de Usuarios
 class Users(db.Model):
@@ -10,6 +15,12 @@ class Users(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)  # Columna para el email, único y obligatorio
     password = db.Column(db.String(80), unique=False, nullable=False)  # Columna para la contraseña, obligatoria
     is_active = db.Column(db.Boolean(), unique=False, nullable=False)  # Columna para indicar si el usuario está activo
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Fecha (UTC) del borrado lógico; la purga borra la fila después
+    serialized_fields = ("id", "email")  # Columnas que devuelve serialize(), usadas por el camino rápido de serialización
+    # Favoritos del usuario; el borrado en cascada lo hace la base de datos (ondelete='CASCADE')
+    favoritos_personajes = relationship("Favoritos_personajes", back_populates="usuario", passive_deletes=True)
+    favoritos_vehiculos = relationship("Favoritos_vehiculos", back_populates="usuario", passive_deletes=True)
+    favoritos_planetas = relationship("Favoritos_planetas", back_populates="usuario", passive_deletes=True)
 
     def __repr__(self):
         return '<Users %r>' % self.username  # Representación textual del objeto Users
@@ -21,12 +32,28 @@ class Users(db.Model):
             # no serializamos la contraseña por motivos de seguridad
         }
 
+    def serialize_favorites(self):
+        # Requiere que las relaciones de favoritos estén precargadas (ver FAVORITES_LOADER_OPTIONS).
+        # Los favoritos de entidades borradas (pendientes de purga) no se devuelven
+        return {
+            "id": self.id,
+            "email": self.email,
+            "favoritos": {
+                "personajes": [favorito.personaje.serialize() for favorito in self.favoritos_personajes if favorito.personaje.deleted_at is None],
+                "vehiculos": [favorito.vehiculo.serialize() for favorito in self.favoritos_vehiculos if favorito.vehiculo.deleted_at is None],
+                "planetas": [favorito.planeta.serialize() for favorito in self.favoritos_planetas if favorito.planeta.deleted_at is None],
+            }
+        }
+
 # Modelo para la tabla de Personajes
 class Personajes(db.Model):
     id = db.Column(db.Integer, primary_key=True, nullable=False)  # Clave primaria de tipo entero
     name = db.Column(db.String(250), nullable=False)  # Columna para el nombre del personaje, obligatoria
     eye_color = db.Column(db.String(250), nullable=False)  # Columna para el color de ojos del personaje, obligatoria
     hair_color = db.Column(db.String(250), nullable=False)  # Columna para el color de cabello del personaje, obligatoria
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Fecha (UTC) del borrado lógico; la purga borra la fila después
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)  # Favoritos que la referencian (ver counters.py)
+    serialized_fields = ("id", "name", "eye_color", "hair_color")  # Columnas que devuelve serialize()
 
     def serialize(self):
         return {
@@ -41,6 +68,9 @@ class Vehiculos(db.Model):
     id = db.Column(db.Integer, primary_key=True, nullable=False)  # Clave primaria de tipo entero
     name = db.Column(db.String(250), nullable=False)  # Columna para el nombre del vehículo, obligatoria
     model = db.Column(db.String(250), nullable=False)  # Columna para el modelo del vehículo, obligatoria
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Fecha (UTC) del borrado lógico; la purga borra la fila después
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)  # Favoritos que la referencian (ver counters.py)
+    serialized_fields = ("id", "name", "model")  # Columnas que devuelve serialize()
 
     def serialize(self):
         return {
@@ -54,6 +84,9 @@ class Planetas(db.Model):
     id = db.Column(db.Integer, primary_key=True, nullable=False)  # Clave primaria de tipo entero
     name = db.Column(db.String(250), nullable=False)  # Columna para el nombre del planeta, obligatoria
     population = db.Column(db.String(250), nullable=False)  # Columna para la población del planeta, obligatoria
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Fecha (UTC) del borrado lógico; la purga borra la fila después
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", index=True)  # Favoritos que la referencian (ver counters.py)
+    serialized_fields = ("id", "name", "population")  # Columnas que devuelve serialize()
 
     def serialize(self):
         return {
@@ -64,9 +97,17 @@ class Planetas(db.Model):
 
 # Modelo para la tabla de Favoritos de Personajes (relación muchos a muchos entre Usuarios y Personajes)
 class Favoritos_personajes(db.Model):
+    __table_args__ = (
+        # Un mismo favorito solo puede existir una vez; el índice también sirve para buscar los favoritos de un usuario
+        db.Index("uq_favoritos_personajes_usuario_personaje", "usuarios_relacion", "personajes_relacion", unique=True),
+        # Búsqueda inversa (quién tiene este personaje como favorito) y borrados en cascada
+        db.Index("ix_favoritos_personajes_personaje", "personajes_relacion"),
+    )
     id = db.Column(db.Integer, primary_key=True, nullable=False)  # Clave primaria de tipo entero
     personajes_relacion = db.Column(db.Integer, db.ForeignKey(Personajes.id, ondelete='CASCADE'), nullable=False)  # Clave foránea a Personajes
     usuarios_relacion = db.Column(db.Integer, db.ForeignKey(Users.id, ondelete='CASCADE'), nullable=False)  # Clave foránea a Usuarios
+    personaje = relationship(Personajes)  # Personaje marcado como favorito
+    usuario = relationship(Users, back_populates="favoritos_personajes")  # Usuario dueño del favorito
 
     def serialize(self):
         return {
@@ -77,9 +118,17 @@ class Favoritos_personajes(db.Model):
 
 # Modelo para la tabla de Favoritos de Vehículos (relación muchos a muchos entre Usuarios y Vehículos)
 class Favoritos_vehiculos(db.Model):
+    __table_args__ = (
+        # Un mismo favorito solo puede existir una vez; el índice también sirve para buscar los favoritos de un usuario
+        db.Index("uq_favoritos_vehiculos_usuario_vehiculo", "usuarios_relacion", "vehiculos_relacion", unique=True),
+        # Búsqueda inversa (quién tiene este vehiculo como favorito) y borrados en cascada
+        db.Index("ix_favoritos_vehiculos_vehiculo", "vehiculos_relacion"),
+    )
     id = db.Column(db.Integer, primary_key=True, nullable=False)  # Clave primaria de tipo entero
     vehiculos_relacion = db.Column(db.Integer, db.ForeignKey(Vehiculos.id, ondelete='CASCADE'), nullable=False)  # Clave foránea a Vehiculos
     usuarios_relacion = db.Column(db.Integer, db.ForeignKey(Users.id, ondelete='CASCADE'), nullable=False)  # Clave foránea a Usuarios
+    vehiculo = relationship(Vehiculos)  # Vehículo marcado como favorito
+    usuario = relationship(Users, back_populates="favoritos_vehiculos")  # Usuario dueño del favorito
 
     def serialize(self):
         return {
@@ -90,9 +139,17 @@ class Favoritos_vehiculos(db.Model):
 
 # Modelo para la tabla de Favoritos de Planetas (relación muchos a muchos entre Usuarios y Planetas)
 class Favoritos_planetas(db.Model):
+    __table_args__ = (
+        # Un mismo favorito solo puede existir una vez; el índice también sirve para buscar los favoritos de un usuario
+        db.Index("uq_favoritos_planetas_usuario_planeta", "usuarios_relacion", "planetas_relacion", unique=True),
+        # Búsqueda inversa (quién tiene este planeta como favorito) y borrados en cascada
+        db.Index("ix_favoritos_planetas_planeta", "planetas_relacion"),
+    )
     id = db.Column(db.Integer, primary_key=True, nullable=False)  # Clave primaria de tipo entero
     planetas_relacion = db.Column(db.Integer, db.ForeignKey(Planetas.id, ondelete='CASCADE'), nullable=False)  # Clave foránea a Planetas
     usuarios_relacion = db.Column(db.Integer, db.ForeignKey(Users.id, ondelete='CASCADE'), nullable=False)  # Clave foránea a Usuarios
+    planeta = relationship(Planetas)  # Planeta marcado como favorito
+    usuario = relationship(Users, back_populates="favoritos_planetas")  # Usuario dueño del favorito
 
     def serialize(self):
         return {
@@ -100,3 +157,68 @@ class Favoritos_planetas(db.Model):
             "planetas_relacion": self.planetas_relacion,
             "usuarios_relacion": self.usuarios_relacion
         }
+
+# Modelo para la tabla de versiones: un contador por tabla que sube en cada commit que la modifica
+class TableVersions(db.Model):
+    table_name = db.Column(db.String(80), primary_key=True)  # Nombre de la tabla versionada
+    version = db.Column(db.Integer, nullable=False, default=0)  # Contador que se incrementa en cada escritura
+    updated_at = db.Column(db.DateTime, nullable=False)  # Fecha (UTC) de la última escritura
+
+    def serialize(self):
+        return {
+            "table_name": self.table_name,
+            "version": self.version,
+            "updated_at": self.updated_at,
+        }
+
+# Modelo para la cola de trabajos en segundo plano (ver src/jobs.py y src/worker.py)
+class Jobs(db.Model):
+    __table_args__ = (
+        # El worker busca el trabajo pendiente más antiguo por estado
+        db.Index("ix_jobs_status_id", "status", "id"),
+    )
+    id = db.Column(db.Integer, primary_key=True)  # Clave primaria de tipo entero (id que recibe el cliente)
+    kind = db.Column(db.String(80), nullable=False)  # Tipo de trabajo (nombre registrado en jobs.HANDLERS)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued | running | done | failed
+    payload = db.Column(db.JSON, nullable=True)  # Parámetros del trabajo
+    result = db.Column(db.JSON, nullable=True)  # Resultado cuando termina bien
+    error = db.Column(db.Text, nullable=True)  # Mensaje de error cuando falla
+    progress = db.Column(db.Integer, nullable=False, default=0)  # Unidades procesadas hasta ahora
+    total = db.Column(db.Integer, nullable=True)  # Unidades totales, si se conocen
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # Veces que un worker lo ha empezado
+    created_at = db.Column(db.DateTime, nullable=False)  # Fechas en UTC
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False)  # Último latido del worker (progreso o cambio de estado)
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "total": self.total,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+# Modelo para el registro de cambios que consume /changes (lo escriben triggers de la base de datos, ver src/changes.py)
+class Changes(db.Model):
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True, autoincrement=True)  # Número de secuencia creciente (cursor de sincronización)
+    table_name = db.Column(db.String(80), nullable=False)  # Tabla de la fila modificada
+    row_id = db.Column(db.Integer, nullable=False)  # Id de la fila modificada
+    op = db.Column(db.String(10), nullable=False)  # upsert | delete
+    txid = db.Column(db.BigInteger, nullable=True)  # Transacción que hizo el cambio (solo PostgreSQL)
+    changed_at = db.Column(db.DateTime, nullable=False)  # Fecha (UTC) del cambio
+
+# Opciones de carga para resolver todos los favoritos de un lote de usuarios en un número fijo de consultas
+# (una para los usuarios y una por cada tipo de favorito, con la entidad unida en la misma consulta)
+FAVORITES_LOADER_OPTIONS = (
+    selectinload(Users.favoritos_personajes).joinedload(Favoritos_personajes.personaje),
+    selectinload(Users.favoritos_vehiculos).joinedload(Favoritos_vehiculos.vehiculo),
+    selectinload(Users.favoritos_planetas).joinedload(Favoritos_planetas.planeta),
+)
@@ -0,0 +1,123 @@
+"""
+Purga de las filas con borrado lógico (`deleted_at`) de usuarios, personajes, vehículos y planetas.
+
+Los DELETE de la API solo marcan la fila. La purga borra después, en lotes de `PURGE_BATCH_SIZE` filas
+y con un commit por lote, primero los favoritos que la referencian y al final la propia fila (cuyo
+`ON DELETE CASCADE` ya no tiene nada que recorrer), así ninguna transacción bloquea muchas filas.
+
+    $ flask purge                          # una pasada completa
+    $ flask purge --loop --interval 30     # proceso en segundo plano que purga cada 30 segundos
+    $ curl -X POST /jobs/purge             # como trabajo de la cola (src/worker.py)
+
+Variables:
+    PURGE_BATCH_SIZE     Filas borradas por transacción (500)
+    PURGE_GRACE_SECONDS  Antigüedad mínima del borrado lógico antes de purgar (0)
+"""
+import os
+import time
+from datetime import timedelta
+
+import click
+from sqlalchemy import select, delete
+
+from models import (
+    db, Users, Personajes, Vehiculos, Planetas,
+    Favoritos_personajes, Favoritos_vehiculos, Favoritos_planetas
+)
+from versioning import utcnow
+import counters
+import jobs
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", 500))
+PURGE_GRACE_SECONDS = int(os.getenv("PURGE_GRACE_SECONDS", 0))
+
+# Modelo con borrado lógico -> columnas de las tablas de favoritos que lo referencian
+DEPENDENTS = [
+    (Personajes, [Favoritos_personajes.personajes_relacion]),
+    (Vehiculos, [Favoritos_vehiculos.vehiculos_relacion]),
+    (Planetas, [Favoritos_planetas.planetas_relacion]),
+    (Users, [Favoritos_personajes.usuarios_relacion, Favoritos_vehiculos.usuarios_relacion,
+             Favoritos_planetas.usuarios_relacion]),
+]
+
+
+def delete_batch(model, condition, batch_size):
+    """
+    Borra como mucho `batch_size` filas de `model` que cumplen `condition` en su propia transacción.
+
+    Returns:
+        int: Filas borradas (0 cuando ya no queda ninguna).
+    """
+    counted = counters.COUNTED.get(model)
+    columns = [model.id] + ([model.__table__.c[counted[0]]] if counted else [])
+    rows = db.session.execute(select(*columns).where(condition).limit(batch_size)).mappings().all()
+    if not rows:
+        db.session.rollback()
+        return 0
+    ids = [row["id"] for row in rows]
+    db.session.execute(delete(model).where(model.id.in_(ids)), execution_options={"synchronize_session": False})
+    # Los favoritos borrados dejan de contar en la misma transacción
+    counters.removed(model, rows)
+    db.session.commit()
+    return len(ids)
+
+
+def purge(batch_size=PURGE_BATCH_SIZE, grace_seconds=PURGE_GRACE_SECONDS, max_batches=None, progress=None):
+    """
+    Borra los favoritos de las filas marcadas como borradas y después esas filas.
+
+    Args:
+        batch_size (int): Filas por transacción.
+        grace_seconds (int): Solo se purgan los borrados lógicos más antiguos que esto.
+        max_batches (int): Límite de lotes en esta pasada (None = hasta terminar).
+        progress (callable): Recibe el total de filas borradas tras cada lote (trabajos en segundo plano).
+
+    Returns:
+        dict: Filas borradas por tabla.
+    """
+    cutoff = utcnow() - timedelta(seconds=grace_seconds)
+    counts, batches = {}, 0
+    for model, columns in DEPENDENTS:
+        doomed = select(model.id).where(model.deleted_at.is_not(None), model.deleted_at <= cutoff)
+        # Primero los favoritos y al final la fila: si la purga se corta, lo que queda sigue oculto
+        for column in columns + [model.id]:
+            target = column.class_
+            while max_batches is None or batches < max_batches:
+                deleted = delete_batch(target, column.in_(doomed), batch_size)
+                if not deleted:
+                    break
+                batches += 1
+                counts[target.__tablename__] = counts.get(target.__tablename__, 0) + deleted
+                if progress is not None:
+                    progress(sum(counts.values()))
+    return counts
+
+
+@jobs.job("purge")
+def purge_job(payload, progress):
+    return purge(payload.get("batch_size", PURGE_BATCH_SIZE), payload.get("grace_seconds", PURGE_GRACE_SECONDS),
+                 progress=progress)
+
+
+def init_app(app):
+    """
+    Registra el comando `flask purge`.
+    """
+    @app.cli.command("purge")
+    @click.option("--batch-size", type=int, default=PURGE_BATCH_SIZE, show_default=True, help="Filas por transacción")
+    @click.option("--grace-seconds", type=int, default=PURGE_GRACE_SECONDS, show_default=True,
+                  help="Antigüedad mínima del borrado lógico")
+    @click.option("--max-batches", type=int, default=None, help="Lotes como máximo por pasada")
+    @click.option("--loop", is_flag=True, help="Sigue purgando cada --interval segundos")
+    @click.option("--interval", type=float, default=30, show_default=True)
+    def purge_command(batch_size, grace_seconds, max_batches, loop, interval):
+        """Borra en lotes las filas con borrado lógico y sus favoritos."""
+        while True:
+            started = time.perf_counter()
+            counts = purge(batch_size, grace_seconds, max_batches)
+            summary = ", ".join("{} {}".format(count, table) for table, count in sorted(counts.items()))
+            click.echo("purged {} in {:.2f}s".format(summary or "nothing", time.perf_counter() - started))
+            if not loop:
+                break
+            db.session.remove()
+            time.sleep(interval)
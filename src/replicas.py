@@ -0,0 +1,157 @@
+"""
+Lecturas en réplicas de la base de datos.
+
+Con `DATABASE_REPLICA_URLS` (URLs separadas por comas) las peticiones GET/HEAD usan una réplica, elegida
+por turnos entre las que están sanas; el resto de métodos (POST, DELETE, ...) y la sesión que hace
+flush van siempre al primario. Sin la variable todo sigue usando solo `DATABASE_URL`.
+
+Read-your-writes: tras una escritura la respuesta lleva la cookie `db_primary_until` y ese cliente lee
+del primario durante `REPLICA_STICKY_SECONDS`, hasta que las réplicas hayan recibido su cambio. La
+cabecera `X-Read-Primary: 1` fuerza lo mismo en una petición concreta.
+
+Si una réplica falla con un error de conexión, la petición se repite en la siguiente réplica sana (o en
+el primario) y la réplica no vuelve a elegirse hasta pasados `REPLICA_RETRY_SECONDS`.
+
+Variables:
+    DATABASE_REPLICA_URLS   Réplicas de solo lectura (vacío = sin réplicas)
+    REPLICA_STICKY_SECONDS  Segundos que un cliente lee del primario tras escribir (5)
+    REPLICA_RETRY_SECONDS   Segundos que una réplica caída queda fuera del reparto (10)
+
+Para probarlo en local basta una copia del fichero SQLite abierta en solo lectura:
+
+    $ cp /tmp/test.db /tmp/replica.db
+    $ DATABASE_REPLICA_URLS="sqlite:///file:/tmp/replica.db?mode=ro&uri=true" flask run
+
+Las réplicas pueden ir por detrás del primario. La caché no mezcla sus datos con los del primario: las
+claves llevan la versión de la tabla leída en la misma base de datos (ver `versioning.request_version`),
+así que lo que guarda una réplica retrasada solo responde a su versión antigua y no a quien lee del primario.
+"""
+import os
+import time
+import itertools
+
+from flask import g, request, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from config import engine_options
+
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", 10))
+
+STICKY_COOKIE = "db_primary_until"
+READ_METHODS = ("GET", "HEAD")
+# SQLSTATE de una sentencia cancelada por statement_timeout: la réplica está sana, la consulta es lenta
+QUERY_CANCELED = "57014"
+
+
+def replica_urls(env=os.environ):
+    return [url.strip().replace("postgres://", "postgresql://")
+            for url in env.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+
+class ReplicaRouter:
+    """
+    Reparto por turnos entre las réplicas, saltando las marcadas como caídas.
+    """
+
+    def __init__(self, engines, retry_seconds=REPLICA_RETRY_SECONDS):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self.down_until = {}
+        self._turn = itertools.count()
+
+    def pick(self):
+        """
+        Returns:
+            Engine: Siguiente réplica sana, o None si no queda ninguna (se lee del primario).
+        """
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._turn) % len(self.engines)]
+            if self.down_until.get(engine, 0) <= now:
+                return engine
+        return None
+
+    def mark_down(self, engine):
+        self.down_until[engine] = time.monotonic() + self.retry_seconds
+
+    def status(self):
+        now = time.monotonic()
+        return [{
+            "url": engine.url.render_as_string(hide_password=True),
+            "healthy": self.down_until.get(engine, 0) <= now,
+        } for engine in self.engines]
+
+
+class RoutingSession(Session):
+    """
+    Sesión de Flask-SQLAlchemy que lee de la réplica elegida para la petición (ver `route_request`).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            engine = g.get("db_replica")
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def reads_primary():
+    if request.method not in READ_METHODS or request.headers.get("X-Read-Primary") == "1":
+        return True
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def route_request():
+    router = current_app.extensions["replicas"]
+    g.db_replica = None if reads_primary() else router.pick()
+
+
+def stick_to_primary(response):
+    if request.method not in READ_METHODS and response.status_code < 400:
+        until = time.time() + REPLICA_STICKY_SECONDS
+        response.set_cookie(STICKY_COOKIE, "{:.3f}".format(until), max_age=REPLICA_STICKY_SECONDS, httponly=True)
+    return response
+
+
+def failover(error):
+    """
+    Repite la petición en otra réplica (o en el primario) cuando la réplica elegida falla.
+    """
+    router = current_app.extensions["replicas"]
+    session = current_app.extensions["sqlalchemy"].session
+    while True:
+        if g.get("db_replica") is None or getattr(error.orig, "pgcode", None) == QUERY_CANCELED:
+            raise error
+        current_app.logger.warning("replica %s failed, retrying: %s", g.db_replica.url, error.orig)
+        router.mark_down(g.db_replica)
+        session.rollback()
+        g.db_replica = router.pick()
+        try:
+            return current_app.dispatch_request()
+        except OperationalError as retry_error:
+            error = retry_error
+        except Exception as other:
+            # 404, 400... del reintento: los gestiona su propio errorhandler
+            return current_app.handle_user_exception(other)
+
+
+def init_app(app, urls=None):
+    """
+    Crea los motores de las réplicas y registra el enrutado de las peticiones. Sin réplicas no hace nada.
+    """
+    urls = replica_urls() if urls is None else urls
+    if not urls:
+        return None
+    engines = [create_engine(make_url(url), **engine_options(url)) for url in urls]
+    router = app.extensions["replicas"] = ReplicaRouter(engines)
+    app.before_request(route_request)
+    app.after_request(stick_to_primary)
+    app.register_error_handler(OperationalError, failover)
+    return router
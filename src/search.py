@@ -0,0 +1,246 @@
+"""
+Búsqueda por nombre en personajes, vehículos y planetas (`/search?q=` y `?name=` en cada colección).
+
+Según la base de datos:
+- PostgreSQL: `to_tsvector('simple', name)` (palabras por prefijo) más trigramas (`pg_trgm`) para
+  subcadenas, ordenado por `ts_rank` + `similarity`. Los índices GIN los crea la migración.
+- SQLite: tabla FTS5 `<tabla>_fts` (contenido externo, mantenida con triggers) ordenada por `bm25`.
+  La crea la migración o `flask search-index`.
+- Cualquier otra (o SQLite sin FTS5): `LIKE '%q%'` sin índice, con los nombres que empiezan por `q` primero.
+
+Los resultados se paginan por posición (cursor opaco) hasta `SEARCH_MAX_OFFSET`.
+"""
+import os
+import re
+
+import click
+from sqlalchemy import select, func, literal, literal_column, or_, case, union_all, table, column, text
+
+from models import db, not_deleted, Personajes, Vehiculos, Planetas
+from utils import APIException, parse_limit, encode_cursor, decode_cursor
+
+# Recursos que se pueden buscar por nombre (clave: valor de ?types=)
+SEARCHABLE = {
+    "personajes": Personajes,
+    "vehiculos": Vehiculos,
+    "planetas": Planetas,
+}
+# Posición máxima a la que se puede paginar: más allá el ranking deja de ser útil y el coste crece
+SEARCH_MAX_OFFSET = int(os.getenv("SEARCH_MAX_OFFSET", 1000))
+# Configuración de texto de PostgreSQL: 'simple' no aplica stemming (los nombres propios no son palabras)
+TS_CONFIG = literal_column("'simple'::regconfig")
+
+# Tablas FTS5 ya encontradas (solo se recuerda que existen: si falta se vuelve a comprobar, así
+# `flask search-index` se nota sin reiniciar los workers)
+_fts_tables = set()
+
+
+def terms(q):
+    # Palabras de la búsqueda; cualquier otro carácter se ignora (así no hay que escapar la sintaxis de FTS)
+    return re.findall(r"\w+", q or "")
+
+
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fts_table(model):
+    return table(model.__tablename__ + "_fts", column("rowid"), column("name"))
+
+
+def fts_statement(model):
+    # Existe la tabla FTS5 del modelo (SQLite)
+    return text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name").bindparams(
+        name=model.__tablename__ + "_fts")
+
+
+def has_fts(model):
+    name = model.__tablename__ + "_fts"
+    if name not in _fts_tables:
+        if db.session.execute(fts_statement(model)).first() is None:
+            return False
+        _fts_tables.add(name)
+    return True
+
+
+def ranked(model, q, words, columns, dialect=None, fts=None):
+    """
+    Consulta de las filas de `model` que coinciden con la búsqueda, con una columna `score`
+    (mayor es mejor) además de `columns`.
+
+    `dialect` y `fts` (si existe la tabla FTS5) se consultan con `db` si no se indican.
+    """
+    return matching(model, q, words, columns, dialect, fts).where(not_deleted(model))
+
+
+def matching(model, q, words, columns, dialect=None, fts=None):
+    dialect = dialect or db.engine.dialect.name
+    name = model.__table__.c.name
+    contains = "%" + escape_like(q) + "%"
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery(TS_CONFIG, " & ".join(word + ":*" for word in words))
+        tsvector = func.to_tsvector(TS_CONFIG, name)
+        score = (func.ts_rank(tsvector, tsquery) + func.similarity(name, q)).label("score")
+        # ILIKE '%q%' usa el índice de trigramas; @@ el de tsvector
+        return select(*columns, score).where(or_(tsvector.op("@@")(tsquery), name.ilike(contains, escape="\\")))
+    if dialect == "sqlite" and (has_fts(model) if fts is None else fts):
+        fts = fts_table(model)
+        match = " ".join('"{}"*'.format(word) for word in words)
+        # bm25 es menor cuanto mejor: se invierte para ordenar todos los motores igual
+        score = (-func.bm25(literal_column(fts.name))).label("score")
+        return (
+            select(*columns, score)
+            .join_from(model.__table__, fts, fts.c.rowid == model.__table__.c.id)
+            .where(literal_column(fts.name).op("MATCH")(match))
+        )
+    prefix = escape_like(q) + "%"
+    score = case((name.like(prefix, escape="\\"), 1), else_=0).label("score")
+    return select(*columns, score).where(name.like(contains, escape="\\"))
+
+
+def parse_query(args, key):
+    q = (args.get(key) or "").strip()
+    words = terms(q)
+    if not words:
+        raise APIException("Invalid search query", status_code=400)
+    return q, words
+
+
+def ranked_page(statement, args):
+    """
+    Ordena por puntuación (y id para desempatar) y limita a la página pedida (una fila extra para saber si hay más).
+
+    Returns:
+        tuple: La sentencia, el tamaño de página y la posición de la primera fila.
+    """
+    limit = parse_limit(args)
+    after = args.get("after")
+    offset = decode_cursor(after, kind="pos") if after else 0
+    if offset < 0 or offset >= SEARCH_MAX_OFFSET:
+        raise APIException("Invalid cursor", status_code=400)
+    limit = min(limit, SEARCH_MAX_OFFSET - offset)
+    statement = statement.order_by(literal_column("score").desc(), literal_column("id")).offset(offset).limit(limit + 1)
+    return statement, limit, offset
+
+
+def ranked_result(rows, limit, offset):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if offset + limit < SEARCH_MAX_OFFSET:
+            next_cursor = encode_cursor(offset + limit, kind="pos")
+    return rows, next_cursor
+
+
+def paginate_ranked(statement, args):
+    """
+    Una página de la búsqueda con su cursor por posición.
+    """
+    statement, limit, offset = ranked_page(statement, args)
+    return ranked_result(db.session.execute(statement).mappings().all(), limit, offset)
+
+
+def search_statement(model, fields, args, dialect=None, fts=None):
+    """
+    SELECT de una página del filtro `?name=` (ver `ranked_page`), sin ejecutarlo.
+    """
+    q, words = parse_query(args, "name")
+    columns = [model.__table__.c[field] for field in fields]
+    return ranked_page(ranked(model, q, words, columns, dialect, fts), args)
+
+
+def search_result(rows, fields, limit, offset):
+    rows, next_cursor = ranked_result(rows, limit, offset)
+    return [{field: row[field] for field in fields} for row in rows], next_cursor
+
+
+def search_model(model, fields, args):
+    """
+    Filtro `?name=` de una colección: las columnas de `fields` ordenadas por relevancia.
+
+    Returns:
+        tuple: Lista de diccionarios y el cursor de la siguiente página (o None).
+    """
+    statement, limit, offset = search_statement(model, fields, args)
+    return search_result(db.session.execute(statement).mappings().all(), fields, limit, offset)
+
+
+def search_cache_key(args, fields=()):
+    # Clave de caché de una búsqueda (?name=) dentro del espacio de nombres de la tabla
+    return "search:{}:{}:{}:{}".format(parse_limit(args), args.get("after") or "", ",".join(fields),
+                                       (args.get("name") or "").strip().lower())
+
+
+def parse_types(value):
+    if not value:
+        return list(SEARCHABLE)
+    types = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = [name for name in types if name not in SEARCHABLE]
+    if unknown or not types:
+        raise APIException("Invalid types (use {})".format(",".join(SEARCHABLE)), status_code=400)
+    return types
+
+
+def search_all(args):
+    """
+    `/search?q=&types=`: resultados de todos los recursos en un único ranking.
+
+    Returns:
+        tuple: Lista de {"type", "id", "name", "score"} y el cursor de la siguiente página (o None).
+    """
+    q, words = parse_query(args, "q")
+    statements = []
+    for name in parse_types(args.get("types")):
+        model = SEARCHABLE[name]
+        columns = [literal(name).label("type"), model.__table__.c.id, model.__table__.c.name]
+        statements.append(ranked(model, q, words, columns))
+    statement = select(union_all(*statements).subquery())
+    rows, next_cursor = paginate_ranked(statement, args)
+    results = [
+        {"type": row["type"], "id": row["id"], "name": row["name"], "score": float(row["score"])}
+        for row in rows
+    ]
+    return results, next_cursor
+
+
+def sqlite_index_statements(tablename):
+    """
+    Sentencias que crean (si no existen) la tabla FTS5 de `tablename` y los triggers que la mantienen.
+    """
+    fts = tablename + "_fts"
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(name, content='{table}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')".format(fts=fts, table=tablename),
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        "INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END".format(fts=fts, table=tablename),
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); END".format(fts=fts, table=tablename),
+        "CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF name ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END".format(fts=fts, table=tablename),
+    ]
+
+
+def ensure_sqlite_index():
+    """
+    Crea las tablas FTS5 y sus triggers y reconstruye el índice desde las tablas de origen.
+    """
+    for tablename in SEARCHABLE:
+        for statement in sqlite_index_statements(tablename):
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(fts=tablename + "_fts")))
+    db.session.commit()
+    _fts_tables.clear()
+
+
+def init_app(app):
+    """
+    Registra el comando `flask search-index` (índice FTS5 para ejecuciones locales con SQLite).
+    """
+    @app.cli.command("search-index")
+    def search_index_command():
+        """Crea o reconstruye el índice de búsqueda FTS5 (solo SQLite)."""
+        if db.engine.dialect.name != "sqlite":
+            raise click.ClickException("search-index is only needed on SQLite; PostgreSQL indexes come from the migration")
+        ensure_sqlite_index()
+        click.echo("search index rebuilt for {}".format(", ".join(SEARCHABLE)))
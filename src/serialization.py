@@ -0,0 +1,156 @@
+"""
+Camino rápido de serialización para las listas: filas como tuplas (sin hidratar objetos ORM)
+y un codificador JSON intercambiable (orjson si está instalado, si no la librería estándar).
+
+La salida es idéntica byte a byte a la de `jsonify` con la configuración por defecto de Flask, salvo en
+los float: orjson escribe los mismos dígitos con otra notación (`1e-6`, `1e16` y `0.000025` frente a
+`1e-06`, `1e+16` y `2.5e-05`). El valor leído es el mismo. Las filas del catálogo no tienen columnas float;
+solo la puntuación de `/search` lo es, y detectar los float en cada respuesta costaría más que codificarla.
+"""
+import os
+import json
+import time
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+
+from models import db, not_deleted
+from instrumentation import record_serialization
+from utils import APIException, parse_limit, decode_cursor, encode_cursor, STREAM_BATCH_SIZE
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+# Conversión de tipos no nativos (fechas, UUID, dataclasses) igual que en Flask
+_default = DefaultJSONProvider.default
+
+FAST_JSON = os.getenv("FAST_JSON", "1") not in ("0", "false")
+
+
+def dumps_stdlib(obj):
+    # Mismos argumentos que usa DefaultJSONProvider.response() de Flask fuera del modo debug
+    return (json.dumps(obj, default=_default, ensure_ascii=True, sort_keys=True, separators=(",", ":")) + "\n").encode()
+
+
+def dumps_orjson(obj):
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    try:
+        data = orjson.dumps(obj, default=_default, option=options)
+    except (TypeError, orjson.JSONEncodeError):
+        return dumps_stdlib(obj)
+    # orjson no escapa los caracteres no ASCII (ensure_ascii); en ese caso se usa la librería estándar
+    if not data.isascii():
+        return dumps_stdlib(obj)
+    return data
+
+
+def get_encoder(name=None):
+    """
+    Devuelve la función de codificación: "orjson", "stdlib" o la mejor disponible si `name` es None.
+    """
+    if name == "stdlib" or (name is None and (orjson is None or not FAST_JSON)):
+        return dumps_stdlib
+    if orjson is None:
+        raise RuntimeError("orjson is not installed")
+    return dumps_orjson
+
+
+dumps = get_encoder()
+
+
+def json_response(body, status=200):
+    started = time.perf_counter()
+    data = dumps(body)
+    record_serialization(time.perf_counter() - started)
+    return Response(data, status=status, mimetype="application/json")
+
+
+def parse_fields(model, args):
+    """
+    Columnas pedidas con `?fields=id,name`, en el orden de `serialized_fields`.
+
+    `id` se incluye siempre (es el cursor de paginación). Sin `?fields=` se devuelven todas.
+    """
+    value = args.get("fields")
+    if not value:
+        return model.serialized_fields
+    requested = {part.strip() for part in value.split(",") if part.strip()}
+    if not requested or not requested <= set(model.serialized_fields):
+        raise APIException("Invalid fields (use {})".format(",".join(model.serialized_fields)), status_code=400)
+    return tuple(field for field in model.serialized_fields if field == "id" or field in requested)
+
+
+def entity_statement(model, fields, entity_id):
+    columns = [model.__table__.c[name] for name in fields]
+    return select(*columns).where(model.id == entity_id, not_deleted(model))
+
+
+def select_entity(model, fields, entity_id):
+    """
+    Una fila por id seleccionando solo las columnas de `fields`.
+
+    Returns:
+        dict: Diccionario con esas columnas, o None si no existe.
+    """
+    row = db.session.execute(entity_statement(model, fields, entity_id)).first()
+    return dict(zip(fields, row)) if row is not None else None
+
+
+def select_entities(model, fields, ids):
+    """
+    Varias filas por id en una sola consulta `IN`, seleccionando solo las columnas de `fields`.
+
+    Returns:
+        list: Diccionarios de las filas encontradas (en cualquier orden).
+    """
+    rows = db.session.execute(entities_statement(model, fields, ids)).all()
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def entities_statement(model, fields, ids):
+    columns = [model.__table__.c[name] for name in fields]
+    return select(*columns).where(model.id.in_(ids), not_deleted(model))
+
+
+def stream_statement(model, fields):
+    # Toda la colección (sin borrados lógicos) por id, leída en bloques de STREAM_BATCH_SIZE filas
+    columns = [model.__table__.c[name] for name in fields]
+    return select(*columns).where(not_deleted(model)).order_by(model.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+
+
+def page_statement(model, fields, args):
+    """
+    SELECT de una página por clave con las columnas de `fields` (una fila extra para saber si hay más).
+
+    Returns:
+        tuple: La sentencia y el tamaño de página pedido.
+    """
+    limit = parse_limit(args)
+    columns = [model.__table__.c[name] for name in fields]
+    statement = select(*columns).where(not_deleted(model)).order_by(model.id).limit(limit + 1)
+    after = args.get("after")
+    if after:
+        statement = statement.where(model.id > decode_cursor(after))
+    return statement, limit
+
+
+def page_result(rows, fields, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][fields.index("id")])
+    return [dict(zip(fields, row)) for row in rows], next_cursor
+
+
+def select_page(model, fields, args):
+    """
+    Igual que `utils.paginate` pero seleccionando solo las columnas de `fields` como tuplas.
+
+    Returns:
+        tuple: Lista de diccionarios (mismo formato que `serialize()`) y cursor de la siguiente página.
+    """
+    statement, limit = page_statement(model, fields, args)
+    return page_result(db.session.execute(statement).all(), fields, limit)
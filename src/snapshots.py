@@ -0,0 +1,293 @@
+"""
+Instantáneas estáticas del catálogo completo (personajes, vehículos y planetas) en disco.
+
+Cada colección se escribe en NDJSON, el mismo formato que la exportación `?stream=1`, en un fichero por
+versión de la tabla (`personajes-42.ndjson`) y su copia comprimida (`personajes-42.ndjson.gz`). Un
+puntero (`personajes.json`) indica la versión actual.
+
+Las exportaciones completas (`GET /personajes?stream=1` o `Accept: application/x-ndjson`, sin más
+parámetros) se sirven con `send_file` antes de llegar a la vista: sin consultar la base de datos ni
+serializar filas, y con sendfile cuando el servidor lo admite (gunicorn). Si el cliente acepta gzip se
+envía el fichero ya comprimido. ETag y 304 funcionan igual que en `versioning.conditional`.
+
+Tras un commit que modifica una de las tablas, el proceso que escribió borra el puntero (desde ese
+momento nadie sirve la instantánea antigua) y la reconstruye en segundo plano. Mientras no hay puntero
+las peticiones siguen el camino normal desde la base de datos y piden la reconstrucción en su proceso.
+Las construcciones de una tabla se hacen de una en una entre todos los procesos (`<tabla>.lock`): las que
+esperaban encuentran el puntero ya publicado para la versión actual y no la repiten.
+
+    $ flask build-snapshots                    # todas las tablas (por ejemplo tras restaurar la base de datos)
+    $ flask build-snapshots --table personajes
+
+Variables:
+    SNAPSHOTS_ENABLED        Sirve y reconstruye las instantáneas (0)
+    SNAPSHOT_DIR             Directorio de los ficheros, compartido por los workers (<tmp>/swapi-snapshots)
+    SNAPSHOT_GZIP_LEVEL      Nivel de gzip de la copia comprimida, 1-9 (9: se comprime una vez por versión)
+    SNAPSHOT_REBUILD_DELAY   Segundos que se agrupan las escrituras antes de reconstruir (0.5)
+"""
+import os
+import json
+import gzip
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Sin fcntl (Windows) las construcciones no se coordinan entre procesos
+    fcntl = None
+
+import click
+from flask import request, current_app, send_file, Response
+from sqlalchemy import select
+
+import tracking
+from models import db, not_deleted, Personajes, Vehiculos, Planetas
+from utils import wants_ndjson, NDJSON_MIMETYPE, STREAM_BATCH_SIZE
+from versioning import table_version, representation_etags, not_modified
+
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "0") not in ("0", "false")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "swapi-snapshots"))
+SNAPSHOT_GZIP_LEVEL = int(os.getenv("SNAPSHOT_GZIP_LEVEL", 9))
+SNAPSHOT_REBUILD_DELAY = float(os.getenv("SNAPSHOT_REBUILD_DELAY", 0.5))
+
+logger = logging.getLogger("swapi.snapshots")
+
+SNAPSHOT_MODELS = {model.__tablename__: model for model in (Personajes, Vehiculos, Planetas)}
+# Endpoint de la colección -> modelo
+ENDPOINTS = {"handle_personajes": Personajes, "handle_vehiculos": Vehiculos, "handle_planetas": Planetas}
+
+# Tabla -> (mtime del puntero, contenido): el puntero solo se vuelve a leer cuando cambia
+_pointers = {}
+
+
+def pointer_path(table):
+    return os.path.join(SNAPSHOT_DIR, table + ".json")
+
+
+def write_atomic(path, write):
+    # Se escribe en un temporal del mismo directorio y se renombra: nadie lee un fichero a medias
+    handle, temp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(handle, "wb") as output:
+            write(output)
+        os.chmod(temp_path, 0o644)  # mkstemp crea 0600: los workers pueden ser otro usuario que el CLI
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+@contextmanager
+def build_lock(table):
+    # Bloqueo entre procesos de la construcción de una tabla; cerrar el fichero lo libera
+    with open(os.path.join(SNAPSHOT_DIR, table + ".lock"), "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def build(model):
+    """
+    Escribe la instantánea de la versión actual de la tabla y la publica en el puntero.
+
+    Returns:
+        dict: Contenido del puntero publicado, o None si la tabla cambió durante la construcción.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with build_lock(model.__tablename__):
+        return build_locked(model)
+
+
+def build_locked(model):
+    table = model.__tablename__
+    # La versión se lee antes que las filas: el contenido nunca es más antiguo que la versión que lo nombra
+    version, last_modified = table_version(table)
+    pointer = current(table)
+    if pointer is not None and pointer["version"] == version:
+        # Otro proceso la construyó mientras se esperaba el bloqueo
+        db.session.rollback()
+        return pointer
+    name = "{}-{}.ndjson".format(table, version)
+    dumps = current_app.json.dumps
+    fields = model.serialized_fields
+    statement = (
+        select(*[model.__table__.c[field] for field in fields]).where(not_deleted(model))
+        .order_by(model.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    count = 0
+
+    def write(output):
+        # La copia comprimida se escribe en su propio temporal a la vez que el fichero sin comprimir
+        def write_both(compressed_output):
+            nonlocal count
+            with gzip.GzipFile(name, "wb", compresslevel=SNAPSHOT_GZIP_LEVEL, fileobj=compressed_output,
+                               mtime=0) as compressed:
+                for row in db.session.execute(statement):
+                    # Mismas líneas que utils.stream_ndjson
+                    line = (dumps(dict(zip(fields, row)), separators=(",", ":")) + "\n").encode()
+                    output.write(line)
+                    compressed.write(line)
+                    count += 1
+
+        write_atomic(os.path.join(SNAPSHOT_DIR, name + ".gz"), write_both)
+
+    write_atomic(os.path.join(SNAPSHOT_DIR, name), write)
+    db.session.rollback()
+
+    if table_version(table)[0] != version:
+        # Otra escritura llegó mientras tanto: su propio commit programa la reconstrucción
+        db.session.rollback()
+        return None
+    pointer = {
+        "version": version,
+        "updated_at": last_modified.isoformat() if last_modified is not None else None,
+        "file": name,
+        "rows": count,
+    }
+    write_atomic(pointer_path(table), lambda output: output.write(json.dumps(pointer).encode()))
+    db.session.rollback()
+    remove_old(table, version)
+    return pointer
+
+
+def remove_old(table, version):
+    # Se conserva la versión anterior por si algún proceso acaba de leer su puntero
+    for name in os.listdir(SNAPSHOT_DIR):
+        prefix, _, rest = name.partition("-")
+        number = rest.split(".", 1)[0]
+        if prefix == table and number.isdigit() and int(number) < version - 1:
+            try:
+                os.unlink(os.path.join(SNAPSHOT_DIR, name))
+            except FileNotFoundError:
+                pass
+
+
+def current(table):
+    """
+    Returns:
+        dict: Puntero de la instantánea vigente de la tabla, o None si no hay ninguna.
+    """
+    try:
+        mtime = os.stat(pointer_path(table)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _pointers.get(table)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(pointer_path(table), "rb") as handle:
+            pointer = json.loads(handle.read())
+    except FileNotFoundError:
+        return None
+    _pointers[table] = (mtime, pointer)
+    return pointer
+
+
+def invalidate(table):
+    try:
+        os.unlink(pointer_path(table))
+    except FileNotFoundError:
+        pass
+
+
+class Rebuilder:
+    """
+    Reconstruye en un hilo aparte las tablas modificadas, agrupando las escrituras seguidas.
+    """
+
+    def __init__(self, app, delay=SNAPSHOT_REBUILD_DELAY):
+        self.app = app
+        self.delay = delay
+        self.pending = set()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def schedule(self, tables):
+        with self._lock:
+            self.pending.update(tables)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.run)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def run(self):
+        with self._lock:
+            tables, self.pending, self._timer = self.pending, set(), None
+        with self.app.app_context():
+            for table in sorted(tables):
+                try:
+                    build(SNAPSHOT_MODELS[table])
+                except Exception:
+                    logger.exception("snapshot of %s failed", table)
+            db.session.remove()
+
+
+def serve_snapshot():
+    """
+    `before_request`: responde las exportaciones completas del catálogo desde la instantánea.
+    """
+    model = ENDPOINTS.get(request.endpoint)
+    if model is None or request.method != "GET" or set(request.args) - {"stream"} or not wants_ndjson(request):
+        return None
+    table = model.__tablename__
+    pointer = current(table)
+    if pointer is None:
+        current_app.extensions["snapshots"].schedule({table})
+        return None
+
+    encoding = "gzip" if request.accept_encodings["gzip"] else None
+    # Mismos ETag que versioning.conditional: el de la copia comprimida o el del fichero sin comprimir
+    etags = representation_etags(table, pointer["version"], "ndjson", encoding)
+    last_modified = datetime.fromisoformat(pointer["updated_at"]) if pointer["updated_at"] else None
+    etag = next((candidate for candidate in etags if not_modified(request, candidate, last_modified)), None)
+    if etag is not None:
+        response = Response(status=304)
+    else:
+        etag = etags[0]
+        path = os.path.join(SNAPSHOT_DIR, pointer["file"] + (".gz" if encoding else ""))
+        try:
+            response = send_file(path, mimetype=NDJSON_MIMETYPE, conditional=False, etag=False)
+        except FileNotFoundError:
+            return None
+        # Mismas cabeceras que la exportación desde la base de datos
+        del response.headers["Content-Disposition"]
+        del response.headers["Cache-Control"]
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def init_app(app):
+    """
+    Registra el comando `flask build-snapshots` y, con SNAPSHOTS_ENABLED, el servicio y la reconstrucción.
+    """
+    @app.cli.command("build-snapshots")
+    @click.option("--table", type=click.Choice(sorted(SNAPSHOT_MODELS)), multiple=True, help="Solo estas tablas")
+    def build_snapshots_command(table):
+        """Escribe las instantáneas NDJSON (y gzip) del catálogo."""
+        for name in table or sorted(SNAPSHOT_MODELS):
+            pointer = build(SNAPSHOT_MODELS[name])
+            if pointer is None:
+                click.echo("{}: changed while building, run again".format(name))
+            else:
+                click.echo("{}: version {} ({} rows) in {}".format(name, pointer["version"], pointer["rows"], SNAPSHOT_DIR))
+
+    if not SNAPSHOTS_ENABLED:
+        return
+    rebuilder = app.extensions["snapshots"] = Rebuilder(app)
+    app.before_request(serve_snapshot)
+
+    @tracking.on_commit
+    def rebuild_touched(tables):
+        touched = tables & SNAPSHOT_MODELS.keys()
+        for table in touched:
+            invalidate(table)
+        if touched:
+            rebuilder.schedule(touched)
@@ -0,0 +1,53 @@
+"""
+Registra qué tablas modifica cada transacción y avisa a los suscriptores cuando se confirma (commit).
+"""
+from itertools import chain
+from sqlalchemy import event
+
+_commit_callbacks = []
+
+
+def on_commit(callback):
+    """
+    Registra una función que recibe el conjunto de nombres de tabla modificados en cada commit.
+
+    Puede usarse como decorador.
+    """
+    _commit_callbacks.append(callback)
+    return callback
+
+
+def touched_tables(session):
+    return session.info.setdefault("touched_tables", set())
+
+
+def register(session):
+    """
+    Conecta los eventos de SQLAlchemy a la sesión (o scoped_session) de la aplicación.
+
+    Se tienen en cuenta tanto los objetos ORM que pasan por un flush como las sentencias
+    insert/update/delete ejecutadas con `session.execute` (por ejemplo las inserciones masivas).
+    """
+    @event.listens_for(session, "before_flush")
+    def collect_flushed(session, flush_context, instances):
+        tables = touched_tables(session)
+        for instance in chain(session.new, session.dirty, session.deleted):
+            tables.add(instance.__table__.name)
+
+    @event.listens_for(session, "do_orm_execute")
+    def collect_statements(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            mapper = orm_execute_state.bind_mapper
+            if mapper is not None:
+                touched_tables(orm_execute_state.session).add(mapper.local_table.name)
+
+    @event.listens_for(session, "after_commit")
+    def notify(session):
+        tables = session.info.pop("touched_tables", None)
+        if tables:
+            for callback in _commit_callbacks:
+                callback(frozenset(tables))
+
+    @event.listens_for(session, "after_soft_rollback")
+    def discard(session, previous_transaction):
+        session.info.pop("touched_tables", None)
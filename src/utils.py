@@ -1,4 +1,17 @@
-from flask import jsonify, url_for
+import os
+import base64
+import binascii
+from flask import jsonify, url_for, current_app, Response, stream_with_context
+
+# Tamaño de página por defecto y máximo para los endpoints de colección
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", 50))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", 500))
+# Ids que se pueden pedir de una vez con ?ids=1,2,3
+MAX_BATCH_IDS = int(os.getenv("BATCH_IDS_MAX", 100))
+# Filas que se traen por cada vuelta del cursor del servidor al exportar en streaming
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 1000))
+
+NDJSON_MIMETYPE = "application/x-ndjson"
 
 class APIException(Exception):
     status_code = 400
@@ -15,13 +28,114 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+def encode_cursor(value, kind="id"):
+    # El cursor es opaco para el cliente: codifica el último id devuelto (o la posición, en las búsquedas)
+    raw = "{}:{}".format(kind, value).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor, kind="id"):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, _, value = base64.urlsafe_b64decode(padded).decode().partition(":")
+        if prefix != kind:
+            raise ValueError(cursor)
+        return int(value)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise APIException("Invalid cursor", status_code=400)
+
+def parse_limit(args):
+    value = args.get("limit", DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise APIException("Invalid limit", status_code=400)
+    if limit < 1:
+        raise APIException("Invalid limit", status_code=400)
+    return min(limit, MAX_PAGE_SIZE)
+
+def page_cache_key(args, fields=()):
+    # Clave de caché de una página: tamaño normalizado, cursor y columnas pedidas
+    return "page:{}:{}:{}".format(parse_limit(args), args.get("after") or "", ",".join(fields))
+
+def paginate(query, id_column, args):
+    """
+    Pagina una consulta por clave (keyset) usando la clave primaria entera.
+
+    Args:
+        query (Query): Consulta base sobre el modelo.
+        id_column (Column): Columna de clave primaria usada como cursor.
+        args (MultiDict): Parámetros de la petición (`limit` y `after`).
+
+    Returns:
+        tuple: Lista de elementos de la página y el cursor de la siguiente página (o None).
+    """
+    limit = parse_limit(args)
+    after = args.get("after")
+    if after:
+        query = query.filter(id_column > decode_cursor(after))
+    # Se pide un elemento extra para saber si existe una página siguiente sin hacer un COUNT
+    items = query.order_by(id_column).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].id)
+    return items, next_cursor
+
+def parse_ids(value, max_ids=MAX_BATCH_IDS):
+    # Convierte "1,2,3" en [1, 2, 3] conservando el orden y quitando duplicados
+    ids = []
+    try:
+        for part in value.split(","):
+            if part.strip():
+                item = int(part)
+                if item not in ids:
+                    ids.append(item)
+    except ValueError:
+        raise APIException("Invalid ids", status_code=400)
+    if not ids:
+        raise APIException("Invalid ids", status_code=400)
+    if len(ids) > max_ids:
+        raise APIException("Too many ids (max {})".format(max_ids), status_code=400)
+    return ids
+
+def wants_ndjson(request):
+    # Se activa con ?stream=1 o con la cabecera Accept: application/x-ndjson
+    if request.args.get("stream") in ("1", "true"):
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def stream_ndjson(query, id_column, fields=None):
+    """
+    Exporta una consulta completa como NDJSON (un objeto JSON por línea).
+
+    Las filas se recorren con un cursor del servidor (`yield_per`) y cada `serialize()`
+    se envía en cuanto está listo, así la memoria del worker no crece con el tamaño de la tabla.
+
+    Args:
+        query (Query): Consulta base sobre el modelo.
+        id_column (Column): Columna de clave primaria usada para ordenar.
+        fields (tuple): Si se indica, solo se seleccionan esas columnas (sin hidratar objetos ORM).
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        if fields is None:
+            for item in query.order_by(id_column).yield_per(STREAM_BATCH_SIZE):
+                yield dumps(item.serialize(), separators=(",", ":")) + "\n"
+            return
+        columns = [id_column.table.c[name] for name in fields]
+        for row in query.with_entities(*columns).order_by(id_column).yield_per(STREAM_BATCH_SIZE):
+            yield dumps(dict(zip(fields, row)), separators=(",", ":")) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
     return len(defaults) >= len(arguments)
 
 def generate_sitemap(app):
-    links = ['/admin/']
+    links = [app.config["ADMIN_URL"] + "/"] if app.config.get("ADMIN_URL") else []  # Solo con ADMIN_MODE eager o lazy
     for rule in app.url_map.iter_rules():
         # Filter out rules we can't navigate to in a browser
         # and rules that require parameters
@@ -0,0 +1,129 @@
+"""
+Versiones por tabla para responder peticiones condicionales (ETag / Last-Modified) sin cargar filas.
+"""
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import g, request, make_response, Response
+from sqlalchemy import event, select, update, insert
+
+import tracking
+import compression
+from models import db, TableVersions
+from utils import wants_ndjson
+
+
+def utcnow():
+    # Las fechas se guardan en UTC sin zona horaria
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def bump(session, table):
+    now = utcnow()
+    result = session.execute(
+        update(TableVersions)
+        .where(TableVersions.table_name == table)
+        .values(version=TableVersions.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        session.execute(insert(TableVersions).values(table_name=table, version=1, updated_at=now))
+
+
+def register(session):
+    """
+    Incrementa, dentro de la misma transacción, la versión de cada tabla modificada antes del commit.
+    """
+    @event.listens_for(session, "before_commit")
+    def bump_versions(session):
+        session.flush()  # Asegura que los objetos pendientes quedan registrados en touched_tables
+        tables = tracking.touched_tables(session) - {TableVersions.__tablename__}
+        # Orden fijo para que dos transacciones concurrentes no se bloqueen mutuamente
+        for table in sorted(tables):
+            bump(session, table)
+
+
+def version_statement(table):
+    return select(TableVersions.version, TableVersions.updated_at).where(TableVersions.table_name == table)
+
+
+def version_result(row):
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at.replace(tzinfo=timezone.utc)
+
+
+def table_version(table):
+    """
+    Returns:
+        tuple: Versión actual de la tabla y fecha de su última escritura (o None si nunca se escribió).
+    """
+    return version_result(db.session.execute(version_statement(table)).first())
+
+
+def request_version(model):
+    """
+    Versión de la tabla en esta petición: la que leyó `conditional` (o se lee ahora si la vista no lo usa).
+
+    Las cachés de cuerpos la incluyen en la clave, así un cuerpo guardado solo responde a su versión
+    aunque la escritura venga de otro proceso (worker, CLI) cuya invalidación no llega a esta caché.
+    """
+    versions = g.setdefault("table_versions", {})
+    if model.__tablename__ not in versions:
+        versions[model.__tablename__] = table_version(model.__tablename__)[0]
+    return versions[model.__tablename__]
+
+
+def make_etag(table, version, variant):
+    return "{}-{}-{}".format(table, version, variant)
+
+
+def not_modified(request, etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since is not None and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def representation_etags(table, version, variant, encoding):
+    """
+    ETags de la versión según lo que se envíe: comprimido con `encoding` o sin comprimir (cuerpos pequeños
+    o en streaming). Con la misma versión el cuerpo es el mismo, así que cualquiera de los dos vale para un 304.
+
+    Returns:
+        list: ETag con la codificación (si hay) y ETag sin comprimir.
+    """
+    identity = make_etag(table, version, variant)
+    return [make_etag(table, version, variant + "-" + encoding), identity] if encoding else [identity]
+
+
+def conditional(model):
+    """
+    Decorador para los GET del catálogo: añade ETag y Last-Modified a partir de la versión de la tabla
+    y responde 304 antes de consultar o serializar filas si el cliente ya tiene la versión actual.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, last_modified = table_version(model.__tablename__)
+            g.setdefault("table_versions", {})[model.__tablename__] = version  # La usan las claves de la caché
+            variant = "ndjson" if wants_ndjson(request) else "json"
+            encoding = compression.negotiate(request)
+            etags = representation_etags(model.__tablename__, version, variant, encoding)
+            etag = next((candidate for candidate in etags if not_modified(request, candidate, last_modified)), None)
+            if etag is not None:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Cada codificación es una representación distinta con su propio ETag
+                etag = etags[0] if compression.will_compress(response, encoding) else etags[-1]
+            response.set_etag(etag)
+            if compression.COMPRESSION_ENABLED:
+                response.vary.add("Accept-Encoding")  # También en los 304: el ETag depende de la codificación
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,17 @@
+# Proceso worker de la cola de trabajos (ver jobs.py). Se ejecuta junto a los workers web de gunicorn:
+#   $ cd src && python worker.py            # procesa trabajos sin parar
+#   $ cd src && python worker.py --once     # vacía la cola y termina
+
+import argparse
+import logging
+
+from app import app
+import jobs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de la cola de trabajos")
+    parser.add_argument("--once", action="store_true", help="Termina cuando no quedan trabajos pendientes")
+    parser.add_argument("--poll-interval", type=float, default=jobs.JOB_POLL_INTERVAL)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    jobs.run_worker(app, once=args.once, poll_interval=args.poll_interval)
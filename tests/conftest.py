@@ -0,0 +1,63 @@
+"""
+Configuración común de las pruebas: la aplicación usa un SQLite temporal y se importa desde `src/`.
+
+    $ python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Antes de importar la aplicación: lee la configuración del entorno al cargarse
+DATA_DIR = tempfile.mkdtemp(prefix="swapi-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(DATA_DIR, "test.db")
+os.environ.setdefault("METRICS_ENABLED", "0")
+os.environ.setdefault("ADMIN_MODE", "off")
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+os.environ.pop("CACHE_REDIS_URL", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+@pytest.fixture
+def app():
+    """
+    La aplicación con las tablas vacías y la caché limpia en cada prueba.
+    """
+    from app import app as flask_app, db
+    from cache import cache
+
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    if hasattr(cache, "clear"):
+        cache.clear()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(app):
+    """
+    Sentencias SQL que llegan al motor durante la prueba (para comprobar cuántas consultas hace una petición).
+    """
+    from sqlalchemy import event
+    from app import db
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,25 @@
+from flask import Flask
+
+import admin
+from utils import generate_sitemap
+
+
+def sitemap(flask_app):
+    with flask_app.test_request_context("/"):
+        return generate_sitemap(flask_app)
+
+
+def test_sitemap_leaves_out_admin_when_off(client):
+    body = client.get("/").get_data(as_text=True)
+    assert "/personajes" in body
+    assert "/admin" not in body
+    assert client.get("/admin/").status_code == 404
+
+
+def test_sitemap_links_lazy_admin(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_MODE", "lazy")
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule("/ping", "ping", lambda: "pong")
+    admin.setup_admin(flask_app)
+    assert "href='/admin/'" in sitemap(flask_app)
+    assert "href='/ping'" in sitemap(flask_app)
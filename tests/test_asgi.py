@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+asgi = pytest.importorskip("asgi")
+
+
+def asgi_get(path, headers=None):
+    async def run():
+        try:
+            response = await asgi.app.test_client().get(path, headers=headers)
+            return response.status_code, await response.get_data(), response.headers
+        finally:
+            await asgi.engine.dispose()  # Cada prueba usa su propio bucle de eventos
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def catalog(client):
+    for name in ("Luke Skywalker", "Leia Organa", "Anakin Skywalker"):
+        client.post("/personajes", json={"name": name, "eye_color": "blue", "hair_color": "brown"})
+    return client
+
+
+@pytest.mark.parametrize("path", [
+    "/personajes",
+    "/personajes?limit=2",
+    "/personajes?ids=3,1,99",
+    "/personajes?ids=2&fields=name",
+    "/personajes?name=skywalker",
+    "/personajes?stream=1",
+    "/personajes?stream=1&fields=name",
+    "/personajes/2",
+])
+def test_same_responses_as_wsgi(catalog, path):
+    expected = catalog.get(path)
+    status, body, headers = asgi_get(path)
+    assert status == expected.status_code
+    assert body == expected.get_data()
+    assert headers["Content-Type"] == expected.headers["Content-Type"]
+    assert headers["ETag"] == expected.headers["ETag"]
+
+
+def test_name_filter_is_applied(catalog):
+    status, body, _ = asgi_get("/personajes?name=Leia")
+    assert status == 200
+    assert b"Leia Organa" in body and b"Luke" not in body
+
+
+def test_ndjson_via_accept_header(catalog):
+    status, body, headers = asgi_get("/personajes", headers={"Accept": "application/x-ndjson"})
+    assert status == 200 and headers["Content-Type"] == "application/x-ndjson"
+    assert body.count(b"\n") == 3
+
+
+def test_invalid_ids_are_rejected(catalog):
+    assert asgi_get("/personajes?ids=a,b")[0] == 400
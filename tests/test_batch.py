@@ -0,0 +1,54 @@
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def catalog(client):
+    client.post("/planetas", json=[{"name": "Planeta %d" % index, "population": "1000"} for index in range(5)])
+    client.delete("/favorite/planeta/4")
+    return client
+
+
+def ids(response):
+    return [item["id"] for item in response.json["data"]]
+
+
+def test_entities_come_back_in_requested_order(catalog):
+    response = catalog.get("/planetas?ids=5,2,3")
+    assert response.status_code == 200
+    assert ids(response) == [5, 2, 3]
+    assert response.json["missing"] == []
+
+
+def test_missing_and_deleted_ids_are_reported(catalog):
+    response = catalog.get("/planetas?ids=3,99,4,1")
+    assert ids(response) == [3, 1]
+    assert response.json["missing"] == [99, 4]
+
+
+def test_repeated_ids_are_returned_once(catalog):
+    assert ids(catalog.get("/planetas?ids=2,2,1,2")) == [2, 1]
+
+
+def test_cached_and_uncached_entities_mix(catalog):
+    catalog.get("/planetas/3")  # Queda en la caché
+    response = catalog.get("/planetas?ids=1,3,5&fields=name")
+    assert response.json["data"] == [
+        {"id": 1, "name": "Planeta 0"}, {"id": 3, "name": "Planeta 2"}, {"id": 5, "name": "Planeta 4"}
+    ]
+
+
+def test_too_many_ids_are_rejected(catalog):
+    at_limit = ",".join(str(number) for number in range(1, utils.MAX_BATCH_IDS + 1))
+    assert catalog.get("/planetas?ids=" + at_limit).status_code == 200
+    response = catalog.get("/planetas?ids={},{}".format(at_limit, utils.MAX_BATCH_IDS + 1))
+    assert response.status_code == 400
+    assert response.json["message"] == "Too many ids (max {})".format(utils.MAX_BATCH_IDS)
+
+
+@pytest.mark.parametrize("value", ["a,b", "1,,x", ","])
+def test_invalid_ids_are_rejected(catalog, value):
+    response = catalog.get("/planetas?ids=" + value)
+    assert response.status_code == 400
+    assert response.json["message"] == "Invalid ids"
@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import func, select
+
+import bulk
+import jobs
+from models import db, Jobs, Personajes, Favoritos_personajes
+
+FIELDS = ["name", "eye_color", "hair_color"]
+
+
+def personajes(count):
+    return [{"name": "Clone %d" % index, "eye_color": "brown", "hair_color": "black"} for index in range(count)]
+
+
+def test_bulk_insert_reports_progress_per_chunk(app):
+    items = personajes(bulk.BULK_CHUNK_SIZE * 2 + 5) + [{"name": "Sin ojos"}]
+    reported = []
+    with app.app_context():
+        created, errors = bulk.bulk_insert(Personajes, FIELDS, items, progress=reported.append)
+    assert len(created) == len(items) - 1 and len(errors) == 1
+    assert reported == [bulk.BULK_CHUNK_SIZE, bulk.BULK_CHUNK_SIZE * 2, bulk.BULK_CHUNK_SIZE * 2 + 5]
+
+
+def test_deduplicated_insert_reports_progress(app, client):
+    client.post("/users", json={"email": "luke@example.com", "password": "x", "is_active": True})
+    client.post("/personajes", json={"name": "Leia", "eye_color": "brown", "hair_color": "brown"})
+    favorite = {"personajes_relacion": 1, "usuarios_relacion": 1}
+    reported = []
+    with app.app_context():
+        created, _ = bulk.bulk_insert(Favoritos_personajes, list(favorite), [favorite, favorite], progress=reported.append)
+    assert [entry.get("duplicate", False) for entry in created] == [False, True]
+    assert reported == [2]
+
+
+def test_import_job_runs_once(app):
+    with app.app_context():
+        job_id = jobs.enqueue("import", {"table": "personajes", "fields": FIELDS, "items": personajes(3)})
+        assert jobs.claim() == job_id
+        jobs.run(job_id)
+        job_row = db.session.get(Jobs, job_id)
+        assert job_row.status == "done" and job_row.progress == 3
+        assert db.session.scalar(select(func.count()).select_from(Personajes)) == 3
+
+
+def inserts(statements):
+    return [statement for statement in statements if statement.startswith("INSERT INTO personajes")]
+
+
+@pytest.mark.parametrize("count", [1, 10, 100])
+def test_one_insert_statement_per_chunk(client, statements, count):
+    response = client.post("/personajes", json=personajes(count))
+    assert response.status_code == 200
+    assert len(inserts(statements)) == 1
+
+
+def test_insert_statements_grow_with_chunks_not_rows(app, statements):
+    with app.app_context():
+        bulk.bulk_insert(Personajes, FIELDS, personajes(bulk.BULK_CHUNK_SIZE * 2 + 1))
+    assert len(inserts(statements)) == 3
+
+
+def test_bulk_ids_match_items(client):
+    items = [
+        {"name": "Luke", "eye_color": "blue", "hair_color": "blond"},
+        {"name": "Leia", "eye_color": "brown", "hair_color": "brown"},
+        {"name": "Luke", "eye_color": "blue", "hair_color": "blond"},
+        {"name": "Han", "eye_color": "brown"},
+        {"name": "Chewbacca", "eye_color": "blue", "hair_color": "brown"},
+    ]
+    body = client.post("/personajes", json=items).json
+    assert [entry["index"] for entry in body["created"]] == [0, 1, 2, 4]
+    assert body["errors"] == [{"index": 3, "error": "Missing field 'hair_color'"}]
+    for entry in body["created"]:
+        stored = client.get("/personajes/%d" % entry["id"]).json["data"]
+        assert stored["name"] == items[entry["index"]]["name"]
+    assert len({entry["id"] for entry in body["created"]}) == 4
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/personajes", {"name": "Luke", "eye_color": "blue"}),
+    ("/vehiculos", {"name": "X-Wing"}),
+    ("/planetas", {"name": "Tatooine", "population": 200000}),
+    ("/users", {"email": "luke@example.com", "password": "x"}),
+])
+def test_single_create_validates_fields(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert response.json["message"].startswith("Missing field") or "must be of type" in response.json["message"]
+
+
+@pytest.fixture
+def without_returning(app, monkeypatch):
+    # Mismo camino que MySQL (INSERT IGNORE sin RETURNING)
+    with app.app_context():
+        monkeypatch.setattr(db.engine.dialect, "insert_returning", False)
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_duplicate_favorites_are_not_counted(request, client, returning):
+    if not returning:
+        request.getfixturevalue("without_returning")
+    client.post("/users", json={"email": "luke@example.com", "password": "x", "is_active": True})
+    client.post("/personajes", json=personajes(3))
+    client.post("/favoritos_personajes", json={"personajes_relacion": 1, "usuarios_relacion": 1})
+
+    body = client.post("/favoritos_personajes", json=[
+        {"personajes_relacion": 1, "usuarios_relacion": 1},
+        {"personajes_relacion": 2, "usuarios_relacion": 1},
+        {"personajes_relacion": 2, "usuarios_relacion": 1},
+        {"personajes_relacion": 3, "usuarios_relacion": 1},
+    ]).json
+
+    assert [entry.get("duplicate", False) for entry in body["created"]] == [True, False, True, False]
+    assert [entry["id"] for entry in body["created"]] == [1, 2, 2, 3]
+    counts = {item["id"]: item["favorite_count"] for item in client.get("/personajes/top").json["data"]}
+    assert counts == {1: 1, 2: 1, 3: 1}
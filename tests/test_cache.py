@@ -0,0 +1,134 @@
+import time
+
+import fakeredis
+import pytest
+
+import cache as cache_module
+from cache import MemoryCache, RedisCache, InvalidationBus, NullCache, create_cache, INVALIDATION_CHANNEL
+
+
+def wait_for(condition, timeout=2.0):
+    # El bus aplica las invalidaciones desde su hilo: se espera a que lleguen
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def test_memory_get_or_set_calls_loader_once():
+    cache = MemoryCache(maxsize=10, ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"id": 1}
+
+    assert cache.get_or_set("personajes", "1", loader) == {"id": 1}
+    assert cache.get_or_set("personajes", "1", loader) == {"id": 1}
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_memory_does_not_store_none():
+    cache = MemoryCache(maxsize=10, ttl=60)
+    assert cache.get_or_set("personajes", "404", lambda: None) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_memory_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2, ttl=60)
+    cache.set("personajes", "1", 1)
+    cache.set("personajes", "2", 2)
+    cache.get("personajes", "1")
+    cache.set("personajes", "3", 3)
+    assert cache.get("personajes", "2") is None
+    assert cache.get("personajes", "1") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_expires_entries():
+    cache = MemoryCache(maxsize=10, ttl=0.01)
+    cache.set("personajes", "1", 1)
+    time.sleep(0.02)
+    assert cache.get("personajes", "1") is None
+
+
+def test_memory_invalidate_only_touches_namespace():
+    cache = MemoryCache(maxsize=10, ttl=60)
+    cache.set("personajes", "1", 1)
+    cache.set("planetas", "1", 1)
+    cache.invalidate("personajes")
+    assert cache.get("personajes", "1") is None
+    assert cache.get("planetas", "1") == 1
+
+
+def test_redis_roundtrip_and_invalidate(server):
+    client = fakeredis.FakeRedis(server=server)
+    cache = RedisCache(client, ttl=60, prefix="test:")
+    cache.set("personajes", "page:50::id,name", [{"id": 1, "name": "Luke"}])
+    cache.set("planetas", "1", {"id": 1})
+    assert cache.get("personajes", "page:50::id,name") == [{"id": 1, "name": "Luke"}]
+
+    cache.invalidate("personajes")
+    assert cache.get("personajes", "page:50::id,name") is None
+    assert cache.get("planetas", "1") == {"id": 1}
+    assert client.keys("test:personajes:*") == []
+
+
+def test_redis_entries_have_ttl(server):
+    client = fakeredis.FakeRedis(server=server)
+    cache = RedisCache(client, ttl=30, prefix="test:")
+    cache.set("personajes", "1", {"id": 1})
+    assert 0 < client.ttl("test:personajes:1") <= 30
+
+
+def test_redis_invalidate_publishes(server):
+    client = fakeredis.FakeRedis(server=server)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(INVALIDATION_CHANNEL)
+    RedisCache(client, prefix="test:").invalidate("vehiculos")
+    received = []
+    # El primer get_message consume la confirmación de la suscripción (se ignora y devuelve None)
+    assert wait_for(lambda: received.append(pubsub.get_message()) or b"vehiculos" in [m["data"] for m in received if m])
+
+
+def test_bus_invalidates_other_processes_caches(server):
+    # Dos workers con caché en memoria conectados al mismo Redis
+    first = MemoryCache(maxsize=10, ttl=60, bus=InvalidationBus(fakeredis.FakeRedis(server=server)))
+    second = MemoryCache(maxsize=10, ttl=60, bus=InvalidationBus(fakeredis.FakeRedis(server=server)))
+    second.get("personajes", "1")  # Arranca el hilo que escucha el canal
+    assert wait_for(lambda: fakeredis.FakeRedis(server=server).pubsub_numsub(INVALIDATION_CHANNEL)[0][1] >= 1)
+    first.set("personajes", "1", "old")
+    second.set("personajes", "1", "old")
+
+    first.invalidate("personajes")
+
+    assert first.get("personajes", "1") is None
+    assert wait_for(lambda: second.stats()["size"] == 0)
+    assert second.get("personajes", "1") is None
+
+
+def test_create_cache_backends(monkeypatch):
+    assert isinstance(create_cache("none"), NullCache)
+    assert isinstance(create_cache("memory", None), MemoryCache)
+    monkeypatch.setattr(cache_module, "redis_client", lambda url: fakeredis.FakeRedis())
+    assert isinstance(create_cache("redis", "redis://cache"), RedisCache)
+    assert create_cache("memory", "redis://cache").bus is not None
+    with pytest.raises(RuntimeError):
+        create_cache("redis", None)
+    with pytest.raises(RuntimeError):
+        create_cache("memcached", None)
+
+
+def test_commit_invalidates_cached_pages(client):
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    assert [item["name"] for item in client.get("/personajes").json["data"]] == ["Luke"]
+    client.post("/personajes", json={"name": "Leia", "eye_color": "brown", "hair_color": "brown"})
+    assert [item["name"] for item in client.get("/personajes").json["data"]] == ["Luke", "Leia"]
@@ -0,0 +1,137 @@
+import importlib.util
+import os
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text, update
+
+import changes
+from models import db, Changes, Personajes
+from purge import purge
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def since(client, value=None, limit=None):
+    query = "/changes" + ("?since=%d" % value if value is not None else "")
+    if limit is not None:
+        query += "&limit=%d" % limit
+    return client.get(query).json
+
+
+def entries(body):
+    return [(change["table"], change["id"], change["op"]) for change in body["data"]]
+
+
+def test_without_since_returns_current_position(client):
+    assert since(client) == {"msg": "OK", "data": [], "next_since": 0, "has_more": False}
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    body = since(client)
+    assert body["data"] == [] and body["next_since"] == 1
+
+
+def test_upserts_and_tombstones(app, client):
+    start = since(client)["next_since"]
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    client.post("/planetas", json={"name": "Tatooine", "population": "200000"})
+    client.delete("/favorite/planeta/1")
+
+    body = since(client, start)
+    assert body["data"][0]["op"] == "upsert"
+    assert body["data"][0]["data"] == {"id": 1, "name": "Luke", "eye_color": "blue", "hair_color": "blond"}
+    assert entries(body) == [("personajes", 1, "upsert"), ("planetas", 1, "delete")]
+    assert "data" not in body["data"][1]
+
+    # La purga de una fila que ya tiene tombstone no genera otro cambio
+    after_delete = body["next_since"]
+    with app.app_context():
+        purge()
+    assert since(client, after_delete)["data"] == []
+
+
+def test_rows_are_deduplicated_to_their_latest_change(app, client):
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    client.post("/personajes", json={"name": "Leia", "eye_color": "brown", "hair_color": "brown"})
+    with app.app_context():
+        db.session.execute(update(Personajes).where(Personajes.id == 1).values(name="Luke Skywalker"))
+        db.session.commit()
+
+    body = since(client, 0)
+    assert entries(body) == [("personajes", 2, "upsert"), ("personajes", 1, "upsert")]
+    assert body["data"][1]["data"]["name"] == "Luke Skywalker"
+    assert body["next_since"] == 3
+
+
+def test_pages_follow_the_cursor(app, client):
+    client.post("/vehiculos", json=[{"name": "Vehiculo %d" % index, "model": "X"} for index in range(5)])
+    client.delete("/favorite/vehiculo/2")
+
+    seen, cursor, pages = [], 0, 0
+    while True:
+        body = since(client, cursor, limit=2)
+        pages += 1
+        seen.extend(entries(body))
+        assert body["next_since"] >= cursor
+        if not body["has_more"]:
+            break
+        cursor = body["next_since"]
+    assert pages == 3
+    assert [entry[1] for entry in seen] == [1, 2, 3, 4, 5, 2]
+    assert seen[-1] == ("vehiculos", 2, "delete")
+
+    # Lo que ocurre después se lee desde el último next_since sin repetir nada
+    client.post("/vehiculos", json={"name": "X-Wing", "model": "T-65"})
+    assert entries(since(client, body["next_since"])) == [("vehiculos", 6, "upsert")]
+    assert since(client, body["next_since"] + 1)["data"] == []
+
+
+def test_favorite_count_updates_are_not_changes(client):
+    client.post("/users", json={"email": "luke@example.com", "password": "x", "is_active": True})
+    client.post("/personajes", json={"name": "Leia", "eye_color": "brown", "hair_color": "brown"})
+    start = since(client)["next_since"]
+    client.post("/favoritos_personajes", json={"personajes_relacion": 1, "usuarios_relacion": 1})
+    # Solo el favorito: el incremento de favorite_count en personajes no cuenta
+    assert entries(since(client, start)) == [("favoritos_personajes", 1, "upsert")]
+
+
+@pytest.mark.parametrize("value", ["-1", "abc"])
+def test_invalid_since_is_rejected(client, value):
+    assert client.get("/changes?since=" + value).status_code == 400
+
+
+def load_migration():
+    path = os.path.join(ROOT, "migrations", "versions", "f3a8c61d2e57_.py")
+    spec = importlib.util.spec_from_file_location("changes_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+
+def test_migration_tracks_the_same_columns():
+    migration = load_migration()
+    assert migration.TRACKED_TABLES == {table: changes.watched_columns(model) for table, model in changes.TRACKED.items()}
+
+
+def test_migration_creates_working_triggers(tmp_path):
+    # Solo esta migración, sobre las tablas de los modelos (Table.create no lanza los triggers de create_all)
+    engine = create_engine("sqlite:///" + str(tmp_path / "migrated.db"))
+    migration = load_migration()
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name != Changes.__tablename__:
+                table.create(connection)
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO planetas (name, population, favorite_count) VALUES ('Hoth', '0', 0)"))
+        connection.execute(text("UPDATE planetas SET favorite_count = 3"))
+        connection.execute(text("UPDATE planetas SET deleted_at = CURRENT_TIMESTAMP"))
+        connection.execute(text("DELETE FROM planetas"))
+        connection.execute(text("INSERT INTO vehiculos (name, model, favorite_count) VALUES ('X-Wing', 'T-65', 0)"))
+        connection.execute(text("DELETE FROM vehiculos"))
+        rows = connection.execute(text("SELECT table_name, row_id, op FROM changes ORDER BY seq")).all()
+    engine.dispose()
+    assert rows == [("planetas", 1, "upsert"), ("planetas", 1, "delete"),
+                    ("vehiculos", 1, "upsert"), ("vehiculos", 1, "delete")]
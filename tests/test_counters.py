@@ -0,0 +1,85 @@
+from sqlalchemy import update
+
+import counters
+import jobs
+from models import db, Personajes
+from purge import purge
+
+
+def seed(client, users=3):
+    client.post("/personajes", json=[
+        {"name": "Personaje %d" % index, "eye_color": "blue", "hair_color": "brown"} for index in range(4)
+    ])
+    client.post("/users", json=[
+        {"email": "user%d@example.com" % index, "password": "x", "is_active": True} for index in range(users)
+    ])
+
+
+def favorite(client, personaje_id, user_id):
+    return client.post("/favoritos_personajes", json={"personajes_relacion": personaje_id, "usuarios_relacion": user_id})
+
+
+def top(client, path="/personajes/top"):
+    return [(item["id"], item["favorite_count"]) for item in client.get(path).json["data"]]
+
+
+def test_counts_follow_inserts_and_purges(app, client):
+    seed(client)
+    for user_id in (1, 2, 3):
+        favorite(client, 2, user_id)
+    favorite(client, 3, 1)
+    favorite(client, 3, 1)  # Repetido: no cuenta dos veces
+    client.post("/favoritos_personajes", json=[
+        {"personajes_relacion": 4, "usuarios_relacion": 2}, {"personajes_relacion": 4, "usuarios_relacion": 3},
+    ])
+    assert top(client) == [(2, 3), (4, 2), (3, 1), (1, 0)]
+
+    client.delete("/user/1")
+    assert top(client)[:1] == [(2, 3)]  # El borrado lógico no cambia el contador hasta la purga
+    with app.app_context():
+        purge()
+    assert top(client) == [(2, 2), (4, 2), (1, 0), (3, 0)]
+
+
+def test_top_skips_deleted_and_honors_limit(client):
+    seed(client)
+    favorite(client, 1, 1)
+    favorite(client, 1, 2)
+    favorite(client, 3, 1)
+    client.delete("/favorite/personaje/1")
+    assert top(client, "/personajes/top?limit=2") == [(3, 1), (2, 0)]
+    assert client.get("/planetas/top").json["data"] == []
+
+
+def test_reconcile_repairs_drift(app, client):
+    seed(client)
+    favorite(client, 2, 1)
+    favorite(client, 2, 2)
+    with app.app_context():
+        db.session.execute(update(Personajes.__table__).values(favorite_count=7))
+        db.session.execute(update(Personajes.__table__).where(Personajes.id == 2).values(favorite_count=0))
+        db.session.commit()
+
+        fixed = counters.reconcile(batch_size=3)
+
+    assert fixed == {"personajes": 4, "vehiculos": 0, "planetas": 0}
+    assert top(client) == [(2, 2), (1, 0), (3, 0), (4, 0)]
+
+
+def test_reconcile_job(app, client):
+    seed(client)
+    favorite(client, 4, 1)
+    with app.app_context():
+        db.session.execute(update(Personajes.__table__).values(favorite_count=5))
+        db.session.commit()
+    response = client.post("/jobs/reconcile-counts", json={"batch_size": 2})
+    assert response.status_code == 202
+    assert client.post("/jobs/reconcile-counts", json={"batch_size": 0}).status_code == 400
+
+    with app.app_context():
+        assert jobs.claim() == response.json["id"]
+        jobs.run(response.json["id"])
+    job = client.get("/jobs/%d" % response.json["id"]).json["data"]
+    assert job["status"] == "done"
+    assert job["result"]["personajes"] == 4
+    assert top(client)[0] == (4, 1)
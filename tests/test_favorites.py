@@ -0,0 +1,49 @@
+import pytest
+
+
+def seed(client, users):
+    client.post("/personajes", json=[
+        {"name": "Personaje %d" % index, "eye_color": "blue", "hair_color": "brown"} for index in range(3)
+    ])
+    client.post("/vehiculos", json=[{"name": "Vehiculo %d" % index, "model": "X"} for index in range(3)])
+    client.post("/planetas", json=[{"name": "Planeta %d" % index, "population": "1000"} for index in range(3)])
+    client.post("/users", json=[
+        {"email": "user%d@example.com" % index, "password": "x", "is_active": True} for index in range(users)
+    ])
+    for user_id in range(1, users + 1):
+        for entity_id in range(1, 4):
+            client.post("/favoritos_personajes", json={"personajes_relacion": entity_id, "usuarios_relacion": user_id})
+            client.post("/favoritos_vehiculos", json={"vehiculos_relacion": entity_id, "usuarios_relacion": user_id})
+            client.post("/favoritos_planetas", json={"planetas_relacion": entity_id, "usuarios_relacion": user_id})
+
+
+def count_statements(client, statements, path):
+    del statements[:]
+    response = client.get(path)
+    assert response.status_code == 200
+    return response, len(statements)
+
+
+@pytest.mark.parametrize("users", [1, 8])
+def test_users_favorites_query_count_is_fixed(client, statements, users):
+    seed(client, users)
+    response, count = count_statements(client, statements, "/users/favorites")
+    data = response.json["data"]
+    assert len(data) == users
+    assert all(len(user["favoritos"][kind]) == 3 for user in data for kind in ("personajes", "vehiculos", "planetas"))
+    # Página de usuarios + una consulta por cada tipo de favorito, sin importar cuántos usuarios haya
+    assert count == 4
+
+
+def test_user_favorites_query_count_is_fixed(client, statements):
+    seed(client, 3)
+    response, count = count_statements(client, statements, "/users/2/favorites")
+    assert [item["id"] for item in response.json["data"]["favoritos"]["planetas"]] == [1, 2, 3]
+    assert count == 4
+
+
+def test_deleted_entities_are_left_out(client):
+    seed(client, 1)
+    client.delete("/favorite/vehiculo/2")
+    favoritos = client.get("/users/1/favorites").json["data"]["favoritos"]
+    assert [item["id"] for item in favoritos["vehiculos"]] == [1, 3]
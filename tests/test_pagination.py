@@ -0,0 +1,67 @@
+import pytest
+
+import utils
+from utils import encode_cursor
+
+
+@pytest.fixture
+def catalog(client):
+    client.post("/personajes", json=[
+        {"name": "Personaje %d" % index, "eye_color": "blue", "hair_color": "brown"} for index in range(7)
+    ])
+    client.delete("/favorite/personaje/4")  # Las filas con borrado lógico no cuentan en las páginas
+    return client
+
+
+def walk(client, path):
+    ids, after = [], None
+    while True:
+        query = path + ("&after=" + after if after else "")
+        body = client.get(query).json
+        ids.append([item["id"] for item in body["data"]])
+        after = body["next_cursor"]
+        if after is None:
+            return ids
+
+
+@pytest.mark.parametrize("path", ["/personajes?limit=2", "/personajes?limit=2&fields=name", "/users?limit=2"])
+def test_pages_cover_every_row_once(catalog, path):
+    if path.startswith("/users"):
+        for index in range(5):
+            catalog.post("/users", json={"email": "user%d@example.com" % index, "password": "x", "is_active": True})
+        expected = [1, 2, 3, 4, 5]
+    else:
+        expected = [1, 2, 3, 5, 6, 7]
+    pages = walk(catalog, path)
+    assert all(len(page) <= 2 for page in pages)
+    assert [item for page in pages for item in page] == expected
+
+
+def test_last_full_page_has_no_cursor(catalog):
+    body = catalog.get("/personajes?limit=6").json
+    assert len(body["data"]) == 6 and body["next_cursor"] is None
+
+
+def test_tampered_cursor_is_rejected(catalog):
+    cursor = catalog.get("/personajes?limit=2").json["next_cursor"]
+    assert catalog.get("/personajes?after=" + cursor[:-1] + "!").status_code == 400
+    assert catalog.get("/personajes?after=not-a-cursor").status_code == 400
+    assert catalog.get("/personajes?after=" + encode_cursor("x")).status_code == 400
+
+
+def test_cursor_of_other_kind_is_rejected(catalog):
+    assert catalog.get("/personajes?after=" + encode_cursor(2, kind="pos")).status_code == 400
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "abc"])
+def test_invalid_limit_is_rejected(catalog, limit):
+    response = catalog.get("/personajes?limit=" + limit)
+    assert response.status_code == 400
+    assert response.json["message"] == "Invalid limit"
+
+
+def test_large_limit_is_capped(catalog, monkeypatch):
+    monkeypatch.setattr(utils, "MAX_PAGE_SIZE", 3)
+    body = catalog.get("/personajes?limit=1000").json
+    assert [item["id"] for item in body["data"]] == [1, 2, 3]
+    assert body["next_cursor"] is not None
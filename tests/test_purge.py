@@ -0,0 +1,69 @@
+from sqlalchemy import func, select
+
+from models import db, Users, Personajes, Favoritos_personajes
+from purge import purge
+
+
+def count(model):
+    return db.session.scalar(select(func.count()).select_from(model))
+
+
+def favorite_count(personaje_id):
+    return db.session.get(Personajes, personaje_id).favorite_count
+
+
+def seed(client, users=2, personajes=2):
+    for index in range(users):
+        client.post("/users", json={"email": "user%d@example.com" % index, "password": "x", "is_active": True})
+    for index in range(personajes):
+        client.post("/personajes", json={"name": "Personaje %d" % index, "eye_color": "blue", "hair_color": "brown"})
+    for user_id in range(1, users + 1):
+        for personaje_id in range(1, personajes + 1):
+            client.post("/favoritos_personajes", json={"personajes_relacion": personaje_id, "usuarios_relacion": user_id})
+
+
+def test_soft_delete_hides_row_until_purged(app, client):
+    seed(client)
+    assert client.delete("/favorite/personaje/1").status_code == 200
+    assert client.get("/personajes/1").status_code == 404
+    with app.app_context():
+        assert count(Personajes) == 2
+
+        counts = purge(batch_size=10)
+
+        assert counts == {"favoritos_personajes": 2, "personajes": 1}
+        assert count(Personajes) == 1
+        assert count(Favoritos_personajes) == 2
+
+
+def test_purging_user_fixes_favorite_counts(app, client):
+    seed(client)
+    with app.app_context():
+        assert favorite_count(2) == 2
+    client.delete("/user/1")
+    with app.app_context():
+        assert purge(batch_size=10) == {"favoritos_personajes": 2, "users": 1}
+        assert count(Users) == 1
+        assert favorite_count(1) == 1 and favorite_count(2) == 1
+
+
+def test_purge_works_in_batches(app, client):
+    seed(client, users=1, personajes=5)
+    for personaje_id in range(1, 6):
+        client.delete("/favorite/personaje/%d" % personaje_id)
+    reported = []
+    with app.app_context():
+        assert purge(batch_size=2, max_batches=2, progress=reported.append) == {"favoritos_personajes": 4}
+        assert reported == [2, 4]
+        assert count(Favoritos_personajes) == 1 and count(Personajes) == 5
+
+        assert purge(batch_size=2) == {"favoritos_personajes": 1, "personajes": 5}
+        assert count(Personajes) == 0
+
+
+def test_grace_period_keeps_recent_deletes(app, client):
+    seed(client, users=1, personajes=1)
+    client.delete("/favorite/personaje/1")
+    with app.app_context():
+        assert purge(grace_seconds=3600) == {}
+        assert count(Personajes) == 1
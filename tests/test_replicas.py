@@ -0,0 +1,89 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import replicas
+import versioning
+from config import database_uri
+from models import db, Personajes
+
+PRIMARY = database_uri().replace("sqlite:///", "", 1)
+
+
+def names(response):
+    return [item["name"] for item in response.json["data"]]
+
+
+@pytest.fixture
+def with_replicas(app, monkeypatch):
+    """
+    Registra réplicas en la aplicación durante la prueba y las quita al terminar.
+    """
+    routers = []
+
+    def install(*urls):
+        monkeypatch.setattr(app, "_got_first_request", False)  # Flask solo deja añadir hooks antes de la primera petición
+        routers.append(replicas.init_app(app, urls=list(urls)))
+        return routers[-1]
+
+    yield install
+    for router in routers:
+        app.before_request_funcs[None].remove(replicas.route_request)
+        app.after_request_funcs[None].remove(replicas.stick_to_primary)
+        del app.error_handler_spec[None][None][OperationalError]
+        del app.extensions["replicas"]
+        for engine in router.engines:
+            engine.dispose()
+
+
+@pytest.fixture
+def lagging_replica(app, client, with_replicas, tmp_path):
+    # Copia del primario en solo lectura: lo que se escriba después en el primario no llega a la réplica
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    path = str(tmp_path / "replica.db")
+    shutil.copy(PRIMARY, path)
+    return with_replicas("sqlite:///file:{}?mode=ro&uri=true".format(path))
+
+
+def write_on_primary(app, name):
+    with app.app_context(), Session(db.engine) as session:
+        session.execute(insert(Personajes.__table__).values(name=name, eye_color="brown", hair_color="brown"))
+        versioning.bump(session, Personajes.__tablename__)
+        session.commit()
+
+
+def test_reads_go_to_replica(app, lagging_replica):
+    write_on_primary(app, "Leia")
+    reader = app.test_client()
+    assert names(reader.get("/personajes")) == ["Luke"]
+    assert names(reader.get("/personajes", headers={"X-Read-Primary": "1"})) == ["Luke", "Leia"]
+
+
+def test_writer_reads_own_write_despite_cached_replica_body(app, lagging_replica):
+    writer, reader = app.test_client(), app.test_client()
+    created = writer.post("/personajes", json={"name": "Leia", "eye_color": "brown", "hair_color": "brown"})
+    assert created.status_code == 200
+    assert writer.get_cookie(replicas.STICKY_COOKIE) is not None
+
+    stale = reader.get("/personajes")  # Llena la caché con el cuerpo de la réplica retrasada
+    assert names(stale) == ["Luke"]
+
+    fresh = writer.get("/personajes")
+    assert names(fresh) == ["Luke", "Leia"]
+    assert fresh.headers["ETag"] != stale.headers["ETag"]
+    assert names(reader.get("/personajes")) == ["Luke"]  # La réplica sigue respondiendo con su propia versión
+
+
+def test_failover_to_primary(app, client, with_replicas, tmp_path):
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    missing = os.path.join(str(tmp_path), "missing.db")
+    router = with_replicas("sqlite:///file:{}?mode=ro&uri=true".format(missing))
+
+    response = app.test_client().get("/personajes")
+
+    assert response.status_code == 200 and names(response) == ["Luke"]
+    assert router.status()[0]["healthy"] is False
@@ -0,0 +1,28 @@
+from sqlalchemy import text
+
+import search
+from models import db, Personajes
+
+
+def test_index_created_by_another_process_is_picked_up(app, client):
+    client.post("/personajes", json={"name": "Luke Skywalker", "eye_color": "blue", "hair_color": "blond"})
+    with app.app_context():
+        assert not search.has_fts(Personajes)
+        try:
+            # Lo que hace `flask search-index` desde otro proceso (sin tocar la memoria de este)
+            for statement in search.sqlite_index_statements("personajes"):
+                db.session.execute(text(statement))
+            db.session.execute(text("INSERT INTO personajes_fts(personajes_fts) VALUES ('rebuild')"))
+            db.session.commit()
+            assert search.has_fts(Personajes)
+            assert [item["name"] for item in client.get("/personajes?name=sky").json["data"]] == ["Luke Skywalker"]
+        finally:
+            db.session.execute(text("DROP TABLE IF EXISTS personajes_fts"))
+            db.session.commit()
+            search._fts_tables.clear()
+
+
+def test_name_filter_without_index(client):
+    client.post("/personajes", json={"name": "Luke Skywalker", "eye_color": "blue", "hair_color": "blond"})
+    client.post("/personajes", json={"name": "Leia Organa", "eye_color": "brown", "hair_color": "brown"})
+    assert [item["name"] for item in client.get("/personajes?name=organa").json["data"]] == ["Leia Organa"]
@@ -0,0 +1,24 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from serialization import get_encoder, orjson
+
+pytestmark = pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+
+
+def test_orjson_matches_stdlib_for_catalog_types():
+    body = {
+        "msg": "OK",
+        "data": [{"id": 1, "name": "Padmé Amidala", "is_active": True, "deleted_at": None},
+                 {"id": 2, "name": "C-3PO", "created": datetime(2024, 5, 4, 12, 0)}],
+        "next_cursor": "aWQ6Mg",
+    }
+    assert get_encoder("orjson")(body) == get_encoder("stdlib")(body)
+
+
+def test_orjson_floats_parse_to_the_same_values():
+    # Solo cambia la notación de los float, no su valor
+    body = {"data": [{"score": value} for value in (1e-6, 1e16, 2.5e-05, 0.1, 3.0)]}
+    assert json.loads(get_encoder("orjson")(body)) == json.loads(get_encoder("stdlib")(body))
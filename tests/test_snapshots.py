@@ -0,0 +1,72 @@
+import gzip
+import json
+import os
+import threading
+
+import pytest
+
+import snapshots
+from models import Personajes
+
+
+@pytest.fixture
+def snapshot_dir(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshots, "_pointers", {})
+    for name in ("Luke", "Leia"):
+        client.post("/personajes", json={"name": name, "eye_color": "blue", "hair_color": "brown"})
+    return tmp_path
+
+
+def test_build_writes_both_files_atomically(app, snapshot_dir):
+    with app.app_context():
+        pointer = snapshots.build(Personajes)
+    assert pointer["rows"] == 2
+    raw = (snapshot_dir / pointer["file"]).read_bytes()
+    assert gzip.decompress((snapshot_dir / (pointer["file"] + ".gz")).read_bytes()) == raw
+    assert [json.loads(line)["name"] for line in raw.splitlines()] == ["Luke", "Leia"]
+    assert json.loads((snapshot_dir / "personajes.json").read_text()) == pointer
+    assert not [name for name in os.listdir(snapshot_dir) if name.startswith(".tmp-") or name.endswith(".part")]
+
+
+def test_concurrent_builds_write_once(app, snapshot_dir, monkeypatch):
+    written = []
+    write_atomic = snapshots.write_atomic
+    monkeypatch.setattr(snapshots, "write_atomic", lambda path, write: written.append(path) or write_atomic(path, write))
+    results, errors = [], []
+
+    def worker():
+        try:
+            with app.app_context():
+                results.append(snapshots.build(Personajes))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len({json.dumps(result, sort_keys=True) for result in results}) == 1
+    assert sorted(os.path.basename(path) for path in written) == [
+        "personajes-2.ndjson", "personajes-2.ndjson.gz", "personajes.json"
+    ]
+
+
+def test_snapshot_not_modified_for_either_encoding(app, snapshot_dir):
+    with app.app_context():
+        pointer = snapshots.build(Personajes)
+    identity = '"personajes-{}-ndjson"'.format(pointer["version"])
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": identity}
+    with app.test_request_context("/personajes?stream=1", headers=headers):
+        response = snapshots.serve_snapshot()
+    assert response.status_code == 304
+    assert response.headers["ETag"] == identity
+
+    with app.test_request_context("/personajes?stream=1", headers={"Accept-Encoding": "gzip"}):
+        response = snapshots.serve_snapshot()
+    assert response.status_code == 200 and response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == '"personajes-{}-ndjson-gzip"'.format(pointer["version"])
+    response.close()
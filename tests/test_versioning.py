@@ -0,0 +1,62 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import versioning
+from models import db, Personajes
+
+
+def write_elsewhere(app, name):
+    # Escritura de otro proceso (worker, CLI, otro gunicorn): sube la versión pero no invalida esta caché
+    with app.app_context(), Session(db.engine) as session:
+        session.execute(insert(Personajes.__table__).values(name=name, eye_color="blue", hair_color="black"))
+        versioning.bump(session, Personajes.__tablename__)
+        session.commit()
+
+
+def test_other_process_write_is_not_hidden_by_cache(app, client):
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    first = client.get("/personajes")
+    by_id = client.get("/personajes/2")
+    assert by_id.status_code == 404
+
+    write_elsewhere(app, "Leia")
+
+    second = client.get("/personajes")
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert [item["name"] for item in second.json["data"]] == ["Luke", "Leia"]
+    assert client.get("/personajes/2").json["data"]["name"] == "Leia"
+    assert [item["name"] for item in client.get("/personajes?ids=1,2").json["data"]] == ["Luke", "Leia"]
+
+
+def test_not_modified_while_version_unchanged(client):
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    etag = client.get("/personajes").headers["ETag"]
+    assert client.get("/personajes", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/personajes", json={"name": "Leia", "eye_color": "brown", "hair_color": "brown"})
+    assert client.get("/personajes", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_etag_names_the_encoding_actually_sent(client):
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    small = client.get("/personajes/1", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert small.headers["ETag"] == '"personajes-1-json"'
+
+    for index in range(30):
+        client.post("/personajes", json={"name": "Clone %d" % index, "eye_color": "brown", "hair_color": "black"})
+    large = client.get("/personajes", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert large.headers["ETag"].endswith('-json-gzip"')
+
+    stream = client.get("/personajes?stream=1", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in stream.headers
+    assert stream.headers["ETag"].endswith('-ndjson"')
+
+
+def test_not_modified_varies_on_encoding(client):
+    client.post("/personajes", json={"name": "Luke", "eye_color": "blue", "hair_color": "blond"})
+    etag = client.get("/personajes/1", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    cached = client.get("/personajes/1", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert "Accept-Encoding" in cached.headers["Vary"]
+    assert cached.headers["ETag"] == etag